@@ -0,0 +1,208 @@
+# Python script to shard the APK build job of .github/workflows/android_build.yml by ABI.
+#
+# The build job gets a strategy.matrix with one entry per target platform, so every ABI
+# is built by its own runner at the same time (the wall-clock time of the build step
+# drops roughly with the number of shards). In the job:
+#   - the "flutter build apk" step builds only ${{ matrix.target-platform }}
+#     (--split-per-abi, so the APK is named after ${{ matrix.abi }});
+#   - the APK upload step uploads that one APK as the artifact "apk-<abi>", the debug
+#     symbols (if the build is obfuscated) as "symbols-<abi>".
+# Every other step (checkout, setup, keystore decoding, ...) is left as it is, in place.
+# A "collect-apks" job that needs the build job downloads the per-ABI artifacts and
+# uploads them together as app-release-apks (and app-release-symbols).
+#
+# Running it again with the same options changes nothing; with other platforms or
+# fail-fast settings it rewrites the strategy.
+#
+# Usage:
+#   python abi_matrix.py [--platforms android-arm,android-arm64] [--fail-fast] [--max-parallel N]
+
+import argparse
+import re
+import sys
+
+from release_profile_step import (apk_output_directory, find_build_step, find_upload_step, platform_abis,
+                                  rewrite_build_command, step_working_directory, symbols_directory,
+                                  symbols_step_name)
+from transaction import write_file
+from workflow_document import WorkflowDocument, mapping_keys, reindent
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+build_job_name = "build"
+collect_job_name = "collect-apks"
+default_platforms = ("android-arm", "android-arm64", "android-x64")
+
+def strategy_block(platforms, fail_fast=False, max_parallel=None):
+    text = "strategy:\n"
+    text += f"  fail-fast: {'true' if fail_fast else 'false'}\n"
+    if max_parallel:
+        text += f"  max-parallel: {max_parallel}\n"
+    text += "  matrix:\n    include:\n"
+    for platform in platforms:
+        text += f"      - target-platform: {platform}\n        abi: {platform_abis[platform]}\n"
+    return text
+
+
+def strategy_settings(lines, job_name=build_job_name):
+    # (fail_fast, max_parallel) of the job's current strategy; the defaults without one
+    document = WorkflowDocument.from_lines(lines)
+    job = document.find_job(job_name)
+    key_indent, keys = mapping_keys(lines, job.start + 1, job.end)
+    fail_fast = False
+    max_parallel = None
+    if "strategy" in keys:
+        start, end = keys["strategy"]
+        for line in lines[start + 1:end]:
+            key, _, value = line.strip().partition(":")
+            if key == "fail-fast":
+                fail_fast = value.split("#", 1)[0].strip() == "true"
+            elif key == "max-parallel" and value.strip().isdigit():
+                max_parallel = int(value.strip())
+    return fail_fast, max_parallel
+
+
+def matrix_upload_step(name, app_directory):
+    return (f"- name: {name}\n"
+            f"  uses: actions/upload-artifact@v4\n"
+            f"  with:\n"
+            f"    name: apk-${{{{ matrix.abi }}}}\n"
+            f"    path: {app_directory}/{apk_output_directory}/app-${{{{ matrix.abi }}}}-release.apk\n"
+            f"    if-no-files-found: error\n")
+
+
+def matrix_symbols_step(app_directory):
+    return (f"- name: {symbols_step_name}\n"
+            f"  uses: actions/upload-artifact@v4\n"
+            f"  with:\n"
+            f"    name: symbols-${{{{ matrix.abi }}}}\n"
+            f"    path: {app_directory}/{symbols_directory}\n"
+            f"    if-no-files-found: error\n")
+
+
+def collect_job(build_job, with_symbols):
+    text = (f"{collect_job_name}:\n"
+            f"  name: Collect release APKs\n"
+            f"  needs: {build_job}\n"
+            f"  runs-on: ubuntu-latest\n"
+            f"  steps:\n"
+            f"    - name: Download per-ABI APKs\n"
+            f"      uses: actions/download-artifact@v4\n"
+            f"      with:\n"
+            f"        pattern: apk-*\n"
+            f"        path: apks\n"
+            f"        merge-multiple: true\n"
+            f"\n"
+            f"    - name: Upload release APKs\n"
+            f"      uses: actions/upload-artifact@v4\n"
+            f"      with:\n"
+            f"        name: app-release-apks\n"
+            f"        path: apks/*.apk\n"
+            f"        if-no-files-found: error\n")
+    if with_symbols:
+        text += ("\n"
+                 "    - name: Download per-ABI debug symbols\n"
+                 "      uses: actions/download-artifact@v4\n"
+                 "      with:\n"
+                 "        pattern: symbols-*\n"
+                 "        path: symbols\n"
+                 "        merge-multiple: true\n"
+                 "\n"
+                 "    - name: Upload release debug symbols\n"
+                 "      uses: actions/upload-artifact@v4\n"
+                 "      with:\n"
+                 "        name: app-release-symbols\n"
+                 "        path: symbols\n"
+                 "        if-no-files-found: error\n")
+    return text
+
+
+def _differs(lines, start, end, text):
+    current = [line.strip() for line in lines[start:end] if line.strip()]
+    return current != [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def abi_matrix(lines, platforms=default_platforms, fail_fast=False, max_parallel=None, job_name=build_job_name):
+    document = WorkflowDocument.from_lines(lines)
+    if job_name not in [job.name for job in document.jobs()]:
+        print(f"Warning: job '{job_name}' not found. Build matrix not added.")
+        return lines
+    job = document.find_job(job_name)
+    build, command_index = find_build_step(document, lines)
+    if build is None or build.job != job_name:
+        print(f"Warning: job '{job_name}' has no 'flutter build apk' step. Build matrix not added.")
+        return lines
+
+    # strategy: after runs-on (or replacing the one there is)
+    key_indent, keys = mapping_keys(lines, job.start + 1, job.end)
+    strategy = strategy_block(platforms, fail_fast, max_parallel)
+    if "strategy" in keys:
+        start, end = keys["strategy"]
+        if _differs(lines, start, end, strategy):
+            document.replace_lines(start, end, reindent(strategy, key_indent))
+    else:
+        anchor = max((end for key, (start, end) in keys.items() if key in ("name", "runs-on", "needs", "if")),
+                     default=job.start + 1)
+        document.insert_lines(anchor, reindent(strategy, key_indent))
+
+    # The build step builds the shard's platform, keeping --obfuscate if it was there
+    prefix, command = re.match(r"^(\s*(?:-\s+)?(?:run:\s+)?)(.*?)\s*$", lines[command_index]).groups()
+    profile = {"split_per_abi": True, "platforms": ("${{ matrix.target-platform }}",),
+               "obfuscate": "--obfuscate" in command.split()}
+    new_command = rewrite_build_command(command, profile)
+    if new_command != command:
+        document.replace_lines(command_index, command_index + 1, [f"{prefix}{new_command}\n"])
+
+    app_directory = step_working_directory(lines, build)
+    upload = find_upload_step(document, lines, build)
+    if upload is not None:
+        text = matrix_upload_step(upload.name or "Upload APK artifact", app_directory)
+        if _differs(lines, upload.start, upload.end, text):
+            document.replace_lines(upload.start, upload.end, reindent(text, upload.indent))
+    if profile["obfuscate"] and document.has_step(symbols_step_name, job_name):
+        symbols = document.find_step(symbols_step_name, job_name)
+        text = matrix_symbols_step(app_directory)
+        if _differs(lines, symbols.start, symbols.end, text):
+            document.replace_lines(symbols.start, symbols.end, reindent(text, symbols.indent))
+
+    collector = collect_job(job_name, profile["obfuscate"])
+    if collect_job_name in [existing.name for existing in document.jobs()]:
+        existing = document.find_job(collect_job_name)
+        if _differs(lines, existing.start, existing.end, collector):
+            document.replace_lines(existing.start, existing.end, reindent(collector, existing.indent))
+    else:
+        document.insert_lines(job.end, ["\n"] + reindent(collector, job.indent))
+
+    return document.lines() if document.is_modified() else lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shard the APK build job into a matrix over target platforms.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to rewrite")
+    parser.add_argument("--job", default=build_job_name, help="the job that builds the APK")
+    parser.add_argument("--platforms", default=",".join(default_platforms),
+                        help=f"comma-separated target platforms ({', '.join(platform_abis)})")
+    parser.add_argument("--fail-fast", action="store_true", help="cancel the other shards when one fails")
+    parser.add_argument("--max-parallel", type=int, help="at most this many shards at the same time")
+    args = parser.parse_args(argv)
+
+    platforms = [platform.strip() for platform in args.platforms.split(",") if platform.strip()]
+    unknown = [platform for platform in platforms if platform not in platform_abis]
+    if unknown or not platforms:
+        parser.error(f"Unknown target platform(s): {', '.join(unknown) or '(none given)'}.")
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+
+    new_lines = abi_matrix(lines, platforms, args.fail_fast, args.max_parallel, args.job)
+
+    if new_lines is not lines:
+        write_file(args.file, "".join(new_lines))
+        print(f"Sharded job '{args.job}' of {args.file} over {', '.join(platforms)}.")
+    else:
+        print(f"Job '{args.job}' of {args.file} is already sharded that way.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
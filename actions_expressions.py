@@ -0,0 +1,415 @@
+# Python module to find, list and rewrite the GitHub Actions expressions of a workflow.
+#
+# An expression is "${{ ... }}" anywhere in a value (if:, env:, with:, run: and block
+# scalars alike), or the bare value of an "if:" key, which Actions evaluates as an
+# expression without the braces. The scanner walks the text once, jumping from one
+# expression to the next: a single regex match covers a whole "${{ ... }}", string
+# literals included, so braces and quotes in them ("format('{{0}}', x)") do not end the
+# expression. An unterminated expression ends where the next "${{" starts (or at the
+# end of the text) and the scan goes on after it; rewrites leave it as it is. The tokens of an expression (strings, numbers, function names,
+# operators and context references such as "secrets.RELEASE_KEY_ALIAS" or
+# "steps.merkle.outputs.x") are only computed when a rewrite needs them.
+#
+# Rewrites, both applied in the same pass:
+#   - normalize: "${{{{ x }}}}" (a template's doubled braces written out twice, as by
+#     modify_workflow.py) or any other brace count -> "${{ x }}";
+#   - renames: {"secrets.OLD": "secrets.NEW", "github.head_ref": "..."} replace the
+#     context references starting with a key, case-insensitively like Actions itself
+#     ("secrets.old_name.x" matches "secrets.OLD_NAME"); the longest key wins. A
+#     reference is followed through string indexes ("secrets['OLD']" matches
+#     "secrets.OLD" and becomes "secrets['NEW']"); a computed index
+#     ("secrets[format(...)]") ends it. Other text in string literals is never renamed.
+#
+# Usage:
+#   python actions_expressions.py                  # list the expressions with their positions
+#   python actions_expressions.py --check          # exit 1 if one is badly escaped or unterminated
+#   python actions_expressions.py --normalize [--rename secrets.OLD=secrets.NEW ...] [--dry-run]
+
+import argparse
+import collections
+import re
+import sys
+
+from transaction import write_file
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+# kind: "space", "string", "number", "function", "reference", "literal", "operator" or
+# "other"; start: offset in the expression's body
+Token = collections.namedtuple("Token", ["kind", "text", "start"])
+
+# A context reference with its property path: segments ("secrets", "OLD_NAME"), indexed
+# (per segment, True when written as a string index: "secrets['OLD_NAME']"), and the
+# tokens [first, last) it spans
+Reference = collections.namedtuple("Reference", ["segments", "indexed", "first", "last"])
+
+# braces / closing: brace counts of "${{" and "}}" (0 for a bare "if:" value); body: the
+# text between them, starting at body_start; closed: False for an unterminated one
+Expression = collections.namedtuple(
+    "Expression", ["start", "end", "line", "column", "braces", "closing", "body", "body_start", "closed"])
+
+# A whole "${{ ... }}" in one match: the body is anything but "}}" (or the start of
+# another expression) outside string literals. The closing braces are optional, so the
+# match never fails (and never backtracks); without them the expression is
+# unterminated. "${{" stays outside of the groups so that the regex engine can search
+# for it as a literal prefix.
+_expression_pattern = re.compile(r"""
+    \$\{\{(?P<extra>\{*)
+    (?P<body>(?:[^'}$]+|\}(?!\})|\$(?!\{\{)|'(?:[^']|'')*(?:'|\Z))*)
+    (?P<closing>\}\}+)?
+""", re.VERBOSE | re.DOTALL)
+# At a line start. Searched for as the literal "if:" (an alternation of both patterns,
+# or a "^" pattern, makes the regex engine try every position of the text instead).
+_if_key_pattern = re.compile(r"[ \t]*(?:-[ \t]+)?if:[ \t]*")
+_token_pattern = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>'(?:[^']|'')*(?:'|\Z))
+  | (?P<number>-?(?:0x[0-9A-Fa-f]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)(?![\w-]))
+  | (?P<function>[A-Za-z_][\w-]*(?=\s*\())
+  | (?P<reference>[A-Za-z_][\w-]*(?:\.(?:[A-Za-z_][\w-]*|\*))*)
+  | (?P<operator>==|!=|<=|>=|&&|\|\||[<>!()\[\],.*])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+_literals = {"true", "false", "null", "nan", "infinity"}
+
+
+def _tokenize(text, position, end):
+    found = []
+    while position < end:
+        match = _token_pattern.match(text, position, end)
+        kind = match.lastgroup
+        if kind == "reference" and match.group().lower() in _literals:
+            kind = "literal"
+        found.append(Token(kind, match.group(), position))
+        position = match.end()
+    return found
+
+
+def tokens(expression):
+    return _tokenize(expression.body, 0, len(expression.body))
+
+
+def _bare_if_value(text, start):
+    # (value start, value end) of the "if:" value at start, or None when it is not a
+    # bare expression (empty, a block scalar, or already using "${{ }}")
+    end = text.find("\n", start)
+    end = len(text) if end < 0 else end
+    value = text[start:end].rstrip("\r")
+    if not value or value[0] in "|>#" or "${{" in value:
+        return None
+    if value[0] in "\"'":
+        closing = value.rfind(value[0])
+        if closing > 0:
+            return start + 1, start + closing
+        return None
+    # A YAML comment ends the value, unless the "#" is in a string literal
+    end = start
+    for token in _tokenize(text, start, start + len(value)):
+        if token.text == "#" and token.start > start and text[token.start - 1] in " \t":
+            break
+        if token.kind != "space":
+            end = token.start + len(token.text)
+    return (start, end) if end > start else None
+
+
+def _next_if_key(text, position):
+    while True:
+        found = text.find("if:", position)
+        if found < 0:
+            return None
+        match = _if_key_pattern.match(text, text.rfind("\n", 0, found) + 1)
+        if match is not None and match.end() > found:
+            return match
+        position = found + 3
+
+
+def iter_expressions(text):
+    position = 0
+    line = 1
+    line_start = 0
+    counted = 0
+    # The next expression and the next "if:" key; each is searched for again only once
+    # the scan has passed it, and never again once there is none left
+    expression_match = _expression_pattern.search(text)
+    if_match = _next_if_key(text, 0)
+    while expression_match is not None or if_match is not None:
+        if if_match is None or (expression_match is not None and expression_match.start() < if_match.start()):
+            match = expression_match
+        else:
+            match = if_match
+        start = match.start()
+        # Line and column incrementally: every character is counted once
+        newlines = text.count("\n", counted, start)
+        if newlines:
+            line += newlines
+            line_start = text.rindex("\n", counted, start) + 1
+        counted = start
+
+        if match is expression_match:
+            braces = 2 + len(match.group("extra"))
+            closing = match.group("closing")
+            if closing is None:
+                end = match.end()
+                yield Expression(start, end, line, start - line_start + 1, braces, 0, match.group("body"),
+                                 match.start("body"), False)
+            else:
+                # "${{ x }}}" ends at the first "}}"; a run of doubled braces closes as a whole
+                closing = min(len(closing), max(braces, 2))
+                end = match.start("closing") + closing
+                yield Expression(start, end, line, start - line_start + 1, braces, closing, match.group("body"),
+                                 match.start("body"), True)
+            # An empty unterminated "${{" at the end of the text still moves the scan on
+            position = max(end, start + 1)
+        else:
+            position = match.end()
+            value = _bare_if_value(text, match.end())
+            if value is not None:
+                start, end = value
+                yield Expression(start, end, line, start - line_start + 1, 0, 0, text[start:end], start, True)
+                position = end
+        if expression_match is not None and expression_match.start() < position:
+            expression_match = _expression_pattern.search(text, position)
+        if if_match is not None and if_match.start() < position:
+            if_match = _next_if_key(text, position)
+
+
+def scan(text):
+    return list(iter_expressions(text))
+
+
+def scan_lines(lines):
+    return scan("".join(lines))
+
+
+def is_malformed(expression):
+    # Unterminated, or with other braces than "${{" / "}}"
+    if not expression.closed:
+        return True
+    return expression.braces != 0 and (expression.braces != 2 or expression.closing != 2)
+
+
+def _skip_space(expression_tokens, index):
+    while index < len(expression_tokens) and expression_tokens[index].kind == "space":
+        index += 1
+    return index
+
+
+def _string_index(expression_tokens, index):
+    # (key, index after "]") of a "['key']" at index, or None
+    opening = _skip_space(expression_tokens, index)
+    if opening >= len(expression_tokens) or expression_tokens[opening].text != "[":
+        return None
+    key = _skip_space(expression_tokens, opening + 1)
+    closing = _skip_space(expression_tokens, key + 1)
+    if (closing >= len(expression_tokens) or expression_tokens[key].kind != "string"
+            or expression_tokens[closing].text != "]" or not expression_tokens[key].text.endswith("'")):
+        return None
+    return expression_tokens[key].text[1:-1].replace("''", "'"), closing + 1
+
+
+def references(expression_tokens):
+    # The context references among the tokens of an expression ("github.ref",
+    # "secrets['KEY']"), not the properties of a parenthesized value ("(x).y")
+    previous = None
+    index = 0
+    while index < len(expression_tokens):
+        token = expression_tokens[index]
+        if token.kind == "space":
+            index += 1
+            continue
+        if token.kind != "reference" or (previous is not None and previous.text == "."):
+            previous = token
+            index += 1
+            continue
+        segments = token.text.split(".")
+        indexed = [False] * len(segments)
+        last = index + 1
+        while True:
+            string_index = _string_index(expression_tokens, last)
+            if string_index is not None:
+                segments.append(string_index[0])
+                indexed.append(True)
+                last = string_index[1]
+            elif (last + 1 < len(expression_tokens) and expression_tokens[last].text == "."
+                    and expression_tokens[last + 1].kind == "reference"):
+                # "secrets['A'].b"
+                segments += expression_tokens[last + 1].text.split(".")
+                indexed += [False] * (len(segments) - len(indexed))
+                last += 2
+            else:
+                break
+        yield Reference(segments, indexed, index, last)
+        previous = expression_tokens[last - 1]
+        index = last
+
+
+def render_reference(segments, indexed):
+    text = segments[0]
+    for segment, is_index in zip(segments[1:], indexed[1:]):
+        text += "['" + segment.replace("'", "''") + "']" if is_index else "." + segment
+    return text
+
+
+def source(expression, text):
+    return text[expression.start:expression.end]
+
+
+class ExpressionRewriter:
+    def __init__(self, renames=None, normalize=True):
+        self.normalize = normalize
+        # ("secrets", "old") -> "secrets.NEW"
+        self.renames = {}
+        for old, new in (renames or {}).items():
+            self.renames[tuple(old.lower().split("."))] = new
+        self.longest_key = max((len(key) for key in self.renames), default=0)
+        # Bodies mentioning none of the renamed contexts are not tokenized
+        self.contexts = {key[0] for key in self.renames}
+        # The expressions with a computed index ("secrets[format(...)]") into a renamed
+        # context: they may name a renamed key, but cannot be renamed
+        self.unresolved = []
+        # The unterminated expressions, copied through unchanged
+        self.unterminated = []
+
+    def _rename(self, reference):
+        # The new text of a Reference, None when no key matches; a renamed segment keeps
+        # the index style of the one it replaces
+        lowered = [segment.lower() for segment in reference.segments]
+        for length in range(min(len(lowered), self.longest_key), 0, -1):
+            new = self.renames.get(tuple(lowered[:length]))
+            if new is not None:
+                segments = new.split(".")
+                indexed = [position < length and reference.indexed[position] for position in range(len(segments))]
+                return render_reference(segments + reference.segments[length:], indexed + reference.indexed[length:])
+        return None
+
+    def _is_unresolved(self, reference, body_tokens):
+        # A prefix of a renamed key, followed by an index that is not a string
+        after = _skip_space(body_tokens, reference.last)
+        if after >= len(body_tokens) or body_tokens[after].text != "[":
+            return False
+        lowered = tuple(segment.lower() for segment in reference.segments)
+        return any(key[:len(lowered)] == lowered for key in self.renames if len(key) > len(lowered))
+
+    def render(self, expression):
+        # The new source of an expression
+        body = expression.body
+        lowered = body.lower()
+        if any(context in lowered for context in self.contexts):
+            body_tokens = tokens(expression)
+            pieces = []
+            position = 0
+            for reference in references(body_tokens):
+                new = self._rename(reference)
+                if new is None and self._is_unresolved(reference, body_tokens):
+                    self.unresolved.append(expression)
+                if new is not None:
+                    pieces.extend(token.text for token in body_tokens[position:reference.first])
+                    pieces.append(new)
+                    position = reference.last
+            if pieces:
+                body = "".join(pieces + [token.text for token in body_tokens[position:]])
+        if expression.braces == 0:
+            return body
+        if self.normalize:
+            return "${{" + body + "}}"
+        return "$" + "{" * expression.braces + body + "}" * expression.closing
+
+    def rewrite(self, text):
+        # Returns (new text, number of rewritten expressions)
+        if not self.renames and (not self.normalize or "${{{" not in text):
+            # Only opening braces beyond "${{" make an expression badly escaped
+            return text, 0
+        pieces = []
+        position = 0
+        count = 0
+        for expression in iter_expressions(text):
+            if not expression.closed:
+                self.unterminated.append(expression)
+                continue
+            new = self.render(expression)
+            if new != text[expression.start:expression.end]:
+                pieces.append(text[position:expression.start])
+                pieces.append(new)
+                position = expression.end
+                count += 1
+        if not count:
+            return text, 0
+        pieces.append(text[position:])
+        return "".join(pieces), count
+
+    def rewrite_lines(self, lines):
+        text, count = self.rewrite("".join(lines))
+        if not count:
+            return lines, 0
+        return text.splitlines(True), count
+
+
+def _parse_rename(value):
+    old, separator, new = value.partition("=")
+    if not separator or not old.strip() or not new.strip():
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW, got '{value}'")
+    return old.strip(), new.strip()
+
+
+def _report_skipped(rewriter, text):
+    for expression in rewriter.unterminated:
+        first_line = source(expression, text).split("\n", 1)[0]
+        print(f"  Warning: {expression.line}:{expression.column}  {first_line}  is unterminated and was left as it is.")
+    for expression in rewriter.unresolved:
+        print(f"  Warning: {expression.line}:{expression.column}  {source(expression, text)}"
+              f"  has a computed index and was not renamed.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, check and rewrite the GitHub Actions expressions of a workflow.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with status 1 if an expression is badly escaped or unterminated")
+    parser.add_argument("--normalize", action="store_true", help="rewrite badly escaped braces to ${{ }}")
+    parser.add_argument("--rename", action="append", type=_parse_rename, default=[], metavar="OLD=NEW",
+                        help="rename a context reference (secrets.OLD=secrets.NEW); can be repeated")
+    parser.add_argument("--dry-run", action="store_true", help="print the rewritten expressions without writing")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        text = f.read()
+
+    if args.normalize or args.rename:
+        rewriter = ExpressionRewriter(dict(args.rename), normalize=args.normalize)
+        if args.dry_run:
+            for expression in iter_expressions(text):
+                if not expression.closed:
+                    rewriter.unterminated.append(expression)
+                    continue
+                new = rewriter.render(expression)
+                if new != source(expression, text):
+                    print(f"  {expression.line}:{expression.column}  {source(expression, text)}  ->  {new}")
+            _report_skipped(rewriter, text)
+            return 0
+        new_text, count = rewriter.rewrite(text)
+        if count:
+            write_file(args.file, new_text)
+        print(f"Rewrote {count} expression(s) in {args.file}.")
+        _report_skipped(rewriter, text)
+        return 0
+
+    malformed = 0
+    expressions = 0
+    for expression in iter_expressions(text):
+        expressions += 1
+        note = ""
+        if not expression.closed:
+            note = "  (unterminated)"
+        elif is_malformed(expression):
+            note = f"  (opened with {expression.braces} braces, closed with {expression.closing})"
+        malformed += bool(note)
+        shown = source(expression, text) if expression.closed else source(expression, text).split("\n", 1)[0]
+        print(f"  {expression.line}:{expression.column}  {shown}{note}")
+    print(f"{expressions} expression(s) in {args.file}, {malformed} badly escaped or unterminated.")
+    if args.check and malformed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+# Python script to find which steps of android_build.yml use the most runner time.
+#
+# It reads GitHub Actions run logs downloaded as zip files ("Download log archive" or
+# GET /repos/{owner}/{repo}/actions/runs/{id}/logs), or the same archives unpacked.
+# Inside an archive every job has a folder with one file per step, "<number>_<step name>.txt",
+# and every log line starts with an ISO timestamp. A step runs from its first timestamp
+# until the next step starts (or until its own last timestamp for the last step).
+#
+# Step files are matched to the steps of the current workflow by name (the file names
+# lose characters such as "/" and ":", so names are compared normalized). For every
+# step it reports the duration distribution across runs (p50, p95, mean, max) and ranks
+# the steps by the total runner time they cost, which is where optimizing pays most.
+#
+# Usage:
+#   python actions_step_durations.py logs/*.zip
+#   python actions_step_durations.py logs/ --job "Build Flutter Android App" --json durations.json
+
+import argparse
+import calendar
+import collections
+import difflib
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+
+from workflow_document import WorkflowDocument
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+_timestamp_pattern = re.compile(r"^\ufeff?(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?Z ")
+_step_file_pattern = re.compile(r"^(\d+)_(.*)\.txt$")
+
+# Steps the runner adds around the ones of the workflow
+runner_steps = ("Set up job", "Complete job")
+
+
+def parse_timestamp(line):
+    # Seconds since the epoch of the timestamp that starts a log line, or None
+    match = _timestamp_pattern.match(line)
+    if match is None:
+        return None
+    seconds = calendar.timegm(time.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S"))
+    fraction = match.group(2)
+    return seconds + (int(fraction) / 10 ** len(fraction) if fraction else 0.0)
+
+
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]+", "", name.lower())
+
+
+# --- Reading logs ----------------------------------------------------------------------
+
+def _first_and_last_timestamp(stream):
+    first = last = None
+    for raw_line in stream:
+        line = raw_line.decode("utf-8", "replace") if isinstance(raw_line, bytes) else raw_line
+        timestamp = parse_timestamp(line)
+        if timestamp is None:
+            continue
+        if first is None:
+            first = timestamp
+        last = timestamp
+    return first, last
+
+
+def _step_entries(names, opener):
+    # names: paths inside an archive or directory. Returns {job: [(number, step, first, last)]}
+    jobs = collections.defaultdict(list)
+    for name in names:
+        parts = name.replace("\\", "/").split("/")
+        if len(parts) != 2:
+            continue    # the whole-job logs at the top level are not per step
+        match = _step_file_pattern.match(parts[1])
+        if match is None:
+            continue
+        with opener(name) as stream:
+            first, last = _first_and_last_timestamp(stream)
+        if first is not None:
+            jobs[parts[0]].append((int(match.group(1)), match.group(2), first, last))
+    return jobs
+
+
+def read_run(path):
+    # One run: a zip archive or an unpacked directory. Returns {job: [(step, seconds)]}
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            entries = _step_entries(archive.namelist(), archive.open)
+    else:
+        names = []
+        for directory, _, files in os.walk(path):
+            for file_name in files:
+                names.append(os.path.relpath(os.path.join(directory, file_name), path))
+        entries = _step_entries(names, lambda name: open(os.path.join(path, name), "rb"))
+
+    runs = {}
+    for job, steps in entries.items():
+        steps.sort()
+        durations = []
+        for index, (number, step, first, last) in enumerate(steps):
+            end = steps[index + 1][2] if index + 1 < len(steps) else last
+            durations.append((step, max(0.0, end - first)))
+        runs[job] = durations
+    return runs
+
+
+def find_runs(paths):
+    # Zip files, unpacked run directories, or directories holding several of them
+    runs = []
+    for path in paths:
+        if os.path.isdir(path) and not _looks_like_run(path):
+            for name in sorted(os.listdir(path)):
+                child = os.path.join(path, name)
+                if name.endswith(".zip") or (os.path.isdir(child) and _looks_like_run(child)):
+                    runs.append(child)
+        else:
+            runs.append(path)
+    return runs
+
+
+def _looks_like_run(directory):
+    for name in os.listdir(directory):
+        child = os.path.join(directory, name)
+        if os.path.isdir(child) and any(_step_file_pattern.match(f) for f in os.listdir(child)):
+            return True
+    return False
+
+
+# --- Matching to the workflow ----------------------------------------------------------
+
+def workflow_step_labels(workflow_lines):
+    # The labels Actions shows for the steps: the name, or "Run <action or command>"
+    document = WorkflowDocument.from_lines(workflow_lines)
+    labels = []
+    for span in document.steps():
+        if span.name:
+            labels.append((span.job, span.name))
+            continue
+        label = None
+        for line in workflow_lines[span.start:span.end]:
+            stripped = line.strip().lstrip("- ")
+            if stripped.startswith("uses:"):
+                label = "Run " + stripped[len("uses:"):].strip()
+                break
+            if stripped.startswith("run:"):
+                command = stripped[len("run:"):].strip()
+                label = "Run " + command if command not in ("|", ">") else None
+                break
+        labels.append((span.job, label or f"step at line {span.start + 1}"))
+    return labels
+
+
+class StepMatcher:
+    def __init__(self, labels):
+        self.by_normalized = {}
+        for job, label in labels:
+            self.by_normalized.setdefault(_normalize(label), label)
+        self.normalized_names = list(self.by_normalized)
+
+    def match(self, log_step_name):
+        # Workflow label for a step file name; runner steps and unknown steps keep their name
+        if log_step_name in runner_steps or log_step_name.startswith("Post "):
+            return f"(runner) {log_step_name}"
+        normalized = _normalize(log_step_name)
+        if normalized in self.by_normalized:
+            return self.by_normalized[normalized]
+        # File names are truncated for long step names
+        for candidate in self.normalized_names:
+            if candidate.startswith(normalized) and len(normalized) >= 10:
+                return self.by_normalized[candidate]
+        close = difflib.get_close_matches(normalized, self.normalized_names, n=1, cutoff=0.85)
+        if close:
+            return self.by_normalized[close[0]]
+        return f"(not in workflow) {log_step_name}"
+
+
+# --- Statistics ------------------------------------------------------------------------
+
+def percentile(values, fraction):
+    # Linear interpolation between the closest ranks
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def analyze(run_paths, workflow_lines, job=None):
+    matcher = StepMatcher(workflow_step_labels(workflow_lines))
+    durations = collections.defaultdict(list)
+    run_count = 0
+    for path in run_paths:
+        runs = read_run(path)
+        counted = False
+        for job_name, steps in runs.items():
+            if job is not None and job_name != job:
+                continue
+            counted = True
+            # A step name can occur twice in a job (two "flutter pub get" steps): keep them apart
+            seen = collections.Counter()
+            for step, seconds in steps:
+                label = matcher.match(step)
+                seen[label] += 1
+                key = label if seen[label] == 1 else f"{label} #{seen[label]}"
+                durations[key].append(seconds)
+        run_count += counted
+
+    total = sum(sum(values) for values in durations.values()) or 1.0
+    report = []
+    for step, values in durations.items():
+        report.append({
+            "step": step,
+            "runs": len(values),
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "mean": sum(values) / len(values),
+            "max": max(values),
+            "total": sum(values),
+            "share": sum(values) / total,
+        })
+    # Most runner time first: that is what to optimize first
+    report.sort(key=lambda row: row["total"], reverse=True)
+    return run_count, report
+
+
+def _format_seconds(seconds):
+    if seconds >= 60:
+        return f"{int(seconds // 60)}m{seconds % 60:04.1f}s"
+    return f"{seconds:.1f}s"
+
+
+def print_report(run_count, report, top=None):
+    print(f"Step durations over {run_count} run(s), most expensive first:\n")
+    width = max([len("step")] + [len(row["step"]) for row in report[:top]])
+    print(f"  {'#':>3}  {'step':<{width}}  {'runs':>4}  {'p50':>9}  {'p95':>9}  {'mean':>9}  {'share':>6}")
+    for rank, row in enumerate(report[:top], start=1):
+        print(f"  {rank:>3}  {row['step']:<{width}}  {row['runs']:>4}  {_format_seconds(row['p50']):>9}"
+              f"  {_format_seconds(row['p95']):>9}  {_format_seconds(row['mean']):>9}  {row['share']:>6.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-step duration distribution of GitHub Actions runs.")
+    parser.add_argument("logs", nargs="+", help="log archives (.zip), unpacked runs, or directories of them")
+    parser.add_argument("--workflow", default=workflow_file_path, help="workflow whose step names are matched")
+    parser.add_argument("--job", help="only this job (the folder name in the archive, i.e. the job's name)")
+    parser.add_argument("--top", type=int, default=None, help="only show the N most expensive steps")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.workflow, "r") as f:
+        workflow_lines = f.readlines()
+
+    run_paths = find_runs(args.logs)
+    if not run_paths:
+        print("No run logs found.")
+        return 1
+    run_count, report = analyze(run_paths, workflow_lines, args.job)
+    if not report:
+        print("No step logs with timestamps found.")
+        return 1
+    print_report(run_count, report, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": run_count, "steps": report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# Python script to add actions/cache steps for the Flutter SDK, the pub packages and Gradle
+# to .github/workflows/android_build.yml.
+#
+# - "Cache Flutter SDK" goes before the subosito/flutter-action step, keyed on the pinned
+#   flutter-version (or the channel), so the action finds the SDK in the tool cache.
+# - "Cache pub packages" and "Cache Gradle" go right after it, before anything runs
+#   "flutter pub get" or Gradle. pub is keyed on pubspec.lock (pubspec.yaml when no lock
+#   file is committed) and the Flutter version; Gradle on the android/**/*.gradle.kts
+#   files and gradle-wrapper.properties.
+# Every key has restore-keys with the same prefix, so a changed lock file or build script
+# still starts from the previous cache. The inputs are looked up in the tree each time:
+# when the set of files changes, the keys of the existing cache steps are rewritten.
+# Running the script again on an up-to-date workflow changes nothing.
+
+import argparse
+import glob
+import os
+import re
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument, reindent
+
+workflow_file_path = ".github/workflows/android_build.yml"
+app_directory = "flutter_dashboard_app"
+
+# Bump to start all caches from scratch
+cache_key_version = 1
+
+flutter_action = "subosito/flutter-action"
+
+sdk_step_name = "Cache Flutter SDK"
+pub_step_name = "Cache pub packages"
+gradle_step_name = "Cache Gradle"
+
+_with_value_pattern = re.compile(r"^\s*(flutter-version|channel)\s*:\s*['\"]?([^'\"#\s]+)")
+
+
+def _existing(patterns, root):
+    # The patterns that match at least one file below root (all of them if root is missing)
+    if not os.path.isdir(os.path.join(root, app_directory)):
+        return list(patterns)
+    return [pattern for pattern in patterns if glob.glob(os.path.join(root, pattern), recursive=True)]
+
+
+def pub_inputs(root="."):
+    lock_file = f"{app_directory}/pubspec.lock"
+    found = _existing([lock_file], root)
+    return found or [f"{app_directory}/pubspec.yaml"]
+
+
+def gradle_inputs(root="."):
+    return _existing([
+        f"{app_directory}/android/**/*.gradle.kts",
+        f"{app_directory}/android/**/*.gradle",
+        f"{app_directory}/android/gradle/wrapper/gradle-wrapper.properties",
+    ], root)
+
+
+def _hash_files(patterns):
+    return "hashFiles(" + ", ".join(f"'{pattern}'" for pattern in patterns) + ")"
+
+
+def flutter_version(document, span):
+    # The pinned flutter-version of the setup step, else its channel, else "stable"
+    lines = document.original_lines()[span.start:span.end]
+    values = dict(match.groups() for match in map(_with_value_pattern.match, lines) if match)
+    return values.get("flutter-version") or values.get("channel") or "stable"
+
+
+def cache_steps(version, root="."):
+    # (step name, step YAML) for the three cache steps
+    prefix = f"v{cache_key_version}-${{{{ runner.os }}}}"
+    sdk_key = f"{prefix}-flutter-sdk-{version}"
+    pub_key = f"{prefix}-pub-{version}"
+    gradle_key = f"{prefix}-gradle"
+    return [
+        (sdk_step_name, f'''- name: {sdk_step_name}
+  uses: actions/cache@v4
+  with:
+    path: ${{{{ runner.tool_cache }}}}/flutter
+    key: {sdk_key}
+    restore-keys: |
+      {prefix}-flutter-sdk-
+'''),
+        (pub_step_name, f'''- name: {pub_step_name}
+  uses: actions/cache@v4
+  with:
+    path: ~/.pub-cache
+    key: {pub_key}-${{{{ {_hash_files(pub_inputs(root))} }}}}
+    restore-keys: |
+      {pub_key}-
+'''),
+        (gradle_step_name, f'''- name: {gradle_step_name}
+  uses: actions/cache@v4
+  with:
+    path: |
+      ~/.gradle/caches
+      ~/.gradle/wrapper
+    key: {gradle_key}-${{{{ {_hash_files(gradle_inputs(root))} }}}}
+    restore-keys: |
+      {gradle_key}-
+'''),
+    ]
+
+
+def _find_flutter_setup(document, lines):
+    for span in document.steps():
+        if any(line.strip().lstrip("- ").startswith(f"uses: {flutter_action}") for line in lines[span.start:span.end]):
+            return span
+    return None
+
+
+def _same_step(current_lines, text):
+    # Compared without indentation and blank lines, which replace_step normalizes anyway
+    wanted = [line.strip() for line in text.splitlines() if line.strip()]
+    return [line.strip() for line in current_lines if line.strip()] == wanted
+
+
+def add_cache_steps(lines, root="."):
+    document = WorkflowDocument.from_lines(lines)
+    setup = _find_flutter_setup(document, lines)
+    if setup is None:
+        print(f"Warning: no {flutter_action} step found. Cache steps not added.")
+        return lines
+
+    changed = []
+    steps = cache_steps(flutter_version(document, setup), root)
+    after_setup = []
+    for name, text in steps:
+        if document.has_step(name, setup.job):
+            # Already there: only rewrite it when the keys (or inputs) are different
+            if not _same_step(document.step_lines(name, setup.job), text):
+                document.replace_step(name, text, setup.job)
+                changed.append(f"updated '{name}'")
+        elif name == sdk_step_name:
+            document.insert_lines(setup.start, reindent(text, setup.indent) + ["\n"])
+            changed.append(f"added '{name}'")
+        else:
+            after_setup.extend(["\n"] + reindent(text, setup.indent))
+            changed.append(f"added '{name}'")
+    if after_setup:
+        document.insert_lines(setup.end, after_setup)
+
+    if not changed:
+        return lines
+    print(f"Cache steps: {', '.join(changed)}.")
+    return document.lines()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add cache steps for the Flutter SDK, pub packages and Gradle.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines = add_cache_steps(lines)
+
+    if new_lines is not lines:
+        write_file(workflow_file_path, "".join(new_lines))
+        print(f"Updated the cache steps in {workflow_file_path}.")
+    else:
+        print(f"Cache steps in {workflow_file_path} are up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
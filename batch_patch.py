@@ -0,0 +1,233 @@
+# Python script to patch many Flutter apps built from this template in one run.
+#
+# App roots come from a glob ("apps/*") or from a JSON manifest. For every app the Gradle
+# chain runs on <root>/android/app/build.gradle.kts and the workflow chain on the app's
+# android_build.yml, each with one read and one write (see gradle_pipeline.py and
+# workflow_pipeline.py). Apps are processed on a process pool, so throughput scales with
+# the cores of the machine. A failing app never stops the others: its error is recorded
+# in its own result and the run ends with one summary.
+#
+# Manifest format: a list of app roots, or of objects
+#   [{"root": "apps/one", "workflow": ".github/workflows/one.yml"}, "apps/two"]
+# Relative paths in the manifest are relative to the manifest's directory.
+#
+# Usage:
+#   python batch_patch.py --glob 'apps/*' --gradle fix-gradle-import,modify-gradle
+#   python batch_patch.py --manifest apps.json --workflow correct-workflow-secrets --jobs 8
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import traceback
+
+from transaction import write_file
+
+default_gradle_transforms = ("fix-gradle-import", "modify-gradle")
+default_workflow_transforms = ("correct-workflow-secrets",)
+
+app_gradle_file = os.path.join("android", "app", "build.gradle.kts")
+app_workflow_file = os.path.join(".github", "workflows", "android_build.yml")
+
+
+def apps_from_glob(pattern):
+    apps = []
+    for root in sorted(glob.glob(pattern)):
+        if os.path.isdir(root):
+            apps.append({"root": os.path.abspath(root)})
+    return apps
+
+
+def apps_from_manifest(manifest_path):
+    with open(manifest_path, "r") as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    apps = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"root": entry}
+        app = {"root": os.path.abspath(os.path.join(base, entry["root"]))}
+        if entry.get("workflow"):
+            app["workflow"] = os.path.abspath(os.path.join(base, entry["workflow"]))
+        apps.append(app)
+    return apps
+
+
+def _workflow_path(app):
+    if "workflow" in app:
+        return app["workflow"]
+    # An app either carries its own workflow, or sits next to the repository's one
+    # (like flutter_dashboard_app in this repository)
+    for candidate in (os.path.join(app["root"], app_workflow_file),
+                      os.path.join(os.path.dirname(app["root"]), app_workflow_file)):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def patch_app(app, gradle_transforms, workflow_transforms, cache_directory=None, dry_run=False):
+    # Runs in a worker process. Never raises: failures end up in the result.
+    # The app's files are committed together: either all of them change or none does.
+    import gradle_pipeline
+    import workflow_pipeline
+    from transaction import Transaction
+    from transform_cache import TransformCache
+
+    result = {"root": app["root"], "ok": True, "files": [], "error": None, "log": ""}
+    started = time.perf_counter()
+    log = io.StringIO()
+    transaction = None if dry_run else Transaction()
+    try:
+        # The transforms print progress, keep it with the app instead of interleaving
+        with contextlib.redirect_stdout(log):
+            if gradle_transforms:
+                gradle_path = os.path.join(app["root"], app_gradle_file)
+                if not os.path.exists(gradle_path):
+                    raise FileNotFoundError(f"{gradle_path} does not exist")
+                if dry_run:
+                    with open(gradle_path, "r") as f:
+                        original = f.read()
+                    new_content, timings = gradle_pipeline.run_pipeline(original, gradle_transforms)
+                    status = "would-change" if new_content != original else "unchanged"
+                else:
+                    cache = TransformCache(cache_directory) if cache_directory else TransformCache()
+                    status, timings = gradle_pipeline.run_pipeline_on_file(gradle_path, gradle_transforms, cache,
+                                                                           transaction=transaction)
+                result["files"].append({"path": gradle_path, "status": status, "timings": timings})
+
+            if workflow_transforms:
+                workflow_path = _workflow_path(app)
+                if workflow_path is None:
+                    result["files"].append({"path": None, "status": "no-workflow", "timings": []})
+                else:
+                    changed, timings = workflow_pipeline.run_pipeline_on_file(
+                        workflow_path, workflow_transforms, dry_run=dry_run, transaction=transaction)
+                    if dry_run:
+                        status = "would-change" if changed else "unchanged"
+                    else:
+                        status = "changed" if changed else "unchanged"
+                    result["files"].append({"path": workflow_path, "status": status, "timings": timings})
+
+            if transaction is not None:
+                transaction.commit()
+    except Exception as e:
+        if transaction is not None and transaction.state == "open":
+            transaction.rollback()
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["log"] = log.getvalue()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(apps, gradle_transforms, workflow_transforms, jobs=None, cache_directory=None, dry_run=False):
+    # Two apps pointing at the same workflow would race on it: patch each workflow once
+    seen_workflows = set()
+    work = []
+    for app in apps:
+        app_workflow_transforms = workflow_transforms
+        workflow_path = _workflow_path(app) if workflow_transforms else None
+        if workflow_path is not None:
+            if workflow_path in seen_workflows:
+                app_workflow_transforms = ()
+            seen_workflows.add(workflow_path)
+        work.append((app, app_workflow_transforms))
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(patch_app, app, tuple(gradle_transforms), tuple(app_workflow_transforms),
+                            cache_directory, dry_run): app
+            for app, app_workflow_transforms in work
+        }
+        for future in concurrent.futures.as_completed(futures):
+            app = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker itself died (e.g. killed, out of memory)
+                results.append({"root": app["root"], "ok": False, "files": [], "log": "",
+                                "error": f"worker failed: {type(e).__name__}: {e}", "seconds": 0.0})
+    results.sort(key=lambda result: result["root"])
+    return results
+
+
+def print_summary(results, elapsed):
+    failed = [result for result in results if not result["ok"]]
+    statuses = {}
+    for result in results:
+        for file_result in result["files"]:
+            statuses[file_result["status"]] = statuses.get(file_result["status"], 0) + 1
+
+    for result in results:
+        if result["ok"]:
+            details = ", ".join(f"{os.path.basename(f['path']) if f['path'] else 'workflow'}: {f['status']}"
+                                for f in result["files"])
+            print(f"  OK    {result['root']} ({details}) {result['seconds'] * 1000:.1f} ms")
+        else:
+            print(f"  FAIL  {result['root']}: {result['error']}")
+
+    print(f"\nPatched {len(results) - len(failed)}/{len(results)} app(s) in {elapsed:.2f} s.")
+    if statuses:
+        print("Files: " + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    if failed:
+        print(f"{len(failed)} app(s) failed.")
+
+
+def _transform_list(value):
+    return tuple(name for name in value.split(",") if name) if value is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Gradle and workflow transforms for many apps in parallel.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--glob", help="glob matching the app roots, e.g. 'apps/*'")
+    source.add_argument("--manifest", help="JSON manifest listing the app roots")
+    parser.add_argument("--gradle", type=_transform_list,
+                        help=f"comma separated Gradle transforms (default: {','.join(default_gradle_transforms)})")
+    parser.add_argument("--workflow", type=_transform_list,
+                        help=f"comma separated workflow transforms (default: {','.join(default_workflow_transforms)})")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--cache-dir", default=None, help="transform cache directory shared by the workers")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--json", metavar="PATH", help="also write the per-app results as JSON")
+    args = parser.parse_args(argv)
+
+    apps = apps_from_glob(args.glob) if args.glob else apps_from_manifest(args.manifest)
+    if not apps:
+        print("No app roots found.")
+        return 1
+
+    gradle_transforms = default_gradle_transforms if args.gradle is None else args.gradle
+    workflow_transforms = default_workflow_transforms if args.workflow is None else args.workflow
+
+    # Fail early on typos instead of once per app
+    import gradle_pipeline
+    import workflow_pipeline
+    try:
+        for name in gradle_transforms:
+            gradle_pipeline.load_transform(name)
+        for name in workflow_transforms:
+            workflow_pipeline.load_transform(name)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 2
+
+    started = time.perf_counter()
+    results = run_batch(apps, gradle_transforms, workflow_transforms, args.jobs, args.cache_dir, args.dry_run)
+    print_summary(results, time.perf_counter() - started)
+
+    if args.json:
+        write_file(args.json, json.dumps(results, indent=2))
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
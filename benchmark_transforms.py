@@ -0,0 +1,279 @@
+# Python script to benchmark the workflow and Gradle transforms on synthetic inputs.
+#
+# It generates android_build.yml files from 10 to 10,000 steps (with large multi-line
+# "run: |" heredocs) and build.gradle.kts files up to 50k lines (deeply nested blocks),
+# runs every registered transform against them and records wall time, peak memory and
+# output size. Results can be saved as a JSON baseline and later runs compared against
+# it; a case that got slower (or hungrier) than the threshold is reported as a regression.
+#
+# Usage:
+#   python benchmark_transforms.py --save .dashboard_ci/benchmark_baseline.json
+#   python benchmark_transforms.py --compare .dashboard_ci/benchmark_baseline.json --threshold 0.25
+#   python benchmark_transforms.py --quick --only gradle
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import gradle_pipeline
+import workflow_pipeline
+
+default_baseline_path = ".dashboard_ci/benchmark_baseline.json"
+
+workflow_step_counts = (10, 100, 1000, 10000)
+gradle_line_counts = (500, 5000, 50000)
+quick_workflow_step_counts = (10, 100, 1000)
+quick_gradle_line_counts = (500, 5000)
+
+# Steps the transforms look for, so they do real work on the synthetic workflows
+_named_steps = (
+    "Set Gradle version",
+    "Regenerate Android project",
+    "List files in android directory",
+    "Create keystore.properties",
+    "Decode Keystore",
+    "Build Android APK (Release)",
+    "Upload APK Artifact (Release)",
+    "Test command after Flutter/Gradle steps",
+)
+
+
+# --- Synthetic inputs ------------------------------------------------------------------
+
+def generate_workflow(step_count, heredoc_lines=40):
+    lines = [
+        "name: Android Build - Step Restore 2\n",
+        "\n",
+        "on:\n",
+        "  push:\n",
+        "    branches: [ main ]\n",
+        "  workflow_dispatch:\n",
+        "\n",
+        "jobs:\n",
+        "  build:\n",
+        "    name: Build Flutter Android App\n",
+        "    runs-on: ubuntu-latest\n",
+        "    steps:\n",
+    ]
+    # Spread the named steps through the file instead of putting them all at the top
+    named_positions = {}
+    for position, name in enumerate(_named_steps):
+        named_positions[(position + 1) * step_count // (len(_named_steps) + 1)] = name
+
+    for i in range(step_count):
+        name = named_positions.get(i)
+        if name == "Test command after Flutter/Gradle steps":
+            lines.append(f"      - name: {name}\n")
+            lines.append("        run: echo \"done\"\n\n")
+        elif name is not None:
+            lines.append(f"      - name: {name}\n")
+            lines.append("        working-directory: ./flutter_dashboard_app\n")
+            lines.append("        run: echo \"${{{{ secrets.RELEASE_KEY_ALIAS }}}}\"\n\n")
+        elif i % 3 == 0:
+            # A big heredoc, like the embedded Gradle patch script
+            lines.append(f"      - name: Generated step {i}\n")
+            lines.append("        working-directory: ./flutter_dashboard_app\n")
+            lines.append("        run: |\n")
+            lines.append("          python << 'EOF'\n")
+            for j in range(heredoc_lines):
+                lines.append(f"          value_{j} = \"- name: not a step {j}\"  # jobs: {{ }}\n")
+            lines.append("          EOF\n\n")
+        else:
+            lines.append(f"      - name: Generated step {i}\n")
+            lines.append("        uses: actions/cache@v4\n")
+            lines.append("        with:\n")
+            lines.append(f"          key: cache-{i}-${{{{ hashFiles('**/pubspec.lock') }}}}\n")
+            lines.append("          path: ~/.pub-cache\n\n")
+    return "".join(lines)
+
+
+def generate_gradle(line_count, depth=12):
+    parts = [
+        "import java.util.Properties\n",
+        "\n",
+        "val keystorePropertiesFile = rootProject.file(\"keystore.properties\")\n",
+        "val keystoreProperties = java.util.Properties()\n",
+        "if (keystorePropertiesFile.exists()) {\n",
+        "    keystorePropertiesFile.inputStream().use { keystoreProperties.load(it) }\n",
+        "}\n",
+        "\n",
+        "plugins {\n",
+        "    id(\"com.android.application\")\n",
+        "}\n",
+        "\n",
+        "android {\n",
+        "    namespace = \"com.example.flutter_dashboard_app\"\n",
+        "\n",
+        "    defaultConfig {\n",
+        "        applicationId = \"com.example.flutter_dashboard_app\"\n",
+        "        multiDexEnabled = true\n",
+        "    }\n",
+        "\n",
+        "    signingConfigs {\n",
+        "        create(\"release\") {\n",
+        "            keyAlias = \"upload\" // { not a block\n",
+        "        }\n",
+        "    }\n",
+        "\n",
+        "    buildTypes {\n",
+        "        release {\n",
+        "            // TODO: Add your own signing config for the release build.\n",
+        "            signingConfig = signingConfigs.getByName(\"debug\")\n",
+        "        }\n",
+        "    }\n",
+        "}\n",
+        "\n",
+    ]
+    produced = len(parts)
+    block = 0
+    while produced < line_count:
+        # One deeply nested block per iteration, with braces hidden in strings and comments
+        for level in range(depth):
+            parts.append("    " * level + f"block{block}_{level}(\"}}{{\") {{ /* }} */\n")
+            parts.append("    " * (level + 1) + f"val text{level} = \"\"\"raw {{ ${{ \"}}\" }} \"\"\"\n")
+        for level in reversed(range(depth)):
+            parts.append("    " * level + "}\n")
+        produced += depth * 3
+        block += 1
+    return "".join(parts)
+
+
+# --- Measurement -----------------------------------------------------------------------
+
+def benchmark_cases(quick=False, only=None):
+    # (case name, input size, callable) for every transform and input size
+    step_counts = quick_workflow_step_counts if quick else workflow_step_counts
+    line_counts = quick_gradle_line_counts if quick else gradle_line_counts
+    cases = []
+
+    if only in (None, "workflow"):
+        workflows = {count: generate_workflow(count) for count in step_counts}
+        for name in workflow_pipeline.registered_transforms:
+            transform = workflow_pipeline.load_transform(name)
+            for count, text in workflows.items():
+                cases.append((f"workflow:{name}", count, transform, text.splitlines(True)))
+
+    if only in (None, "gradle"):
+        gradle_files = {count: generate_gradle(count) for count in line_counts}
+        for name in gradle_pipeline.registered_transforms:
+            transform, version = gradle_pipeline.load_transform(name)
+            for count, text in gradle_files.items():
+                cases.append((f"gradle:{name}", count, transform, text))
+    return cases
+
+
+def _output_size(output):
+    if isinstance(output, str):
+        return len(output.encode("utf-8"))
+    return sum(len(line.encode("utf-8")) for line in output)
+
+
+def measure(transform, argument, repeat=3):
+    # Transforms print progress; keep the benchmark output readable
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        best = None
+        output = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = transform(argument)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Separate run for memory: tracemalloc slows the code down too much to time it
+        tracemalloc.start()
+        try:
+            transform(argument)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "output_bytes": _output_size(output)}
+
+
+def run_benchmarks(quick=False, only=None, repeat=3, progress=True):
+    results = {}
+    for case_name, size, transform, argument in benchmark_cases(quick, only):
+        key = f"{case_name}@{size}"
+        results[key] = measure(transform, argument, repeat)
+        if progress:
+            result = results[key]
+            print(f"  {key:<55} {result['seconds'] * 1000:10.2f} ms {result['peak_bytes'] / 1024:10.1f} KiB"
+                  f" {result['output_bytes']:>12} B")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold, minimum_seconds=0.001):
+    # Returns a list of (case, metric, baseline value, current value, relative change)
+    # for every metric that grew by more than threshold. Timings below minimum_seconds
+    # are noise and never count as regressions.
+    regressions = []
+    for key, result in current["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if previous is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            old_value = previous.get(metric)
+            new_value = result.get(metric)
+            if not old_value or new_value is None:
+                continue
+            if metric == "seconds" and max(old_value, new_value) < minimum_seconds:
+                continue
+            change = (new_value - old_value) / old_value
+            if change > threshold:
+                regressions.append((key, metric, old_value, new_value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the workflow and Gradle transforms on synthetic files.")
+    parser.add_argument("--quick", action="store_true", help="skip the largest inputs")
+    parser.add_argument("--only", choices=("workflow", "gradle"), help="only benchmark one kind of transform")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case (best one is kept)")
+    parser.add_argument("--save", metavar="PATH", nargs="?", const=default_baseline_path,
+                        help=f"write the results as a JSON baseline (default path: {default_baseline_path})")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=default_baseline_path,
+                        help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative growth of time or peak memory counted as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    print("Running transform benchmarks...")
+    current = run_benchmarks(quick=args.quick, only=args.only, repeat=args.repeat)
+
+    if args.save:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"Saved {len(current['results'])} results to {args.save}.")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for key, metric, old_value, new_value, change in regressions:
+                print(f"  {key} {metric}: {old_value:.6g} -> {new_value:.6g} (+{change:.0%})")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# Python script to tell whether the generated Dart files of flutter_dashboard_app are
+# current, so build_runner only runs when (and where) something it generates from changed.
+#
+# Generator inputs and their outputs:
+#   - hive_generator: a file with @HiveType and "part 'x.g.dart';" -> x.g.dart. The adapter
+#     only depends on that file.
+#   - mockito: a file with @GenerateMocks / @GenerateNiceMocks -> x.mocks.dart. The mocks
+#     depend on the file and on the app files it imports (the mocked classes), followed
+#     transitively.
+# Every output also depends on the build.yaml options and on the version constraints of
+# the generator packages in pubspec.yaml. pubspec.lock is not committed and only exists
+# after "flutter pub get", so hashing it would make every output look stale in CI.
+#
+# codegen_index.json (committed next to pubspec.yaml) records, for every output, the
+# hashes of its inputs and of the output itself, as they were when it was generated.
+# An output is stale when it is missing, when one of its inputs changed, or when it no
+# longer matches the recorded hash (edited by hand or generated elsewhere).
+#
+# Usage:
+#   python codegen_freshness.py              # report
+#   python codegen_freshness.py --check      # exit 1 if anything is stale (CI)
+#   python codegen_freshness.py --filters    # print the build_runner command for the stale outputs
+#   python codegen_freshness.py --run        # run build_runner on the stale outputs only, then record
+#   python codegen_freshness.py --record     # record the current state (after a full build_runner run)
+#   python codegen_freshness.py --update-workflow
+#                                            # the workflow's build_runner step uses --run
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import posixpath
+import re
+import subprocess
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument
+
+workflow_file_path = ".github/workflows/android_build.yml"
+app_directory = "flutter_dashboard_app"
+index_file_name = "codegen_index.json"
+package_name = "flutter_dashboard_app"
+
+# Directories build_runner generates into, relative to the app
+source_directories = ("lib", "test", "integration_test")
+
+# Packages whose version changes the generated code
+generator_packages = ("build_runner", "hive", "hive_generator", "mockito", "source_gen", "analyzer")
+
+build_runner_command = ["flutter", "pub", "run", "build_runner", "build", "--delete-conflicting-outputs"]
+
+_hive_pattern = re.compile(r"^\s*@HiveType\b", re.MULTILINE)
+_mocks_pattern = re.compile(r"^\s*@Generate(?:Nice)?Mocks\b", re.MULTILINE)
+_part_pattern = re.compile(r"^\s*part\s+'([^']+\.g\.dart)'\s*;", re.MULTILINE)
+_import_pattern = re.compile(r"^\s*(?:import|export)\s+'([^']+\.dart)'", re.MULTILINE)
+
+Output = collections.namedtuple("Output", ["path", "generator", "source", "inputs"])
+
+
+def _hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _is_generated(path):
+    return path.endswith(".g.dart") or path.endswith(".mocks.dart")
+
+
+# --- Finding generator inputs ----------------------------------------------------------
+
+def _dart_files(app):
+    for directory in source_directories:
+        for current, directories, names in os.walk(os.path.join(app, directory)):
+            directories.sort()
+            for name in sorted(names):
+                if name.endswith(".dart") and not _is_generated(name):
+                    yield os.path.relpath(os.path.join(current, name), app).replace(os.sep, "/")
+
+
+def _local_imports(app, path, text):
+    # App files imported by path: "package:<this package>/x.dart" and relative imports
+    imports = []
+    for target in _import_pattern.findall(text):
+        if target.startswith(f"package:{package_name}/"):
+            resolved = "lib/" + target[len(f"package:{package_name}/"):]
+        elif ":" in target:
+            continue
+        else:
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        if not _is_generated(resolved) and os.path.isfile(os.path.join(app, resolved)):
+            imports.append(resolved)
+    return imports
+
+
+def _import_closure(app, path, texts):
+    seen = {path}
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        if current not in texts:
+            with open(os.path.join(app, current), "r", encoding="utf-8") as f:
+                texts[current] = f.read()
+        for imported in _local_imports(app, current, texts[current]):
+            if imported not in seen:
+                seen.add(imported)
+                pending.append(imported)
+    return sorted(seen)
+
+
+def shared_inputs(app, root):
+    # Inputs of every output: build.yaml options and the generator package versions
+    inputs = {}
+    for path in (os.path.join(app, "build.yaml"), os.path.join(root, "build.yaml")):
+        if os.path.isfile(path):
+            inputs[os.path.relpath(path, app).replace(os.sep, "/")] = _hash_file(path)
+    # Keyed by its source, so that hashing another file can never pass for a change
+    pubspec_path = os.path.join(app, "pubspec.yaml")
+    if os.path.isfile(pubspec_path):
+        with open(pubspec_path, "r") as f:
+            versions = _generator_versions(f.read())
+        inputs["pubspec.yaml (generators)"] = hashlib.sha256(versions.encode("utf-8")).hexdigest()
+    return inputs
+
+
+def _generator_versions(text):
+    # The entries of pubspec.yaml that constrain a generator package
+    lines = text.splitlines()
+    picked = []
+    for index, line in enumerate(lines):
+        if line.strip().split(":", 1)[0] not in generator_packages:
+            continue
+        indent = len(line) - len(line.lstrip())
+        block = [line.strip()]
+        for following in lines[index + 1:]:
+            if following.strip() and len(following) - len(following.lstrip()) <= indent:
+                break
+            block.append(following.strip())
+        picked.append(" ".join(block))
+    return "\n".join(sorted(picked))
+
+
+def find_outputs(app):
+    outputs = []
+    texts = {}
+    for path in _dart_files(app):
+        with open(os.path.join(app, path), "r", encoding="utf-8") as f:
+            text = texts[path] = f.read()
+        if _hive_pattern.search(text):
+            for part in _part_pattern.findall(text):
+                output = posixpath.normpath(posixpath.join(posixpath.dirname(path), part))
+                outputs.append(Output(output, "hive_generator", path, [path]))
+        if _mocks_pattern.search(text):
+            output = path[:-len(".dart")] + ".mocks.dart"
+            outputs.append(Output(output, "mockito", path, _import_closure(app, path, texts)))
+    return outputs
+
+
+# --- Index -----------------------------------------------------------------------------
+
+def load_index(app):
+    path = os.path.join(app, index_file_name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("outputs", {})
+
+
+def _entry(app, output, shared):
+    inputs = dict(shared)
+    for path in output.inputs:
+        inputs[path] = _hash_file(os.path.join(app, path))
+    output_path = os.path.join(app, output.path)
+    return {
+        "generator": output.generator,
+        "source": output.source,
+        "inputs": inputs,
+        "output": _hash_file(output_path) if os.path.exists(output_path) else None,
+    }
+
+
+def freshness(app, root="."):
+    # [(output, status, detail)]: status is "fresh", "stale", "missing" or "unindexed"
+    index = load_index(app)
+    shared = shared_inputs(app, root)
+    report = []
+    for output in find_outputs(app):
+        current = _entry(app, output, shared)
+        recorded = index.get(output.path)
+        if current["output"] is None:
+            report.append((output, "missing", "not generated yet"))
+        elif recorded is None:
+            report.append((output, "unindexed", "no recorded hashes"))
+        else:
+            changed = sorted(path for path in set(current["inputs"]) | set(recorded["inputs"])
+                             if current["inputs"].get(path) != recorded["inputs"].get(path))
+            if changed:
+                report.append((output, "stale", "changed: " + ", ".join(changed)))
+            elif current["output"] != recorded["output"]:
+                report.append((output, "stale", "output differs from the recorded one"))
+            else:
+                report.append((output, "fresh", ""))
+    return report
+
+
+def record(app, root=".", only=None):
+    # Writes the current hashes; with only=, the other entries keep their recorded state
+    index = load_index(app) if only is not None else {}
+    shared = shared_inputs(app, root)
+    outputs = find_outputs(app)
+    for output in outputs:
+        if only is None or output.path in only:
+            index[output.path] = _entry(app, output, shared)
+    known = {output.path for output in outputs}
+    index = {path: entry for path, entry in sorted(index.items()) if path in known}
+    write_file(os.path.join(app, index_file_name), json.dumps({"outputs": index}, indent=2, sort_keys=True) + "\n")
+    return len(index)
+
+
+def build_filters(report):
+    return [output.path for output, status, detail in report if status != "fresh"]
+
+
+def filtered_command(filters):
+    return build_runner_command + [f"--build-filter={path}" for path in filters]
+
+
+# --- Workflow --------------------------------------------------------------------------
+
+def codegen_freshness_step(lines):
+    # Makes the build_runner step of the workflow go through this script
+    document = WorkflowDocument.from_lines(lines)
+    for span in document.steps():
+        for index in range(span.start, span.end):
+            line = lines[index]
+            if "build_runner build" in line and "codegen_freshness.py" not in line:
+                prefix = line[:len(line) - len(line.lstrip())]
+                run_prefix = "run: " if line.lstrip().startswith("run:") else ""
+                document.replace_lines(index, index + 1, [f"{prefix}{run_prefix}python3 codegen_freshness.py --run\n"])
+                # The script runs from the repository root
+                for other in range(span.start, span.end):
+                    if lines[other].strip().startswith("working-directory:"):
+                        document.replace_lines(other, other + 1, [])
+                return document.lines()
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check whether generated Dart files are current.")
+    parser.add_argument("--root", default=".", help="repository root")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if any output is not fresh")
+    parser.add_argument("--filters", action="store_true", help="print the build_runner command for the stale outputs")
+    parser.add_argument("--run", action="store_true", help="run build_runner on the stale outputs, then record them")
+    parser.add_argument("--record", action="store_true", help="record the current hashes of all outputs")
+    parser.add_argument("--update-workflow", action="store_true",
+                        help="make the workflow's build_runner step run this script with --run")
+    args = parser.parse_args(argv)
+
+    if args.update_workflow:
+        with open(workflow_file_path, "r") as f:
+            lines = f.readlines()
+        new_lines = codegen_freshness_step(lines)
+        if new_lines is not lines:
+            write_file(workflow_file_path, "".join(new_lines))
+            print(f"The build_runner step of {workflow_file_path} now only regenerates stale outputs.")
+        else:
+            print(f"No build_runner step to change in {workflow_file_path}.")
+        return 0
+
+    app = os.path.join(args.root, app_directory)
+    if args.record:
+        count = record(app, args.root)
+        print(f"Recorded {count} generated file(s) in {os.path.join(app, index_file_name)}.")
+        return 0
+
+    report = freshness(app, args.root)
+    for output, status, detail in report:
+        print(f"  {status:<9}  {output.path}" + (f"  ({detail})" if detail else ""))
+    filters = build_filters(report)
+    print(f"{len(report) - len(filters)} of {len(report)} generated file(s) are current.")
+
+    if args.filters and filters:
+        print(" ".join(filtered_command(filters)))
+    if args.run:
+        if not filters:
+            print("build_runner not needed.")
+            return 0
+        print(f"Running build_runner for {len(filters)} output(s).")
+        result = subprocess.run(filtered_command(filters), cwd=app)
+        if result.returncode != 0:
+            return result.returncode
+        record(app, args.root, only=set(filters))
+        return 0
+    if args.check and filters:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
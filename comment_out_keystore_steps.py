@@ -1,52 +1,41 @@
 # Python script to comment out the keystore-related steps
 # in .github/workflows/android_build.yml for diagnosis.
-# This assumes the Build APK and Upload Artifact steps are already commented out.
+# The steps are disabled with the "keystore-steps" tag of toggle_steps.py. Steps that are
+# already disabled (the Build APK and Upload Artifact steps, by comment_out_build_steps.py)
+# are comments and stay as they are.
 
+import argparse
 import os
+import sys
+
+from toggle_steps import disable_steps
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
-
-new_lines = []
-comment_mode = None # Can be 'keystore_props', 'decode_keystore', or None
-
-for line_content in lines:
-    strip_content = line_content.lstrip()
-
-    # Detect start of a new step; if so, and we were in a comment_mode, turn it off.
-    # This is important if the steps are not contiguous or if other steps are between them.
-    if strip_content.startswith("- name:") and comment_mode:
-        if not (strip_content.startswith("- name: Create keystore.properties") or \
-                strip_content.startswith("- name: Decode Keystore")):
-            comment_mode = None # Exited the block we were commenting
-
-    # Check if we should enter comment_mode for keystore steps
-    if strip_content.startswith("- name: Create keystore.properties"):
-        comment_mode = 'keystore_props'
-    elif strip_content.startswith("- name: Decode Keystore"):
-        comment_mode = 'decode_keystore'
-
-    # If current line is part of a step to be commented, or is already commented (from previous diagnostic)
-    if comment_mode or line_content.strip().startswith("#- name: Build Android APK (Release)") \
-                   or line_content.strip().startswith("#- name: Upload APK Artifact (Release)") \
-                   or (line_content.startswith("#") and ("run: flutter build apk" in line_content or "uses: actions/upload-artifact@v4" in line_content)): # check if it's a content line of already commented block
-        # If it's one of the keystore steps we are now targeting, comment it.
-        # If it's an already commented line (build/upload), keep it commented.
-        if comment_mode and not line_content.startswith("#"):
-            if line_content.strip(): # If not an empty line
-                new_lines.append("#" + line_content)
-            else:
-                new_lines.append(line_content) # Preserve empty line
-        else:
-            # Line is already commented (part of build/upload) or is a keystore step to be commented
-            new_lines.append(line_content)
-    else:
-        new_lines.append(line_content)
-
-with open(workflow_file_path, "w") as f:
-    f.writelines(new_lines)
-
-print(f"Commented out keystore-related steps in {workflow_file_path}.")
-print("Build APK and Upload Artifact steps remain commented out from previous operation.")
+keystore_steps = ("Create keystore.properties", "Decode Keystore")
+keystore_steps_tag = "keystore-steps"
+
+
+def comment_out_keystore_steps(lines):
+    return disable_steps(lines, keystore_steps, tag=keystore_steps_tag)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comment out the keystore steps.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines = comment_out_keystore_steps(lines)
+
+    write_file(workflow_file_path, "".join(new_lines))
+
+    print(f"Commented out keystore-related steps in {workflow_file_path}.")
+    print("Build APK and Upload Artifact steps remain commented out from previous operation.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,38 @@
 # Python script to correct the GitHub Actions workflow secrets syntax.
+import argparse
 import os
+import sys
+
+from actions_expressions import ExpressionRewriter
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
-with open(workflow_file_path, "r") as f:
-    content = f.read()
+# Quadruple (or any other count of) braces left by an f-string template -> the ${{ }}
+# GitHub Actions expects, for every expression and not only the secrets
+expression_rewriter = ExpressionRewriter(normalize=True)
+
+
+def correct_workflow_secrets(lines):
+    # All expressions in one scan of the content
+    corrected_lines, count = expression_rewriter.rewrite_lines(lines)
+    return corrected_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fix the ${{ }} syntax of the expressions.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    corrected_lines = correct_workflow_secrets(lines)
+
+    write_file(workflow_file_path, "".join(corrected_lines))
 
-# Replace the incorrect quadruple braces with double braces for secrets
-corrected_content = content.replace("${{{{ secrets.RELEASE_STORE_PASSWORD }}}}", "${{ secrets.RELEASE_STORE_PASSWORD }}")
-corrected_content = corrected_content.replace("${{{{ secrets.RELEASE_KEY_ALIAS }}}}", "${{ secrets.RELEASE_KEY_ALIAS }}")
-corrected_content = corrected_content.replace("${{{{ secrets.RELEASE_KEY_PASSWORD }}}}", "${{ secrets.RELEASE_KEY_PASSWORD }}")
-corrected_content = corrected_content.replace("${{{{ secrets.RELEASE_STORE_FILE_BASE64 }}}}", "${{ secrets.RELEASE_STORE_FILE_BASE64 }}")
+    print(f"Corrected secrets syntax in {workflow_file_path}")
+    return 0
 
-with open(workflow_file_path, "w") as f:
-    f.write(corrected_content)
 
-print(f"Corrected secrets syntax in {workflow_file_path}")
+if __name__ == "__main__":
+    sys.exit(main())
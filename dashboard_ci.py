@@ -0,0 +1,223 @@
+# Python script with a single entry point for every tool of this repository.
+#
+# Each script is a subcommand named after its module ("abi_matrix.py" -> "abi-matrix").
+# The registry below is plain data (module name and a one-line summary), so listing the
+# commands or printing the help imports nothing; a command's module is imported only when
+# that command runs. Every script has a main(argv) that parses its arguments and is called
+# directly; a module without one runs its "__main__" block as if started on its own, and
+# is refused any argument, which it could only ignore.
+#
+# Several commands separated by "+" run in the same process, one after the other, so the
+# interpreter starts once and the shared modules (transaction, workflow_document, ...)
+# are imported once. The chain stops at the first command that fails, unless
+# --keep-going is given.
+#
+# Usage:
+#   python dashboard_ci.py --list
+#   python dashboard_ci.py trigger-filters --ignore + abi-matrix --fail-fast + workflow-validator
+#   python dashboard_ci.py -C apps/one --time workflow-pipeline --validate add-cache-steps
+#   ./dashboard-ci codegen-freshness --check
+
+import os
+import sys
+import time
+
+chain_separator = "+"
+
+usage = """usage: dashboard-ci [-C DIR] [--keep-going] [--time] COMMAND [ARGS...] [+ COMMAND [ARGS...] ...]
+       dashboard-ci --list
+       dashboard-ci COMMAND --help
+
+options:
+  -C DIR        run the commands in DIR (the paths of the scripts are relative to it)
+  --keep-going  run the rest of the chain after a command failed
+  --time        print the wall time of every command
+  --list        list the commands
+"""
+
+# Registered commands, in registration order: name -> (module name, summary)
+registered_commands = {}
+
+
+def register_command(name, module_name, summary):
+    if name in registered_commands:
+        raise ValueError(f"Command '{name}' is already registered.")
+    registered_commands[name] = (module_name, summary)
+
+
+for _module_name, _summary in (
+    # Pipelines and tools
+    ("workflow_pipeline", "run workflow transforms with one read and one write"),
+    ("gradle_pipeline", "run Gradle transforms with one read and one write"),
+    ("batch_patch", "patch many apps built from this template on a process pool"),
+    ("watch_transforms", "re-apply transforms whenever the workflow or Gradle files change"),
+    ("streaming_transforms", "run line-oriented transforms as a stdin -> stdout filter"),
+    ("benchmark_transforms", "benchmark the transforms on synthetic inputs"),
+    ("workflow_validator", "check the indentation structure of the workflow"),
+    ("transaction", "roll interrupted multi-file transactions forward or back"),
+    ("snapshot_store", "record, list, diff and restore states of the edited files"),
+    ("gradle_block_tree", "print the block tree of build.gradle.kts"),
+    # Workflow
+    ("set_minimal_workflow", "replace the workflow with a minimal diagnostic workflow"),
+    ("restore_workflow_stage1", "restore the first set of workflow steps"),
+    ("restore_workflow_stage2", "restore the second set of workflow steps"),
+    ("restore_workflow_final", "restore the final build and artifact upload steps"),
+    ("correct_indentation", "fix the indentation of the jobs block"),
+    ("add_list_files_step", "add a listing step before 'Set Gradle version'"),
+    ("modify_workflow", "rewrite the keystore and release build steps"),
+    ("correct_workflow_secrets", "fix the ${{ }} syntax of the expressions"),
+    ("actions_expressions", "list, check and rename the ${{ }} expressions"),
+    ("modify_workflow_final_plus_patch", "replace the listing step with the build.gradle.kts patch step"),
+    ("update_embedded_patch_script", "update the Python script embedded in the patch step"),
+    ("update_embedded_script_v3", "update the embedded patch script (hardcoded replacements)"),
+    ("remove_orphaned_heredoc", "remove the orphaned heredoc block"),
+    ("remove_patch_step", "remove the build.gradle.kts patch step"),
+    ("remove_regenerate_step", "remove the 'Regenerate Android project' step"),
+    ("comment_out_build_steps", "comment out the release build and upload steps"),
+    ("comment_out_keystore_steps", "comment out the keystore steps"),
+    ("toggle_steps", "disable and re-enable workflow steps by name or glob"),
+    ("dedupe_workflow_steps", "remove redundant steps"),
+    ("add_cache_steps", "add cache steps for the Flutter SDK, pub packages and Gradle"),
+    ("release_profile_step", "rewrite the APK build and upload steps for a release profile"),
+    ("abi_matrix", "shard the APK build job by ABI"),
+    ("trigger_filters", "add build-input path filters and a concurrency group"),
+    ("actions_step_durations", "find the steps that use the most runner time"),
+    ("merkle_inputs", "hash step inputs so unchanged steps can be skipped"),
+    ("codegen_freshness", "run build_runner only for stale generated files"),
+    # Gradle
+    ("sanitize_gradle", "sanitize build.gradle.kts"),
+    ("fix_gradle_import", "add the java.util.Properties import to build.gradle.kts"),
+    ("modify_gradle", "modify build.gradle.kts"),
+    ("restructure_gradle", "move the keystore loading inside android {}"),
+    ("restructure_gradle_v2", "move the keystore loading inside android {} (v2)"),
+    ("rewrite_gradle_identifiers", "rewrite namespace / applicationId and the Kotlin DSL setters"),
+    ("overwrite_gradle_final", "overwrite build.gradle.kts with the fully corrected content"),
+    ("gradle_properties", "edit and tune gradle.properties"),
+):
+    register_command(_module_name.replace("_", "-"), _module_name, _summary)
+
+
+def print_commands():
+    width = max(len(name) for name in registered_commands)
+    for name, (module_name, summary) in registered_commands.items():
+        print(f"  {name:<{width}}  {summary}")
+
+
+def split_chain(arguments):
+    # ["a", "-x", "+", "b"] -> [["a", "-x"], ["b"]]
+    chain = [[]]
+    for argument in arguments:
+        if argument == chain_separator:
+            chain.append([])
+        else:
+            chain[-1].append(argument)
+    return [command for command in chain if command]
+
+
+def _module_header(module_name):
+    # The leading comment block of a script, as its help text
+    import importlib.util
+    spec = importlib.util.find_spec(module_name)
+    lines = []
+    with open(spec.origin, "r") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            lines.append(line[1:].strip())
+    return "\n".join(lines)
+
+
+def run_command(name, arguments):
+    # Runs one command in this process; returns its exit status
+    if name not in registered_commands:
+        raise KeyError(f"Unknown command '{name}'. Use --list to see the commands.")
+    module_name, summary = registered_commands[name]
+    import importlib
+    module = importlib.import_module(module_name)
+
+    main = getattr(module, "main", None)
+    if main is None and arguments:
+        # Never run a script without argument parsing just to show its help, nor with
+        # arguments it would silently ignore (a --dry-run it does not know)
+        if arguments in (["-h"], ["--help"]):
+            print(f"usage: dashboard-ci {name}\n\n{_module_header(module_name)}")
+            return 0
+        print(f"Error: '{name}' takes no arguments (got {' '.join(arguments)}).", file=sys.stderr)
+        return 2
+
+    saved_argv = sys.argv
+    sys.argv = [f"dashboard-ci {name}"] + list(arguments)
+    try:
+        if main is not None:
+            status = main(list(arguments))
+        else:
+            import runpy
+            runpy.run_module(module_name, run_name="__main__")
+            status = 0
+    except SystemExit as e:
+        status = e.code
+    finally:
+        sys.argv = saved_argv
+        sys.stdout.flush()
+
+    if status is None:
+        return 0
+    if not isinstance(status, int):
+        # sys.exit("message")
+        print(status, file=sys.stderr)
+        return 1
+    return status
+
+
+def main(argv=None):
+    arguments = list(sys.argv[1:] if argv is None else argv)
+    directory = None
+    keep_going = False
+    show_times = False
+    while arguments and arguments[0].startswith("-"):
+        option = arguments.pop(0)
+        if option in ("-h", "--help"):
+            print(usage)
+            print("commands:")
+            print_commands()
+            return 0
+        if option == "--list":
+            print_commands()
+            return 0
+        if option == "-C" and arguments:
+            directory = arguments.pop(0)
+        elif option == "--keep-going":
+            keep_going = True
+        elif option == "--time":
+            show_times = True
+        else:
+            print(f"Error: unknown option '{option}'.\n\n{usage}", end="")
+            return 2
+
+    chain = split_chain(arguments)
+    if not chain:
+        print(usage, end="")
+        return 0
+    unknown = [command[0] for command in chain if command[0] not in registered_commands]
+    if unknown:
+        print(f"Error: unknown command(s): {', '.join(unknown)}. Use --list to see the commands.")
+        return 2
+
+    if directory is not None:
+        os.chdir(directory)
+    status = 0
+    for command in chain:
+        started = time.perf_counter()
+        result = run_command(command[0], command[1:])
+        if show_times:
+            print(f"[{command[0]}] {(time.perf_counter() - started) * 1000:.1f} ms, exit status {result}")
+        if result != 0:
+            status = result
+            if not keep_going:
+                print(f"'{command[0]}' failed with exit status {result}, the rest of the chain was not run.")
+                return result
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+# Python script to remove redundant steps from .github/workflows/android_build.yml
+#
+# Each "run:" step is normalized to (working directory, command, env): "./app" and "app/"
+# are the same directory, whitespace and comment lines in the command do not count, and
+# env is compared as a set. Within a job it then removes:
+#   - exact duplicates: the same normalized step again, with nothing in between that
+#     could change its result ("flutter pub get" twice in a row);
+#   - implied duplicates: a step whose work an earlier step already did
+#     ("flutter pub get" after "flutter pub upgrade" or "flutter create", both of which
+#     resolve and fetch the packages), or "./gradlew clean" on a fresh checkout, before
+#     anything was built.
+# Steps with an "id:" (their outputs may be used) or an "if:" are never removed. An action
+# step or an unknown command may change anything anywhere (flutter-action switches the
+# SDK, "rm -rf app/.dart_tool" runs from the root), so nothing done before it counts.
+# The runner time saved is estimated from a per-command cost table, or from measured
+# durations (the --json output of actions_step_durations.py).
+#
+# Usage:
+#   python dedupe_workflow_steps.py
+#   python dedupe_workflow_steps.py --dry-run --durations durations.json
+
+import argparse
+import collections
+import json
+import posixpath
+import re
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+# Command classes, matched against the normalized first command line of a step
+command_classes = [
+    ("pub-get", re.compile(r"^(flutter|dart) pub get\b")),
+    ("pub-upgrade", re.compile(r"^(flutter|dart) pub upgrade\b")),
+    ("flutter-create", re.compile(r"^flutter create\b")),
+    ("build-runner", re.compile(r"^(flutter pub run|dart run) build_runner\b")),
+    ("flutter-build", re.compile(r"^flutter build\b")),
+    ("gradle-wrapper", re.compile(r"^(\./)?gradlew wrapper\b")),
+    ("gradle-clean", re.compile(r"^(\./)?gradlew clean$")),
+    ("gradle-build", re.compile(r"^(\./)?gradlew (assemble|build|bundle)")),
+    ("inspect", re.compile(r"^(echo|ls|cat|pwd|flutter --version|flutter doctor)\b")),
+]
+
+# Estimated seconds per command class on a GitHub-hosted runner
+default_costs = {
+    "pub-get": 20,
+    "pub-upgrade": 35,
+    "flutter-create": 15,
+    "build-runner": 60,
+    "flutter-build": 300,
+    "gradle-wrapper": 40,
+    "gradle-clean": 45,
+    "gradle-build": 240,
+    "inspect": 1,
+    "other": 10,
+}
+
+# Classes whose work includes a "pub get" of the same directory
+implies_pub_get = {"pub-upgrade": "flutter pub upgrade", "flutter-create": "flutter create"}
+
+# Classes that do not change anything another step depends on
+read_only_classes = {"inspect"}
+
+# Actions that set up the runner and build nothing in the checkout
+setup_actions = ("actions/checkout@", "actions/setup-java@", "actions/cache@", "subosito/flutter-action@")
+
+Step = collections.namedtuple("Step", ["span", "name", "uses", "directory", "command", "env", "command_class", "keys"])
+Finding = collections.namedtuple("Finding", ["step", "kind", "reason", "seconds"])
+
+
+# --- Reading steps ---------------------------------------------------------------------
+
+def _indent_of(line):
+    return len(line) - len(line.lstrip(" "))
+
+
+def step_fields(lines, span):
+    # Top-level keys of a step -> raw value (block scalars and mappings as their lines)
+    fields = {}
+    key_indent = None
+    current_key = None
+    for index in range(span.start, span.end):
+        line = lines[index]
+        if not line.strip() or line.strip().startswith("#"):
+            if current_key is not None and not line.strip().startswith("#"):
+                fields[current_key].append("")
+            continue
+        text = line.rstrip("\n")
+        if index == span.start:
+            # "- name: ..." : the key starts after the dash
+            dash = text.index("-")
+            text = " " * (dash + 1) + text[dash + 1:]
+            key_indent = _indent_of(text)
+        indent = _indent_of(text)
+        if key_indent is None:
+            key_indent = indent
+        if indent == key_indent and ":" in text:
+            key, _, value = text.strip().partition(":")
+            current_key = key.strip()
+            fields[current_key] = [value.strip()]
+        elif current_key is not None:
+            fields[current_key].append(text.strip())
+    return fields
+
+
+def _normalize_directory(value):
+    value = (value or ".").strip().strip("'\"")
+    return posixpath.normpath(value) if value else "."
+
+
+def _normalize_command(values):
+    if not values:
+        return ()
+    first = values[0]
+    if re.match(r"^[|>][0-9+-]*$", first):
+        body = values[1:]
+    elif len(first) >= 2 and first[0] == first[-1] and first[0] in "'\"":
+        body = [first[1:-1]] + values[1:]
+    else:
+        body = values
+    commands = []
+    for line in body:
+        line = " ".join(line.split())
+        if line and not line.startswith("#"):
+            commands.append(line)
+    return tuple(commands)
+
+
+def _normalize_env(values):
+    env = []
+    for line in (values or [])[1:]:
+        if ":" in line:
+            key, _, value = line.partition(":")
+            env.append((key.strip(), value.strip().strip("'\"")))
+    return tuple(sorted(env))
+
+
+def _command_class(command):
+    if not command:
+        return "other"
+    for name, pattern in command_classes:
+        if name == "inspect":
+            # Only when every line just prints: "echo ... > file" writes a file
+            if all(pattern.search(line) and not re.search(r"[>|]", line) for line in command):
+                return name
+        elif pattern.search(command[0]) and len(command) == 1:
+            return name
+    return "other"
+
+
+def read_steps(lines, document=None):
+    # {job: [Step]} in file order
+    document = document or WorkflowDocument.from_lines(lines)
+    jobs = collections.OrderedDict()
+    for span in document.steps():
+        fields = step_fields(lines, span)
+        command = _normalize_command(fields.get("run"))
+        jobs.setdefault(span.job, []).append(Step(
+            span=span,
+            name=span.name or (fields.get("uses") or fields.get("run") or [""])[0],
+            uses=(fields.get("uses") or [""])[0].strip("'\""),
+            directory=_normalize_directory((fields.get("working-directory") or ["."])[0]),
+            command=command,
+            env=_normalize_env(fields.get("env")),
+            command_class=_command_class(command) if "run" in fields else "action",
+            keys=set(fields),
+        ))
+    return jobs
+
+
+# --- Finding redundant steps -----------------------------------------------------------
+
+def _is_within(directory, parent):
+    # Normalized directories: "." is the root, "app/android" is within "app"
+    return parent == "." or directory == parent or directory.startswith(parent + "/")
+
+
+def _cost(step, costs, durations):
+    if durations and step.name in durations:
+        return durations[step.name]
+    return costs.get(step.command_class, costs.get("other", 0))
+
+
+def find_redundant_steps(lines, costs=None, durations=None):
+    costs = costs or default_costs
+    findings = []
+    for job, steps in read_steps(lines).items():
+        checked_out = False
+        built = False
+        # (directory, command, env) -> step, for the steps still valid at this point
+        done = {}
+        # directory -> (step, command) of the last step whose work includes a pub get there
+        packages_fetched = {}
+
+        for step in steps:
+            if step.command_class == "action":
+                # An action can change anything, in any directory (flutter-action switches
+                # the SDK the packages were resolved with): nothing done before still counts
+                done = {}
+                packages_fetched = {}
+                if step.uses.startswith("actions/checkout@"):
+                    checked_out = True
+                elif not step.uses.startswith(setup_actions):
+                    built = True
+                continue
+
+            removable = "id" not in step.keys and "if" not in step.keys
+            key = (step.directory, step.command, step.env)
+
+            if removable and key in done and step.command_class != "other":
+                findings.append(Finding(step, "exact",
+                                        f"same command as '{done[key].name}' in {step.directory}",
+                                        _cost(step, costs, durations)))
+                continue
+            earlier, command = packages_fetched.get(step.directory, (None, None))
+            # Env can change what pub fetches (PUB_HOSTED_URL, ...): only the same env counts
+            if removable and step.command_class == "pub-get" and earlier is not None and earlier.env == step.env:
+                findings.append(Finding(step, "implied", f"'{command}' in '{earlier.name}' already fetched the packages",
+                                        _cost(step, costs, durations)))
+                continue
+            if removable and step.command_class == "gradle-clean" and checked_out and not built:
+                findings.append(Finding(step, "implied", "nothing was built since the fresh checkout",
+                                        _cost(step, costs, durations)))
+                continue
+
+            # The step runs: update what is known to be done
+            if step.command_class in ("flutter-build", "gradle-build"):
+                built = True
+            if step.command_class in implies_pub_get and "--no-pub" not in " ".join(step.command):
+                packages_fetched[step.directory] = (step, implies_pub_get[step.command_class])
+            elif step.command_class == "pub-get":
+                packages_fetched[step.directory] = (step, "flutter pub get")
+            elif step.command_class == "other":
+                # An unknown command may change anything, not only in its own directory
+                # ("rm -rf app/.dart_tool" run from the root): forget everything
+                packages_fetched = {}
+                done = {}
+                built = True
+            elif step.command_class not in read_only_classes:
+                # Known commands only change their own directory and the ones below it
+                packages_fetched = {directory: fetched for directory, fetched in packages_fetched.items()
+                                    if not _is_within(directory, step.directory)}
+                done = {k: v for k, v in done.items() if not _is_within(k[0], step.directory)}
+            if step.command_class != "other":
+                done[key] = step
+    return findings
+
+
+def dedupe_workflow_steps(lines, findings=None):
+    if findings is None:
+        findings = find_redundant_steps(lines)
+    if not findings:
+        return lines
+    document = WorkflowDocument.from_lines(lines)
+    for finding in findings:
+        document.remove_span(finding.step.span)
+    return document.lines()
+
+
+def load_durations(path):
+    # Measured p50 per step name, from the --json output of actions_step_durations.py
+    with open(path, "r") as f:
+        report = json.load(f)
+    return {row["step"]: row["p50"] for row in report.get("steps", [])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate and implied-duplicate workflow steps.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to clean up")
+    parser.add_argument("--dry-run", action="store_true", help="only report the redundant steps")
+    parser.add_argument("--durations", metavar="PATH", help="measured step durations (actions_step_durations.py --json)")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+    durations = load_durations(args.durations) if args.durations else None
+
+    findings = find_redundant_steps(lines, durations=durations)
+    if not findings:
+        print(f"No redundant steps in {args.file}.")
+        return 0
+
+    for finding in findings:
+        print(f"  line {finding.step.span.start + 1}: '{finding.step.name}' ({finding.kind} duplicate):"
+              f" {finding.reason}, ~{finding.seconds:.0f}s")
+    saved = sum(finding.seconds for finding in findings)
+    print(f"{len(findings)} redundant step(s), about {saved:.0f}s of runner time saved per run.")
+
+    if not args.dry_run:
+        write_file(args.file, "".join(dedupe_workflow_steps(lines, findings)))
+        print(f"Removed them from {args.file}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
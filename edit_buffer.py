@@ -0,0 +1,160 @@
+# Python module with a piece-table edit buffer shared by the workflow and Gradle transforms.
+#
+# Transforms do not rebuild line lists while they scan (list.insert / pop / index inside a
+# loop is quadratic on large files). Instead they record edits as
+# (offset, delete length, insert text) against the ORIGINAL text, and render() merges
+# all of them in one linear pass: the output is a list of pieces that are either slices
+# of the original text or inserted strings.
+#
+# Rules:
+# - offsets always refer to the original text, whatever was recorded before;
+# - two edits that delete overlapping ranges are a conflict (EditConflictError);
+# - insertions at the same offset come out in the order they were recorded, and before
+#   a replacement that starts at that offset;
+# - a pure insertion anchored inside a deleted range is emitted right after the text
+#   that replaced that range.
+#
+# changed_ranges() goes the other way: given two versions of a text as lines, it finds
+# the runs of lines that differ (used by watch_transforms.py and workflow_validator.py).
+
+import bisect
+import collections
+import difflib
+
+Edit = collections.namedtuple("Edit", ["offset", "length", "text", "order"])
+
+
+class EditConflictError(ValueError):
+    pass
+
+
+class EditBuffer:
+    def __init__(self, text):
+        self.original = text
+        self._edits = []
+        self._line_offsets = None
+
+    @classmethod
+    def from_lines(cls, lines):
+        return cls("".join(lines))
+
+    # --- Recording edits -------------------------------------------------------------
+
+    def replace(self, offset, length, text):
+        if offset < 0 or length < 0 or offset + length > len(self.original):
+            raise IndexError(f"Edit [{offset}, {offset + length}) is outside the text (length {len(self.original)}).")
+        self._edits.append(Edit(offset, length, text, len(self._edits)))
+
+    def insert(self, offset, text):
+        self.replace(offset, 0, text)
+
+    def delete(self, offset, length):
+        self.replace(offset, length, "")
+
+    def replace_range(self, start, end, text):
+        self.replace(start, end - start, text)
+
+    # Line based helpers, for transforms that think in lines (0-based line numbers)
+
+    def line_offset(self, line_number):
+        if self._line_offsets is None:
+            offsets = [0]
+            position = self.original.find("\n")
+            while position != -1:
+                offsets.append(position + 1)
+                position = self.original.find("\n", position + 1)
+            self._line_offsets = offsets
+        if line_number >= len(self._line_offsets):
+            return len(self.original)
+        return self._line_offsets[line_number]
+
+    def line_number(self, offset):
+        self.line_offset(0)
+        return bisect.bisect_right(self._line_offsets, offset) - 1
+
+    def insert_lines(self, line_number, lines):
+        text = "".join(lines)
+        offset = self.line_offset(line_number)
+        if offset == len(self.original) and self.original and not self.original.endswith("\n") and text:
+            text = "\n" + text
+        self.insert(offset, text)
+
+    def replace_lines(self, start_line, end_line, lines):
+        self.replace_range(self.line_offset(start_line), self.line_offset(end_line), "".join(lines))
+
+    def delete_lines(self, start_line, end_line):
+        self.replace_lines(start_line, end_line, [])
+
+    def is_modified(self):
+        return bool(self._edits)
+
+    def edit_count(self):
+        return len(self._edits)
+
+    # --- Output ----------------------------------------------------------------------
+
+    def pieces(self):
+        # The piece table: ("original", start, end) slices and ("added", text) pieces
+        text = self.original
+        # At a given offset, insertions come before the text that replaces a range
+        # starting there ("insert before" a replaced step keeps its meaning)
+        edits = sorted(self._edits, key=lambda edit: (edit.offset, edit.length != 0, edit.order))
+        pieces = []
+        position = 0
+        deleted_until = 0   # end of the last deleted range
+        for edit in edits:
+            if edit.length:
+                if edit.offset < deleted_until:
+                    raise EditConflictError(
+                        f"Edit at offset {edit.offset} overlaps a previous edit ending at {deleted_until}.")
+                if edit.offset > position:
+                    pieces.append(("original", position, edit.offset))
+                if edit.text:
+                    pieces.append(("added", edit.text))
+                position = deleted_until = edit.offset + edit.length
+            else:
+                if edit.offset > position:
+                    pieces.append(("original", position, edit.offset))
+                    position = edit.offset
+                if edit.text:
+                    pieces.append(("added", edit.text))
+        if position < len(text):
+            pieces.append(("original", position, len(text)))
+        return pieces
+
+    def render(self):
+        if not self._edits:
+            return self.original
+        text = self.original
+        output = []
+        for piece in self.pieces():
+            if piece[0] == "original":
+                output.append(text[piece[1]:piece[2]])
+            else:
+                output.append(piece[1])
+        return "".join(output)
+
+    def lines(self):
+        return self.render().splitlines(True)
+
+
+def changed_ranges(old_lines, new_lines):
+    # Returns [(old start, old end, new start, new end)] for every changed run of lines.
+    # The common prefix and suffix are skipped first, so the diff only sees the edit.
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_lines[len(old_lines) - 1 - suffix] == new_lines[len(new_lines) - 1 - suffix]):
+        suffix += 1
+
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    ranges = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            ranges.append((prefix + i1, prefix + i2, prefix + j1, prefix + j2))
+    return ranges
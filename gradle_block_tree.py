@@ -0,0 +1,377 @@
+# Python module to parse the block structure of a Kotlin DSL build script (build.gradle.kts).
+#
+# A small lexer walks the file once, skipping line comments, nested block comments,
+# string literals (with ${...} templates), raw """strings""" and char literals, so braces
+# inside them are never counted. Every "name {" / "name(...) {" opens a block and the
+# parser records its offsets and its dotted path, e.g. "android.buildTypes.release".
+# Transforms look blocks up by path and splice at those offsets instead of scanning
+# the file line by line with state flags.
+#
+# Offsets are indexes into the decoded text (str), which is what the transforms splice.
+
+import argparse
+import bisect
+import collections
+import sys
+
+# Calls whose first string argument names the block, e.g. create("release") { ... }
+# is recorded as "release" so that "android.signingConfigs.release" works.
+named_container_calls = ("create", "getByName", "named", "register", "maybeCreate", "getAt")
+
+Token = collections.namedtuple("Token", ["kind", "value", "start", "end"])
+
+
+class GradleParseError(ValueError):
+    def __init__(self, message, line_number=None):
+        if line_number is not None:
+            message = f"line {line_number}: {message}"
+        super().__init__(message)
+        self.line_number = line_number
+
+
+class GradleBlock:
+    def __init__(self, name, parent, start, open_offset):
+        self.name = name
+        self.parent = parent
+        self.path = name if parent is None or parent.parent is None else parent.path + "." + name
+        self.start = start              # offset of the first character of the block header
+        self.open_offset = open_offset  # offset of "{"
+        self.close_offset = None        # offset of the matching "}"
+        self.children = []
+
+    @property
+    def body_start(self):
+        return self.open_offset + 1
+
+    @property
+    def body_end(self):
+        return self.close_offset
+
+    @property
+    def end(self):
+        return self.close_offset + 1
+
+    def child(self, name):
+        for block in self.children:
+            if block.name == name:
+                return block
+        return None
+
+    def __repr__(self):
+        return f"GradleBlock({self.path!r}, {self.start}, {self.open_offset}, {self.close_offset})"
+
+
+def _is_identifier_start(char):
+    return char.isalpha() or char == "_"
+
+
+def _is_identifier_part(char):
+    return char.isalnum() or char == "_"
+
+
+class _Lexer:
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self.tokens = []
+        self.ignored = []   # (start, end) of comments and string literals
+
+    def error(self, message, offset):
+        raise GradleParseError(message, self.text.count("\n", 0, offset) + 1)
+
+    def run(self):
+        self._code(0, top_level=True)
+        return self.tokens
+
+    def _code(self, i, top_level=False):
+        # Lex code until the end of the file, or (inside a ${...} template) until the
+        # "}" that closes the template. Returns the offset after what was consumed.
+        text = self.text
+        depth = 0
+        while i < self.length:
+            char = text[i]
+            if char in " \t\r\n":
+                i += 1
+            elif text.startswith("//", i):
+                end = text.find("\n", i)
+                end = self.length if end == -1 else end
+                self.ignored.append((i, end))
+                i = end
+            elif text.startswith("/*", i):
+                end = self._block_comment(i)
+                self.ignored.append((i, end))
+                i = end
+            elif text.startswith('"""', i):
+                start = i
+                i = self._raw_string(i)
+                self.ignored.append((start, i))
+                self.tokens.append(Token("string", text[start + 3:i - 3], start, i))
+            elif char == '"':
+                start = i
+                i, value = self._string(i)
+                self.ignored.append((start, i))
+                self.tokens.append(Token("string", value, start, i))
+            elif char == "'":
+                start = i
+                i = self._char_literal(i)
+                self.ignored.append((start, i))
+                self.tokens.append(Token("char", text[start:i], start, i))
+            elif char == "`":
+                end = text.find("`", i + 1)
+                if end == -1:
+                    self.error("unterminated backtick identifier", i)
+                self.tokens.append(Token("identifier", text[i + 1:end], i, end + 1))
+                i = end + 1
+            elif _is_identifier_start(char):
+                start = i
+                while i < self.length and _is_identifier_part(text[i]):
+                    i += 1
+                self.tokens.append(Token("identifier", text[start:i], start, i))
+            elif char == "{":
+                depth += 1
+                self.tokens.append(Token("{", char, i, i + 1))
+                i += 1
+            elif char == "}":
+                if not top_level and depth == 0:
+                    return i + 1
+                depth -= 1
+                self.tokens.append(Token("}", char, i, i + 1))
+                i += 1
+            else:
+                self.tokens.append(Token("symbol", char, i, i + 1))
+                i += 1
+        if not top_level:
+            self.error("unterminated string template", i)
+        return i
+
+    def _block_comment(self, i):
+        # Kotlin block comments nest
+        text = self.text
+        start = i
+        nesting = 0
+        while i < self.length:
+            if text.startswith("/*", i):
+                nesting += 1
+                i += 2
+            elif text.startswith("*/", i):
+                nesting -= 1
+                i += 2
+                if nesting == 0:
+                    return i
+            else:
+                i += 1
+        self.error("unterminated block comment", start)
+
+    def _template(self, i):
+        # i points at "${"; the template body is code and may contain braces and strings.
+        # Its tokens are not part of the block structure, so lex it separately.
+        nested = _Lexer(self.text)
+        nested.length = self.length
+        return nested._code(i + 2)
+
+    def _string(self, i):
+        text = self.text
+        start = i
+        i += 1
+        simple = True
+        while i < self.length:
+            char = text[i]
+            if char == "\\":
+                simple = False
+                i += 2
+            elif char == "$" and text.startswith("${", i):
+                simple = False
+                i = self._template(i)
+            elif char == '"':
+                i += 1
+                value = text[start + 1:i - 1] if simple else None
+                return i, value
+            elif char == "\n":
+                break
+            else:
+                i += 1
+        self.error("unterminated string literal", start)
+
+    def _raw_string(self, i):
+        text = self.text
+        start = i
+        i += 3
+        while i < self.length:
+            if text.startswith("${", i):
+                i = self._template(i)
+            elif text.startswith('"""', i):
+                i += 3
+                # Extra quotes right before the closing delimiter belong to the string
+                while i < self.length and text[i] == '"':
+                    i += 1
+                return i
+            else:
+                i += 1
+        self.error("unterminated raw string", start)
+
+    def _char_literal(self, i):
+        text = self.text
+        end = i + 1
+        if end < self.length and text[end] == "\\":
+            end += 2
+        else:
+            end += 1
+        while end < self.length and text[end] != "'" and text[end] != "\n" and end - i < 10:
+            end += 1
+        if end >= self.length or text[end] != "'":
+            self.error("unterminated char literal", i)
+        return end + 1
+
+
+class GradleBlockTree:
+    def __init__(self, text):
+        self.text = text
+        lexer = _Lexer(text)
+        self.tokens = lexer.run()
+        self._ignored = lexer.ignored
+        self._ignored_starts = [start for start, _ in self._ignored]
+        self.root = GradleBlock("", None, 0, -1)
+        self.root.close_offset = len(text)
+        self._by_path = {}
+        self._line_starts = None
+        self._build()
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls(f.read())
+
+    def _line_number(self, offset):
+        return self.text.count("\n", 0, offset) + 1
+
+    def _block_header(self, index):
+        # Work out the name and start offset of the block whose "{" is tokens[index]
+        tokens = self.tokens
+        j = index - 1
+        if j < 0:
+            return "<lambda>", tokens[index].start
+        previous = tokens[j]
+        if previous.kind == "identifier":
+            return self._qualified_name(j)
+        if previous.kind == "symbol" and previous.value == ")":
+            # Skip back to the matching "(" and take the callee in front of it
+            nesting = 0
+            k = j
+            while k >= 0:
+                token = tokens[k]
+                if token.kind == "symbol" and token.value == ")":
+                    nesting += 1
+                elif token.kind == "symbol" and token.value == "(":
+                    nesting -= 1
+                    if nesting == 0:
+                        break
+                k -= 1
+            if k > 0 and tokens[k - 1].kind == "identifier":
+                callee = tokens[k - 1]
+                arguments = tokens[k + 1:j]
+                if callee.value in named_container_calls and arguments and \
+                        arguments[0].kind == "string" and arguments[0].value is not None and \
+                        (len(arguments) == 1 or arguments[1].value == ","):
+                    return arguments[0].value, callee.start
+                return self._qualified_name(k - 1)
+        return "<lambda>", tokens[index].start
+
+    def _qualified_name(self, j):
+        # "configurations.all {" is named "configurations.all", not just "all"
+        tokens = self.tokens
+        name = tokens[j].value
+        start = tokens[j].start
+        while j >= 2 and tokens[j - 1].value == "." and tokens[j - 1].kind == "symbol" and \
+                tokens[j - 2].kind == "identifier" and tokens[j - 1].start == tokens[j - 2].end:
+            j -= 2
+            name = tokens[j].value + "." + name
+            start = tokens[j].start
+        return name, start
+
+    def _build(self):
+        stack = [self.root]
+        for index, token in enumerate(self.tokens):
+            if token.kind == "{":
+                name, start = self._block_header(index)
+                block = GradleBlock(name, stack[-1], start, token.start)
+                stack[-1].children.append(block)
+                self._by_path.setdefault(block.path, []).append(block)
+                stack.append(block)
+            elif token.kind == "}":
+                if len(stack) == 1:
+                    raise GradleParseError("unmatched '}'", self._line_number(token.start))
+                stack.pop().close_offset = token.start
+        if len(stack) > 1:
+            raise GradleParseError(f"block '{stack[-1].path}' is never closed", self._line_number(stack[-1].open_offset))
+
+    # --- Lookups ---------------------------------------------------------------------
+
+    def find(self, path):
+        blocks = self._by_path.get(path)
+        return blocks[0] if blocks else None
+
+    def find_all(self, path):
+        return list(self._by_path.get(path, ()))
+
+    def paths(self):
+        return list(self._by_path)
+
+    def blocks(self):
+        # Depth-first, in file order
+        pending = list(reversed(self.root.children))
+        while pending:
+            block = pending.pop()
+            yield block
+            pending.extend(reversed(block.children))
+
+    def is_code(self, offset):
+        # False when offset falls inside a comment or a string literal
+        index = bisect.bisect_right(self._ignored_starts, offset) - 1
+        return index < 0 or offset >= self._ignored[index][1]
+
+    def find_code(self, needle, start=0, end=None):
+        # str.find that ignores matches inside comments and strings
+        end = len(self.text) if end is None else end
+        position = self.text.find(needle, start, end)
+        while position != -1 and not self.is_code(position):
+            position = self.text.find(needle, position + 1, end)
+        return position
+
+    # --- Offsets helpers ---------------------------------------------------------------
+
+    def line_start(self, offset):
+        return self.text.rfind("\n", 0, offset) + 1
+
+    def line_end(self, offset):
+        # Offset just after the newline that ends the line containing offset
+        end = self.text.find("\n", offset)
+        return len(self.text) if end == -1 else end + 1
+
+    def indent_of(self, block):
+        start = self.line_start(block.start)
+        return self.text[start:block.start]
+
+    def closing_line_start(self, block):
+        # Start of the line holding the closing "}", to insert text at the end of a block body
+        return self.line_start(block.close_offset)
+
+
+def parse_blocks(text):
+    return GradleBlockTree(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the block tree of build.gradle.kts.")
+    parser.add_argument("file", nargs="?", default="flutter_dashboard_app/android/app/build.gradle.kts",
+                        help="Gradle Kotlin DSL file")
+    args = parser.parse_args(argv)
+
+    tree = GradleBlockTree.load(args.file)
+    for block in tree.blocks():
+        line = tree._line_number(block.start)
+        print(f"{line:5d}  {block.path}  [{block.start}:{block.end}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Python script to run several Gradle transforms over build.gradle.kts in a single pass.
+# The counterpart of workflow_pipeline.py: the file is read once, the transforms run in
+# order on the same in-memory text and the result is written once. The whole chain goes
+# through the content-hash cache, so running it again on an unchanged file costs one hash.
+#
+# Usage:
+#   python gradle_pipeline.py fix-gradle-import modify-gradle
+#   python gradle_pipeline.py --list
+
+import argparse
+import importlib
+import sys
+import time
+
+from transform_cache import TransformCache, describe_status, run_cached
+
+gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
+
+# Registered transforms, in registration order: name -> (module name, function name).
+# A transform takes the text of the build script and returns the new text; its module
+# defines transform_version, which is part of the cache key.
+registered_transforms = {}
+
+
+def register_transform(name, module_name, function_name=None):
+    if name in registered_transforms:
+        raise ValueError(f"Transform '{name}' is already registered.")
+    registered_transforms[name] = (module_name, function_name or module_name)
+
+
+for _module_name in (
+    "sanitize_gradle",
+    "fix_gradle_import",
+    "modify_gradle",
+    "restructure_gradle",
+    "restructure_gradle_v2",
+    "rewrite_gradle_identifiers",
+):
+    register_transform(_module_name.replace("_", "-"), _module_name)
+
+
+def load_transform(name):
+    if name not in registered_transforms:
+        raise KeyError(f"Unknown transform '{name}'. Use --list to see the registered transforms.")
+    module_name, function_name = registered_transforms[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name), getattr(module, "transform_version", 1)
+
+
+def run_pipeline(content, transform_names):
+    transforms = [(name,) + load_transform(name) for name in transform_names]
+
+    timings = []
+    for name, transform, version in transforms:
+        started = time.perf_counter()
+        content = transform(content)
+        timings.append((name, time.perf_counter() - started))
+    return content, timings
+
+
+def pipeline_version(transform_names):
+    # Cache version of a chain: changes whenever one of its transforms changes
+    return ",".join(f"{name}={load_transform(name)[1]}" for name in transform_names)
+
+
+def run_pipeline_on_file(file_path, transform_names, cache=None, transaction=None):
+    # Returns (cache status, timings); timings is empty when the cache answered.
+    # With a transaction, the result is staged in it and written when it commits.
+    timings = []
+
+    def transform_chain(content):
+        new_content, chain_timings = run_pipeline(content, transform_names)
+        timings.extend(chain_timings)
+        return new_content
+
+    status, output_hash = run_cached(file_path, "gradle-pipeline:" + "+".join(transform_names),
+                                     pipeline_version(transform_names), transform_chain, cache=cache,
+                                     transaction=transaction)
+    return status, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Gradle transforms with a single read and a single write.")
+    parser.add_argument("transforms", nargs="*", help="registered transform names, applied in the given order")
+    parser.add_argument("--file", default=gradle_file_path, help="build.gradle.kts file to transform")
+    parser.add_argument("--list", action="store_true", help="list the registered transforms and exit")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.transforms:
+        for name, (module_name, function_name) in registered_transforms.items():
+            print(f"{name}  ({module_name}.{function_name})")
+        return 0
+
+    try:
+        status, timings = run_pipeline_on_file(args.file, args.transforms, TransformCache())
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 2
+    except ValueError as e:
+        # A transform that cannot apply (restructure-gradle without a keystore block, ...)
+        print(f"Error: {e}. {args.file} was left unchanged.")
+        return 1
+
+    print(f"{args.file}: {describe_status(status)}.")
+    for name, seconds in timings:
+        print(f"  {name:<24} {seconds * 1000:9.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
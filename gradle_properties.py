@@ -0,0 +1,304 @@
+# Python script to edit flutter_dashboard_app/android/gradle.properties and tune it for the
+# machine (or GitHub runner) that builds the app.
+#
+# GradleProperties is an order-preserving editor: it keeps every line (comments, blank
+# lines, continuation lines, the "=" / ":" style of each entry) and only rewrites the
+# entries that are set or removed; new entries are appended at the end.
+#
+# The tuner sizes the Gradle daemon, the Kotlin daemon and the worker count from the
+# cores and memory it is given (read from /proc and the cgroup v1 or v2 limits by
+# default, or taken from a runner profile), so that the heaps, the Gradle metaspace and
+# the workers together fit in memory next to the Dart / OS overhead of a Flutter build
+# (no swapping) and every core has a worker as far as memory allows. A machine below
+# minimum_memory is refused rather than oversubscribed. It also turns on parallel
+# execution, the build cache and the configuration cache.
+#
+# Usage:
+#   python gradle_properties.py                      # tune for this machine
+#   python gradle_properties.py --profile github-private --dry-run
+#   python gradle_properties.py --cores 8 --memory 32768
+#   python gradle_properties.py --set android.enableJetifier=false
+
+import argparse
+import os
+import re
+import sys
+
+from transaction import write_file
+
+gradle_properties_file_path = "flutter_dashboard_app/android/gradle.properties"
+
+# (cores, memory in MB) of the GitHub-hosted Linux runners
+runner_profiles = {
+    "github-public": (4, 16384),
+    "github-private": (2, 7168),
+    "github-large-4": (4, 16384),
+    "github-large-8": (8, 32768),
+    "github-large-16": (16, 65536),
+}
+
+# Memory left to the OS, the runner and the Dart processes of "flutter build" (MB)
+reserved_memory = 2048
+
+# Memory of one Gradle worker process (aapt2, ...) (MB)
+worker_memory = 512
+
+# Least heap or metaspace a daemon gets (MB): below it a Gradle or Kotlin daemon
+# barely starts
+minimum_jvm_memory = 256
+
+# Least memory the build is sized for: the reserve, the three minimums and one worker
+minimum_memory = reserved_memory + 3 * minimum_jvm_memory + worker_memory
+
+_entry_pattern = re.compile(r"^(\s*)((?:\\.|[^\s=:\\])+)(\s*[=:]\s*|\s+)(.*)$", re.DOTALL)
+
+
+def _is_continued(line):
+    # A line ending in an odd number of backslashes continues on the next line
+    text = line.rstrip("\r\n")
+    return (len(text) - len(text.rstrip("\\"))) % 2 == 1
+
+
+class GradleProperties:
+    def __init__(self, text=""):
+        # Logical lines: every entry is one item, however many physical lines it spans
+        self._items = []
+        self._index = {}
+        physical = text.splitlines(True)
+        position = 0
+        while position < len(physical):
+            start = position
+            while _is_continued(physical[position]) and position + 1 < len(physical):
+                position += 1
+            position += 1
+            self._add_item("".join(physical[start:position]))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls(f.read())
+
+    def _add_item(self, raw):
+        stripped = raw.strip()
+        match = None if not stripped or stripped[0] in "#!" else _entry_pattern.match(raw.rstrip("\r\n"))
+        if match is None:
+            self._items.append([None, raw])
+            return
+        key = match.group(2)
+        # Item: [key, raw line, separator, value]; a later duplicate key wins, as in Java
+        self._index[key] = len(self._items)
+        self._items.append([key, raw, match.group(3), self._join_value(match.group(4))])
+
+    @staticmethod
+    def _join_value(value):
+        # Continuation lines: drop the backslash and the leading whitespace of the next line
+        parts = value.split("\n")
+        joined = []
+        for index, part in enumerate(parts):
+            part = part.rstrip("\r")
+            if index:
+                part = part.lstrip()
+            joined.append(part[:-1] if index < len(parts) - 1 else part)
+        return "".join(joined)
+
+    def keys(self):
+        return [item[0] for index, item in enumerate(self._items) if item[0] and self._index[item[0]] == index]
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else self._items[index][3]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def set(self, key, value):
+        # Returns True when the file changes
+        value = str(value)
+        index = self._index.get(key)
+        if index is None:
+            if self._items and not self._items[-1][1].endswith("\n"):
+                self._items[-1][1] += "\n"
+            self._index[key] = len(self._items)
+            self._items.append([key, f"{key}={value}\n", "=", value])
+            return True
+        item = self._items[index]
+        if item[3] == value:
+            return False
+        ending = "\n" if item[1].endswith("\n") else ""
+        indent = item[1][:len(item[1]) - len(item[1].lstrip())]
+        item[1] = f"{indent}{key}{item[2]}{value}{ending}"
+        item[3] = value
+        return True
+
+    def remove(self, key):
+        index = self._index.pop(key, None)
+        if index is None:
+            return False
+        # Earlier duplicates of the key go too, or they would come back into effect
+        for item in self._items:
+            if item[0] == key:
+                item[0], item[1] = None, ""
+        return True
+
+    def render(self):
+        return "".join(item[1] for item in self._items)
+
+
+# --- Runner resources ------------------------------------------------------------------
+
+def _read_first_line(path):
+    try:
+        with open(path, "r") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def detect_resources():
+    # (cores, memory in MB) available to this process, cgroup limits included
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    quota = _read_first_line("/sys/fs/cgroup/cpu.max")
+    if quota and not quota.startswith("max"):
+        limit, period = quota.split()
+        cores = max(1, min(cores, int(limit) // int(period)))
+    for directory in ("/sys/fs/cgroup/cpu", "/sys/fs/cgroup/cpu,cpuacct"):
+        # cgroup v1: a quota of -1 is no limit
+        limit = _read_first_line(os.path.join(directory, "cpu.cfs_quota_us"))
+        period = _read_first_line(os.path.join(directory, "cpu.cfs_period_us"))
+        if limit and period and limit.isdigit() and period.isdigit() and int(period):
+            cores = max(1, min(cores, int(limit) // int(period)))
+            break
+
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read_first_line(path)
+        if limit and limit.isdigit():
+            memory = min(memory, int(limit))
+    return cores, memory // (1024 * 1024)
+
+
+# --- Tuning ----------------------------------------------------------------------------
+
+def _clamp(value, lowest, highest):
+    return max(lowest, min(highest, value))
+
+
+def _round_down(megabytes, step=256):
+    return megabytes - megabytes % step
+
+
+def recommended_settings(cores, memory, configuration_cache=True):
+    # Of what the build may use: two fifths for the Gradle heap (where R8 and dexing
+    # run) plus a quarter of that for its metaspace, a fifth for the Kotlin daemon and
+    # the rest for the workers
+    if memory < minimum_memory:
+        raise ValueError(f"{memory} MB is below the {minimum_memory} MB a Flutter release build needs"
+                         f" ({reserved_memory} MB reserved, {minimum_jvm_memory} MB for each daemon heap and the"
+                         f" metaspace, {worker_memory} MB for one worker)")
+    available = memory - reserved_memory
+    gradle_heap = _clamp(_round_down(available * 2 // 5), 1024, 8192)
+    metaspace = _clamp(_round_down(gradle_heap // 4, 128), 256, 1024)
+    kotlin_heap = _clamp(_round_down(available // 5), 512, 4096)
+    daemons = gradle_heap + metaspace + kotlin_heap
+    budget = available - worker_memory
+    if daemons > budget:
+        # Short of memory, the floors do not fit next to one worker: each of the three
+        # keeps its minimum and gets the same share of its part above it, rounded down,
+        # so that the three together never exceed what is left for them
+        extra = budget - 3 * minimum_jvm_memory
+        above = daemons - 3 * minimum_jvm_memory
+        gradle_heap, metaspace, kotlin_heap = (
+            minimum_jvm_memory + _round_down((size - minimum_jvm_memory) * extra // above, 128)
+            for size in (gradle_heap, metaspace, kotlin_heap))
+    workers = _clamp((available - gradle_heap - metaspace - kotlin_heap) // worker_memory, 1, cores)
+    return {
+        "org.gradle.jvmargs": {"-Xmx": f"{gradle_heap}m", "-XX:MaxMetaspaceSize=": f"{metaspace}m"},
+        "kotlin.daemon.jvmargs": {"-Xmx": f"{kotlin_heap}m"},
+        "org.gradle.workers.max": str(workers),
+        "org.gradle.parallel": "true" if cores > 1 else "false",
+        "org.gradle.caching": "true",
+        "org.gradle.configuration-cache": "true" if configuration_cache else "false",
+        # Plugins that are not compatible yet should not fail the build
+        "org.gradle.configuration-cache.problems": "warn",
+    }
+
+
+def merge_jvm_args(current, options):
+    # Replaces the given options (prefix -> value) in a JVM argument string, keeps the rest
+    arguments = (current or "").split()
+    for prefix, value in options.items():
+        for index, argument in enumerate(arguments):
+            if argument.startswith(prefix):
+                arguments[index] = prefix + value
+                break
+        else:
+            arguments.append(prefix + value)
+    return " ".join(arguments)
+
+
+def tune(properties, cores, memory, configuration_cache=True):
+    # Applies the recommended settings; returns [(key, old value, new value)] of the changes
+    changes = []
+    for key, value in recommended_settings(cores, memory, configuration_cache).items():
+        old = properties.get(key)
+        if isinstance(value, dict):
+            value = merge_jvm_args(old, value)
+        if properties.set(key, value):
+            changes.append((key, old, value))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Edit and tune gradle.properties for the build machine.")
+    parser.add_argument("--file", default=gradle_properties_file_path, help="gradle.properties to edit")
+    parser.add_argument("--profile", choices=sorted(runner_profiles), help="size for this runner instead of this machine")
+    parser.add_argument("--cores", type=int, help="number of cores to size for")
+    parser.add_argument("--memory", type=int, help="memory to size for, in MB")
+    parser.add_argument("--no-configuration-cache", action="store_true", help="leave the configuration cache off")
+    parser.add_argument("--no-tune", action="store_true", help="only apply --set / --remove")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="set a property")
+    parser.add_argument("--remove", action="append", default=[], metavar="KEY", help="remove a property")
+    parser.add_argument("--dry-run", action="store_true", help="print the result instead of writing it")
+    args = parser.parse_args(argv)
+
+    properties = GradleProperties.load(args.file)
+    changes = []
+
+    if not args.no_tune:
+        cores, memory = runner_profiles[args.profile] if args.profile else detect_resources()
+        cores = args.cores or cores
+        memory = args.memory or memory
+        print(f"Sizing for {cores} core(s) and {memory} MB of memory.")
+        try:
+            changes.extend(tune(properties, cores, memory, not args.no_configuration_cache))
+        except ValueError as e:
+            print(f"Error: {e}.")
+            return 1
+
+    for assignment in args.set:
+        key, separator, value = assignment.partition("=")
+        if not separator:
+            parser.error(f"--set expects KEY=VALUE, got '{assignment}'.")
+        old = properties.get(key.strip())
+        if properties.set(key.strip(), value.strip()):
+            changes.append((key.strip(), old, value.strip()))
+    for key in args.remove:
+        old = properties.get(key)
+        if properties.remove(key):
+            changes.append((key, old, None))
+
+    for key, old, new in changes:
+        print(f"  {key}: {old if old is not None else '(unset)'} -> {new if new is not None else '(removed)'}")
+
+    if args.dry_run:
+        print(properties.render(), end="")
+    elif changes:
+        write_file(args.file, properties.render())
+        print(f"Updated {len(changes)} propert{'y' if len(changes) == 1 else 'ies'} in {args.file}.")
+    else:
+        print(f"{args.file} is already tuned.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+# Python script to hash the inputs of every step of .github/workflows/android_build.yml,
+# so a step whose inputs did not change since its last successful run can be skipped.
+#
+# Every step gets an input set: declared (declared_inputs, or --inputs FILE), or inferred
+# from its working directory and command ("flutter pub run build_runner" reads lib/**,
+# test/**, pubspec.* and build.yaml of its directory, "flutter build apk" also android/**,
+# an unknown command everything below its directory, plus any path named in it).
+# The files of all input sets are hashed into a Merkle tree: a file node is the sha256 of
+# its content, a directory node the sha256 of its children's names and hashes. The
+# digest of a step combines the nodes of its inputs (a "lib/**" input is one directory
+# node) with its command and env, and with the "uses:" / "with:" / "env:" of the action
+# steps before it in its job (the Flutter and Java versions they pin), so it changes
+# exactly when something the step reads or runs with changes.
+#
+# File digests are cached in .dashboard_ci/file_digests.json, keyed on the path and
+# (mtime, inode, size): an unchanged file is never read again. Files that need hashing
+# are hashed in parallel.
+#
+# Outputs:
+#   - a manifest (.dashboard_ci/merkle_manifest.json): the root hash and, per step, its
+#     inputs and digest; --since OLD_MANIFEST lists which steps must run again;
+#   - --github-output: "<step>=<digest>" lines for $GITHUB_OUTPUT, to build cache keys;
+#   - --guard STEP: rewrites the workflow so STEP only runs when no earlier successful
+#     run had the same digest (an actions/cache restore of a marker keyed on the digest
+#     before it, the marker saved after it). The digest is computed by a hash step right
+#     before the guard, so the files earlier steps write (the keystore and key.properties
+#     decoded from secrets, generated code) are hashed as they are when STEP would run.
+#     A skipped step must leave behind what it
+#     would have made, so its outputs (declared_outputs or --outputs FILE, or inferred:
+#     "flutter build" -> build/app/outputs/, build_runner -> lib/**/*.g.dart) are cached
+#     with the marker and restored instead; a step whose outputs are unknown (pub get,
+#     gradle, an unknown command) is not guarded.
+#
+# Usage:
+#   python merkle_inputs.py [--since previous_manifest.json] [--jobs 8]
+#   python merkle_inputs.py --github-output --markers      (in the workflow)
+#   python merkle_inputs.py --guard "Generate files" [--outputs outputs.json]
+
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+
+from dedupe_workflow_steps import read_steps, step_fields
+from transaction import write_file
+from trigger_filters import matches_any
+from workflow_document import WorkflowDocument, reindent
+
+workflow_file_path = ".github/workflows/android_build.yml"
+digest_cache_path = ".dashboard_ci/file_digests.json"
+manifest_path = ".dashboard_ci/merkle_manifest.json"
+marker_directory = ".dashboard_ci/done"
+
+# Step name -> input patterns relative to the repository root; overrides the inference
+declared_inputs = {}
+
+# Step name -> output paths relative to the repository root ([] for none); overrides the
+# inference
+declared_outputs = {}
+
+# Command class (see dedupe_workflow_steps) -> inputs relative to the step's directory
+inferred_inputs = {
+    "pub-get": ["pubspec.yaml", "pubspec.lock"],
+    "pub-upgrade": ["pubspec.yaml", "pubspec.lock"],
+    "build-runner": ["lib/**", "test/**", "pubspec.yaml", "pubspec.lock", "build.yaml"],
+    "flutter-build": ["lib/**", "android/**", "assets/**", "pubspec.yaml", "pubspec.lock"],
+    "flutter-test": ["lib/**", "test/**", "integration_test/**", "pubspec.yaml", "pubspec.lock"],
+    "gradle-build": ["**"],
+    "gradle-clean": ["**"],
+    "gradle-wrapper": ["gradle/wrapper/**"],
+}
+
+# Command class -> outputs relative to the step's directory; the other classes write
+# outside of the checkout (the pub cache, ~/.gradle) or anywhere: their outputs are unknown
+inferred_outputs = {
+    "build-runner": ["lib/**/*.g.dart"],
+    "flutter-build": ["build/app/outputs/"],
+    "flutter-test": [],
+}
+
+_skipped_directories = {".git", ".dart_tool", "build", "__pycache__", ".gradle", ".idea", ".dashboard_ci"}
+_path_token_pattern = re.compile(r"(?:\.{0,2}/)?[\w.-]+(?:/[\w.-]+)*\.\w+")
+
+# setup: "uses:" / "with:" / "env:" of the earlier action steps of the job; outputs:
+# paths for actions/cache, None when unknown
+StepInputs = collections.namedtuple("StepInputs", ["label", "slug", "patterns", "command", "setup", "outputs"])
+
+
+def slug(label):
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_") or "step"
+
+
+# --- Input sets ------------------------------------------------------------------------
+
+def _join(directory, pattern):
+    return pattern if directory in (".", "") else posixpath.join(directory, pattern)
+
+
+def step_inputs(workflow_lines, root=".", declared=None, outputs=None):
+    # [StepInputs] for the run steps whose inputs are known; setup/action steps are left out
+    declared = dict(declared_inputs, **(declared or {}))
+    outputs = dict(declared_outputs, **(outputs or {}))
+    steps = []
+    used_slugs = collections.Counter()
+    for job, job_steps in read_steps(workflow_lines).items():
+        setup = ""
+        for step in job_steps:
+            if step.command_class == "action":
+                # The toolchain it sets up ("flutter-version: 3.22.2") is part of what
+                # every later step runs with
+                fields = step_fields(workflow_lines, step.span)
+                setup += "".join(f"{key}: {' '.join(fields[key])}\n" for key in ("uses", "with", "env") if key in fields)
+                continue
+            if step.command_class == "inspect" or "merkle_inputs.py" in " ".join(step.command):
+                # The hash steps of the guards hash the others
+                continue
+            label = step.name
+            command_class = step.command_class
+            if command_class == "other" and step.command and step.command[0].startswith("flutter test"):
+                command_class = "flutter-test"
+            if label in outputs:
+                step_outputs = list(outputs[label])
+            elif command_class in inferred_outputs:
+                step_outputs = [_join(step.directory, path) for path in inferred_outputs[command_class]]
+            else:
+                step_outputs = None
+            if label in declared:
+                patterns = list(declared[label])
+            else:
+                relative = inferred_inputs.get(command_class, ["**"])
+                patterns = [_join(step.directory, pattern) for pattern in relative]
+                # Files the command names ("python patch.py", "cp a/b.json ...")
+                for token in _path_token_pattern.findall(" ".join(step.command)):
+                    path = posixpath.normpath(_join(step.directory, token))
+                    if not path.startswith("..") and os.path.isfile(os.path.join(root, path)):
+                        patterns.append(path)
+            used_slugs[slug(label)] += 1
+            step_slug = slug(label) if used_slugs[slug(label)] == 1 else f"{slug(label)}_{used_slugs[slug(label)]}"
+            environment = "".join(f"{key}={value}\n" for key, value in step.env)
+            steps.append(StepInputs(label, step_slug, sorted(set(patterns)), "\n".join(step.command) + "\n" + environment,
+                                    setup, step_outputs))
+    return steps
+
+
+def _pattern_base(pattern):
+    # The directory part of a pattern before its first wildcard
+    parts = []
+    for part in pattern.split("/"):
+        if any(char in part for char in "*?["):
+            break
+        parts.append(part)
+    if len(parts) == len(pattern.split("/")):
+        return posixpath.dirname(pattern) or "."
+    return "/".join(parts) or "."
+
+
+def matching_files(patterns, root="."):
+    files = set()
+    for base in sorted({_pattern_base(pattern) for pattern in patterns}):
+        base_path = os.path.join(root, base)
+        if os.path.isfile(base_path):
+            candidates = [base]
+        elif os.path.isdir(base_path):
+            candidates = []
+            for directory, directories, names in os.walk(base_path):
+                directories[:] = [name for name in directories if name not in _skipped_directories]
+                for name in names:
+                    candidates.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+        else:
+            continue
+        files.update(path for path in candidates if matches_any(path, patterns))
+    return sorted(files)
+
+
+# --- File digests ----------------------------------------------------------------------
+
+class DigestCache:
+    def __init__(self, path=digest_cache_path):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def _key(stat):
+        return [stat.st_mtime_ns, stat.st_ino, stat.st_size]
+
+    def lookup(self, relative_path, stat):
+        entry = self.entries.get(relative_path)
+        if entry is not None and entry[:3] == self._key(stat):
+            return entry[3]
+        return None
+
+    def store(self, relative_path, stat, digest):
+        self.entries[relative_path] = self._key(stat) + [digest]
+
+    def save(self, keep=None):
+        if keep is not None:
+            self.entries = {path: entry for path, entry in self.entries.items() if path in keep}
+        write_file(self.path, json.dumps(self.entries, sort_keys=True))
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digests(paths, root=".", cache=None, jobs=None):
+    # {path: sha256}; cached digests are reused, the others computed in parallel
+    # (hashlib releases the GIL while it hashes, so threads use several cores)
+    cache = cache or DigestCache(os.path.join(root, digest_cache_path))
+    digests = {}
+    pending = []
+    for path in paths:
+        stat = os.stat(os.path.join(root, path))
+        digest = cache.lookup(path, stat)
+        if digest is None:
+            pending.append((path, stat))
+        else:
+            digests[path] = digest
+    cache.hits += len(digests)
+    cache.misses += len(pending)
+    if pending:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 2)) as executor:
+            results = executor.map(lambda item: _hash_file(os.path.join(root, item[0])), pending)
+            for (path, stat), digest in zip(pending, results):
+                digests[path] = digest
+                cache.store(path, stat, digest)
+    return digests
+
+
+# --- Merkle tree -----------------------------------------------------------------------
+
+def merkle_nodes(digests):
+    # {path: hash} for every file and every directory above one ("." is the root)
+    children = collections.defaultdict(dict)
+    for path, digest in digests.items():
+        parent = posixpath.dirname(path) or "."
+        children[parent][posixpath.basename(path)] = ("file", digest)
+        while parent != ".":
+            grandparent = posixpath.dirname(parent) or "."
+            children[grandparent].setdefault(posixpath.basename(parent), ("tree", None))
+            parent = grandparent
+
+    nodes = dict(digests)
+
+    def node(directory):
+        entries = []
+        for name, (kind, digest) in sorted(children[directory].items()):
+            if kind == "tree":
+                digest = node(name if directory == "." else f"{directory}/{name}")
+            entries.append(f"{kind} {name} {digest}\n")
+        nodes[directory] = hashlib.sha256("".join(entries).encode("utf-8")).hexdigest()
+        return nodes[directory]
+
+    node(".")
+    return nodes
+
+
+def step_digest(step, files, nodes):
+    # A "<dir>/**" input is the node of <dir>; other inputs the files they match
+    digest = hashlib.sha256(step.command.encode("utf-8"))
+    digest.update(step.setup.encode("utf-8"))
+    for pattern in step.patterns:
+        if pattern.endswith("/**") and "*" not in pattern[:-3]:
+            directory = pattern[:-3]
+            digest.update(f"{pattern} {nodes.get(directory, '-')}\n".encode("utf-8"))
+        elif pattern == "**":
+            digest.update(f"{pattern} {nodes.get('.', '-')}\n".encode("utf-8"))
+        else:
+            for path in files:
+                if matches_any(path, [pattern]):
+                    digest.update(f"{path} {nodes[path]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_manifest(workflow_lines, root=".", declared=None, jobs=None, cache=None):
+    steps = step_inputs(workflow_lines, root, declared)
+    files = matching_files([pattern for step in steps for pattern in step.patterns], root)
+    cache = cache or DigestCache(os.path.join(root, digest_cache_path))
+    digests = file_digests(files, root, cache, jobs)
+    nodes = merkle_nodes(digests)
+    manifest = {
+        "root": nodes["."],
+        "files": len(files),
+        "steps": collections.OrderedDict(
+            (step.label, {"id": step.slug, "inputs": step.patterns, "digest": step_digest(step, files, nodes)})
+            for step in steps),
+    }
+    return manifest, cache, set(files)
+
+
+def changed_steps(manifest, previous):
+    # Labels of the steps whose digest differs from (or is missing in) the previous manifest
+    before = previous.get("steps", {})
+    return [label for label, entry in manifest["steps"].items()
+            if before.get(label, {}).get("digest") != entry["digest"]]
+
+
+# --- Workflow guards -------------------------------------------------------------------
+
+def _guard_steps(label, step_slug, outputs):
+    # The marker and the outputs share one cache entry: a hit restores what the skipped
+    # step would have made. Without outputs, a lookup is enough.
+    key = f"done-{step_slug}-${{{{ steps.merkle_{step_slug}.outputs.{step_slug} }}}}"
+    hashing = (f"- name: Hash inputs of {label}\n"
+               f"  id: merkle_{step_slug}\n"
+               f"  run: python3 merkle_inputs.py --github-output --markers\n")
+    paths = "".join(f"      {path}\n" for path in [f"{marker_directory}/{step_slug}"] + outputs)
+    check = (f"- name: Check inputs of {label}\n"
+             f"  id: done_{step_slug}\n"
+             f"  uses: actions/cache/restore@v4\n"
+             f"  with:\n"
+             f"    path: |\n{paths}"
+             f"    key: {key}\n"
+             + ("" if outputs else "    lookup-only: true\n"))
+    record = (f"- name: Record inputs of {label}\n"
+              f"  if: steps.done_{step_slug}.outputs.cache-hit != 'true'\n"
+              f"  uses: actions/cache/save@v4\n"
+              f"  with:\n"
+              f"    path: |\n{paths}"
+              f"    key: {key}\n")
+    return hashing, check, record
+
+
+def add_step_guards(lines, labels, root=".", outputs=None):
+    document = WorkflowDocument.from_lines(lines)
+    steps = {step.label: step for step in step_inputs(lines, root, outputs=outputs)}
+    missing = [label for label in labels if label not in steps or not document.has_step(label)]
+    if missing:
+        print(f"Warning: no hashable step named {', '.join(repr(label) for label in missing)}.")
+    # Skipping a step whose outputs are unknown could leave a later step without them
+    # (no APK for the upload after "flutter build apk")
+    unknown = [label for label in labels if label not in missing and steps[label].outputs is None]
+    if unknown:
+        print(f"Warning: the outputs of {', '.join(repr(label) for label in unknown)} are unknown"
+              f" (declare them with --outputs). Not guarded.")
+    labels = [label for label in labels if label not in missing and label not in unknown]
+    if not labels:
+        return lines
+
+    for label in labels:
+        if document.has_step(f"Check inputs of {label}"):
+            continue
+        span = document.find_step(label)
+        # The hash step runs merkle_inputs.py from the checkout
+        checkout = next((other for other in document.steps(span.job) if other.start < span.start
+                         and "actions/checkout@" in "".join(lines[other.start:other.end])), None)
+        if checkout is None:
+            print(f"Warning: no checkout step before '{label}' to hash its inputs after. Not guarded.")
+            continue
+        step = steps[label]
+        hashing, check, record = _guard_steps(label, step.slug, step.outputs)
+        condition = f"steps.done_{step.slug}.outputs.cache-hit != 'true'"
+        step_lines = lines[span.start:span.end]
+        key_indent = span.indent + 2
+        guarded = []
+        replaced = False
+        for line in step_lines:
+            stripped = line.strip()
+            if stripped.startswith("if:") and len(line) - len(line.lstrip()) == key_indent and not replaced:
+                guarded.append(f"{' ' * key_indent}if: ({stripped[3:].strip()}) && {condition}\n")
+                replaced = True
+            else:
+                guarded.append(line)
+        if not replaced:
+            guarded.insert(1, f"{' ' * key_indent}if: {condition}\n")
+        document.replace_lines(span.start, span.end, reindent(hashing, span.indent) + ["\n"]
+                               + reindent(check, span.indent) + ["\n"] + guarded
+                               + ["\n"] + reindent(record, span.indent))
+    return document.lines() if document.is_modified() else lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merkle-hash the inputs of every workflow step.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow whose steps are hashed")
+    parser.add_argument("--root", default=".", help="repository root")
+    parser.add_argument("--inputs", metavar="PATH", help="JSON: step name -> input patterns (overrides the inference)")
+    parser.add_argument("--jobs", type=int, help="hashing threads")
+    parser.add_argument("--manifest", default=manifest_path, help="where to write the manifest")
+    parser.add_argument("--since", metavar="PATH", help="previous manifest: list the steps that must run again")
+    parser.add_argument("--github-output", action="store_true", help="append '<step>=<digest>' to $GITHUB_OUTPUT")
+    parser.add_argument("--markers", action="store_true", help="create the marker files the guards cache")
+    parser.add_argument("--guard", action="append", default=[], metavar="STEP", help="add a skip guard to this step")
+    parser.add_argument("--outputs", metavar="PATH",
+                        help="JSON: step name -> output paths cached with its guard (overrides the inference)")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+
+    if args.guard:
+        outputs = None
+        if args.outputs:
+            with open(args.outputs, "r") as f:
+                outputs = json.load(f)
+        new_lines = add_step_guards(lines, args.guard, args.root, outputs)
+        if new_lines is not lines:
+            write_file(args.file, "".join(new_lines))
+            print(f"Added skip guards to {args.file}.")
+        else:
+            print(f"No guards added to {args.file}.")
+        return 0
+
+    declared = None
+    if args.inputs:
+        with open(args.inputs, "r") as f:
+            declared = json.load(f)
+    manifest, cache, files = build_manifest(lines, args.root, declared, args.jobs)
+    cache.save(keep=files)
+    write_file(os.path.join(args.root, args.manifest), json.dumps(manifest, indent=2) + "\n")
+
+    print(f"Hashed {manifest['files']} input file(s) ({cache.hits} cached, {cache.misses} read),"
+          f" root {manifest['root'][:12]}.")
+    for label, entry in manifest["steps"].items():
+        print(f"  {entry['digest'][:12]}  {label}  ({', '.join(entry['inputs'])})")
+
+    if args.since:
+        with open(args.since, "r") as f:
+            previous = json.load(f)
+        changed = changed_steps(manifest, previous)
+        for label in manifest["steps"]:
+            print(f"  {'run ' if label in changed else 'skip'}  {label}")
+
+    if args.github_output:
+        output_path = os.environ.get("GITHUB_OUTPUT")
+        if not output_path:
+            print("GITHUB_OUTPUT is not set.")
+            return 1
+        with open(output_path, "a") as f:
+            for entry in manifest["steps"].values():
+                f.write(f"{entry['id']}={entry['digest']}\n")
+    if args.markers:
+        for entry in manifest["steps"].values():
+            directory = os.path.join(args.root, marker_directory, entry["id"])
+            os.makedirs(directory, exist_ok=True)
+            write_file(os.path.join(directory, "digest"), entry["digest"] + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,19 @@
 # Python script to modify the build.gradle.kts content
+import argparse
 import os
+import sys
+
+from edit_buffer import EditBuffer
+from gradle_block_tree import GradleBlockTree
+from transform_cache import describe_status, run_cached
 
 # Path to the build.gradle.kts file
 gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
 
-# Read the original content
-with open(gradle_file_path, "r") as f:
-    original_content = f.read()
-
-new_content = original_content
+# Bump when the output of modify_gradle() changes, so cached results are not reused
+transform_version = 1
 
-# 1. Add keystore properties loading at the top
+# 1. Keystore properties loading, added at the top
 keystore_properties_load = '''\
 val keystorePropertiesFile = rootProject.file("keystore.properties")
 val keystoreProperties = java.util.Properties()
@@ -19,18 +22,9 @@ if (keystorePropertiesFile.exists()) {
 }
 
 '''
-if "val keystorePropertiesFile" not in new_content:
-    new_content = keystore_properties_load + new_content
 
-# 2. Add signingConfigs block inside android { ... }
-# Find the end of the defaultConfig block to insert signingConfigs before buildTypes
-default_config_end_marker = "multiDexEnabled = true" # Assuming this is the last line of defaultConfig
-default_config_index = new_content.find(default_config_end_marker)
-
-if default_config_index != -1:
-    insertion_point_for_signing_config = new_content.find("}", default_config_index) + 1
-    if new_content.find("signingConfigs", insertion_point_for_signing_config, new_content.find("buildTypes")) == -1: # check if not already present
-        signing_config_block = '''\
+# 2. signingConfigs block, added inside android { ... } right after defaultConfig { ... }
+signing_config_block = '''\
 
     signingConfigs {
         create("release") {
@@ -41,47 +35,54 @@ if default_config_index != -1:
         }
     }
 '''
-        new_content = new_content[:insertion_point_for_signing_config] + signing_config_block + new_content[insertion_point_for_signing_config:]
 
-# 3. Modify release build type
-release_build_type_marker = "buildTypes {"
-release_build_type_start_index = new_content.find(release_build_type_marker)
+# 3. Release build type: debug signing replaced with release signing
+signing_config_debug_line = 'signingConfig = signingConfigs.getByName("debug")'
+new_release_signing_line = 'signingConfig = signingConfigs.getByName("release")'
+# Also ensure ProGuard/R8 settings are present for release builds, as they are good practice.
+proguard_lines = '''\
+isMinifyEnabled = false // Or true if you want to enable it
+// proguardFiles(getDefaultProguardFile("proguard-android-optimize.txt"), "proguard-rules.pro") // Uncomment if you have a proguard-rules.pro
+'''
+
+
+def modify_gradle(original_content):
+    tree = GradleBlockTree(original_content)
+    # Every edit is recorded against the offsets of the original content and merged once
+    buffer = EditBuffer(original_content)
+
+    if "val keystorePropertiesFile" not in original_content:
+        buffer.insert(0, keystore_properties_load)
+
+    default_config = tree.find("android.defaultConfig")
+    if default_config is not None and tree.find("android.signingConfigs") is None:
+        insertion_point = tree.line_end(default_config.close_offset)
+        buffer.insert(insertion_point, signing_config_block)
 
-if release_build_type_start_index != -1:
-    release_block_start = new_content.find("release {", release_build_type_start_index)
-    if release_block_start != -1:
-        signing_config_debug_line = 'signingConfig = signingConfigs.getByName("debug")'
-        debug_line_index = new_content.find(signing_config_debug_line, release_block_start)
+    release = tree.find("android.buildTypes.release")
+    if release is not None:
+        debug_line_index = tree.find_code(signing_config_debug_line, release.body_start, release.body_end)
         if debug_line_index != -1:
-            # Replace the debug signing line with the release signing line
-            new_release_signing_line = 'signingConfig = signingConfigs.getByName("release")'
-            # Also ensure ProGuard/R8 settings are present for release builds, as they are good practice.
-            # This is a common place to put them.
-            proguard_lines = '''\
-            isMinifyEnabled = false // Or true if you want to enable it
-            // proguardFiles(getDefaultProguardFile("proguard-android-optimize.txt"), "proguard-rules.pro") // Uncomment if you have a proguard-rules.pro
-'''
-            # Remove existing signingConfig line and potentially comments around it
-            # Find the start of the line for signingConfig = signingConfigs.getByName("debug")
-            line_start = new_content.rfind("\n", 0, debug_line_index) + 1
-            # Find the end of the line
-            line_end = new_content.find("\n", debug_line_index)
-
-            # Remove comments TODO and Signing with the debug keys...
-            comment_todo_line_start = new_content.rfind("\n// TODO: Add your own signing config", 0, line_start)
-            if comment_todo_line_start == -1: # If it's at the very start of the block
-                 comment_todo_line_start = new_content.rfind("{", 0, line_start) +1
-
-            comment_signing_debug_line_start = new_content.rfind("\n            // Signing with the debug keys", 0, line_start)
-
-            if comment_todo_line_start != -1 and comment_signing_debug_line_start != -1 and comment_signing_debug_line_start > comment_todo_line_start :
-                 # We want to remove from the start of "// TODO:" up to the end of the signingConfig line
-                 block_to_replace = new_content[comment_todo_line_start:line_end]
-                 replacement_block = "\n            " + new_release_signing_line + "\n" + proguard_lines
-                 new_content = new_content.replace(block_to_replace, replacement_block, 1)
-
-# Write the modified content back to the file
-with open(gradle_file_path, "w") as f:
-    f.write(new_content)
-
-print(f"Successfully modified {gradle_file_path} for release signing.")
+            # Replace everything from the start of the release body up to the end of the
+            # debug signing line, which drops the template's "TODO" / "Signing with the
+            # debug keys" comments that sit above it.
+            indent = original_content[tree.line_start(debug_line_index):debug_line_index]
+            replacement = "\n" + indent + new_release_signing_line + "\n"
+            replacement += "".join(indent + line for line in proguard_lines.splitlines(True))
+            buffer.replace_range(release.body_start, tree.line_end(debug_line_index), replacement)
+
+    return buffer.render()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modify build.gradle.kts.")
+    parser.parse_args(argv)
+
+    status, output_hash = run_cached(gradle_file_path, "modify_gradle", transform_version, modify_gradle, idempotent=True)
+
+    print(f"Successfully modified {gradle_file_path} for release signing: {describe_status(status)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,11 @@
 # Python script to modify the .github/workflows/android_build.yml content
+import argparse
 import os
+import sys
 
-workflow_file_path = ".github/workflows/android_build.yml"
-
-with open(workflow_file_path, "r") as f:
-    workflow_content_lines = f.readlines()
+from transaction import write_file
 
-new_workflow_content_lines = []
-build_apk_step_found = False
-secrets_step_added = False
+workflow_file_path = ".github/workflows/android_build.yml"
 
 # Note: The indentation here is crucial for correct YAML output.
 # Each line of the YAML step starts with 8 spaces, then the content.
@@ -40,23 +37,44 @@ new_steps_yaml = '''      - name: Create keystore.properties
 
 '''
 
-for line_content in workflow_content_lines:
-    if "name: Build Android APK (Release)" in line_content and not secrets_step_added:
-        build_apk_step_found = True
-        # Correctly indent the new_steps_yaml block before adding it
-        # The steps are typically indented by 6 spaces for the '-'
-        # but since the text block already starts with '      - name:',
-        # we add it directly.
-        new_workflow_content_lines.append(new_steps_yaml)
-        secrets_step_added = True
-    new_workflow_content_lines.append(line_content)
-
-if build_apk_step_found and secrets_step_added:
-    with open(workflow_file_path, "w") as f:
-        f.writelines(new_workflow_content_lines)
-    print(f"Successfully modified {workflow_file_path} to include keystore creation steps.")
-else:
-    print(f"Could not find the 'Build Android APK (Release)' step in {workflow_file_path}, or secrets_step_added was false.")
-    # Consider exiting with an error if this is critical
-    # import sys
-    # sys.exit(1)
+
+def modify_workflow(workflow_content_lines):
+    new_workflow_content_lines = []
+    secrets_step_added = False
+
+    for line_content in workflow_content_lines:
+        if "name: Build Android APK (Release)" in line_content and not secrets_step_added:
+            # Correctly indent the new_steps_yaml block before adding it
+            # The steps are typically indented by 6 spaces for the '-'
+            # but since the text block already starts with '      - name:',
+            # we add it directly.
+            new_workflow_content_lines.extend(new_steps_yaml.splitlines(True))
+            secrets_step_added = True
+        new_workflow_content_lines.append(line_content)
+
+    if not secrets_step_added:
+        # Leave the document untouched if the build step is missing
+        return workflow_content_lines
+    return new_workflow_content_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite the keystore and release build steps.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        workflow_content_lines = f.readlines()
+
+    new_workflow_content_lines = modify_workflow(workflow_content_lines)
+
+    if new_workflow_content_lines is not workflow_content_lines:
+        write_file(workflow_file_path, "".join(new_workflow_content_lines))
+        print(f"Successfully modified {workflow_file_path} to include keystore creation steps.")
+    else:
+        print(f"Could not find the 'Build Android APK (Release)' step in {workflow_file_path}, or secrets_step_added was false.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,14 @@
 # 2. Re-add 'Regenerate Android project' step.
 # 3. Add a new step to 'Patch build.gradle.kts after flutter create'.
 
+import argparse
 import os
+import sys
 
-workflow_file_path = ".github/workflows/android_build.yml"
-
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
+from transaction import write_file
+from workflow_document import WorkflowDocument
 
-new_lines = []
-processing_step_to_remove = None # Can be 'list_files'
+workflow_file_path = ".github/workflows/android_build.yml"
 
 # Lines for the 'Regenerate Android project' step
 regenerate_step_yaml = '''      - name: Regenerate Android project
@@ -54,7 +53,7 @@ patch_gradle_step_yaml = '''      - name: Patch build.gradle.kts after flutter c
           # Filter out old keystore logic and the import (will re-add import cleanly)
           filtered_lines = []
           skip_old_keystore_block = False
-          for line in original_lines:
+          for line_idx, line in enumerate(original_lines):
               stripped_line = line.strip()
               if stripped_line == "import java.util.Properties":
                   continue # Skip, will re-add cleanly
@@ -64,7 +63,7 @@ patch_gradle_step_yaml = '''      - name: Patch build.gradle.kts after flutter c
               if skip_old_keystore_block:
                   if "keystoreProperties.load(it)" in stripped_line and "}" in stripped_line : # common end
                       skip_old_keystore_block = False
-                  elif stripped_line == "}" and "keystoreProperties.load(it)" in original_lines[original_lines.index(line)-1]: # if } is on next line
+                  elif stripped_line == "}" and "keystoreProperties.load(it)" in original_lines[line_idx-1]: # if } is on next line
                       skip_old_keystore_block = False
                   continue # Continue skipping
 
@@ -119,48 +118,46 @@ patch_gradle_step_yaml = '''      - name: Patch build.gradle.kts after flutter c
 # Then, when it finds the 'Set Gradle version' step, it will insert
 # the 'Regenerate Android project' and 'Patch build.gradle.kts' steps before it.
 
-temp_new_lines = []
-# Phase 1: Remove 'List files in android directory'
-step_to_remove_name = "- name: List files in android directory"
-in_step_to_remove = False
-for line in lines:
-    stripped_line = line.lstrip()
-    if stripped_line.startswith(step_to_remove_name):
-        in_step_to_remove = True
-        continue # Skip this line
-
-    if in_step_to_remove:
-        if stripped_line.startswith("- name:"): # Next step starts
-            in_step_to_remove = False
-            temp_new_lines.append(line) # Add this new step line
-        else: # Line is part of the step to remove
-            continue
+def _rebuild_workflow_lines(lines):
+    document = WorkflowDocument.from_lines(lines)
+
+    # Phase 1: Remove 'List files in android directory'
+    for span in document.find_steps("List files in android directory"):
+        document.remove_span(span)
+
+    # Phase 2: Insert 'Regenerate...' and 'Patch...' before 'Set Gradle version'
+    if not document.has_step("Set Gradle version"):
+        # Fallback to avoid breaking file if insertion point not found
+        return document.lines(), False
+
+    document.insert_before("Set Gradle version", regenerate_step_yaml + "\n" + patch_gradle_step_yaml + "\n")
+    return document.lines(), True
+
+
+def modify_workflow_final_plus_patch(lines):
+    new_lines, inserted_new_steps = _rebuild_workflow_lines(lines)
+    return new_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replace the listing step with the build.gradle.kts patch step.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines, inserted_new_steps = _rebuild_workflow_lines(lines)
+
+    if not inserted_new_steps:
+        print("Warning: Target 'Set Gradle version' step not found. New steps not added as intended.")
+        # Fallback to avoid breaking file if insertion point not found
+        write_file(workflow_file_path, "".join(new_lines))
+        print(f"Original content of {workflow_file_path} (with list step removed) written due to insertion error.")
     else:
-        temp_new_lines.append(line)
-
-lines = temp_new_lines # Update lines with the removal
-new_lines = [] # Reset for insertion phase
-
-# Phase 2: Insert 'Regenerate...' and 'Patch...' before 'Set Gradle version'
-set_gradle_version_step_name = "- name: Set Gradle version"
-inserted_new_steps = False
-for line_content in lines:
-    if line_content.lstrip().startswith(set_gradle_version_step_name) and not inserted_new_steps:
-        new_lines.extend(regenerate_step_yaml.splitlines(True))
-        new_lines.append("\n") # Ensure a blank line
-        new_lines.extend(patch_gradle_step_yaml.splitlines(True))
-        new_lines.append("\n") # Ensure a blank line
-        inserted_new_steps = True
-
-    new_lines.append(line_content)
-
-if not inserted_new_steps:
-    print("Warning: Target 'Set Gradle version' step not found. New steps not added as intended.")
-    # Fallback to avoid breaking file if insertion point not found
-    with open(workflow_file_path, "w") as f:
-        f.writelines(lines)
-    print(f"Original content of {workflow_file_path} (with list step removed) written due to insertion error.")
-else:
-    with open(workflow_file_path, "w") as f:
-        f.writelines(new_lines)
-    print(f"Modified {workflow_file_path}: Removed listing step, re-added Regenerate project, and added Patch step.")
+        write_file(workflow_file_path, "".join(new_lines))
+        print(f"Modified {workflow_file_path}: Removed listing step, re-added Regenerate project, and added Patch step.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# Python module to apply a table of literal rewrite rules to a text in a single scan.
+#
+# A rule is (pattern, replacement, scope): pattern and replacement are literal strings,
+# scope is an optional Gradle block path ("android.buildTypes.release") the match must
+# fall in. All patterns are compiled into ONE regular expression shaped like a trie
+# (common prefixes are shared: "namespace = " and "name" become "name(?:space = )?"), so
+# at each position of the text the regex engine follows at most one branch per
+# character. The cost of a scan is linear in the size of the text and does not grow with
+# the number of rules, unlike one str.replace (or one "in" test per line) per rule.
+#
+# The longest pattern matching at a position wins; among rules with the same pattern
+# the first one (in table order) whose scope contains the match is applied. A match that
+# no rule may rewrite there is left as it is.
+
+import bisect
+import collections
+import re
+
+from gradle_block_tree import GradleBlockTree
+
+Rule = collections.namedtuple("Rule", ["pattern", "replacement", "scope"])
+Rule.__new__.__defaults__ = (None,)
+
+
+def _trie_regex(patterns):
+    # Builds a regex matching any of the patterns, longest first, from a character trie
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = True     # end of a pattern
+
+    def to_regex(node):
+        terminal = "" in node
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: the longer pattern is tried before the one ending here
+        return body + "?" if terminal else body
+
+    return to_regex(trie)
+
+
+class MultiPatternRewriter:
+    def __init__(self, rules):
+        self.rules = [rule if isinstance(rule, Rule) else Rule(*rule) for rule in rules]
+        self.rules_by_pattern = collections.OrderedDict()
+        for rule in self.rules:
+            if not rule.pattern:
+                raise ValueError("A rule needs a non-empty pattern.")
+            self.rules_by_pattern.setdefault(rule.pattern, []).append(rule)
+        self.scopes = sorted({rule.scope for rule in self.rules if rule.scope})
+        self.regex = re.compile(_trie_regex(self.rules_by_pattern)) if self.rules else None
+
+    def _scope_ranges(self, text, tree):
+        # scope path -> sorted (start, end) offsets of the blocks with that path
+        if not self.scopes:
+            return {}
+        tree = tree or GradleBlockTree(text)
+        ranges = {}
+        for scope in self.scopes:
+            blocks = sorted((block.start, block.end) for block in tree.find_all(scope))
+            ranges[scope] = ([start for start, _ in blocks], blocks)
+        return ranges
+
+    @staticmethod
+    def _in_scope(scope_ranges, scope, offset):
+        starts, blocks = scope_ranges[scope]
+        # Blocks with the same path never nest, so the closest start is the only candidate
+        index = bisect.bisect_right(starts, offset) - 1
+        return index >= 0 and blocks[index][0] <= offset < blocks[index][1]
+
+    def rewrite(self, text, tree=None):
+        # Returns (new text, number of replacements). tree: a GradleBlockTree of text,
+        # only needed (and built when missing) if some rule has a scope.
+        if self.regex is None:
+            return text, 0
+        scope_ranges = self._scope_ranges(text, tree)
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            for rule in self.rules_by_pattern[match.group(0)]:
+                if rule.scope is None or self._in_scope(scope_ranges, rule.scope, match.start()):
+                    count += 1
+                    return rule.replacement
+            return match.group(0)
+
+        return self.regex.sub(replace, text), count
+
+    def rewrite_lines(self, lines, tree=None):
+        text, count = self.rewrite("".join(lines), tree)
+        return text.splitlines(True), count
+
+
+def rewrite(text, rules, tree=None):
+    return MultiPatternRewriter(rules).rewrite(text, tree)
@@ -1,6 +1,10 @@
 # Python script to overwrite build.gradle.kts with the fully corrected content.
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
 
@@ -78,9 +82,18 @@ dependencies {
 }
 '''
 
-try:
-    with open(gradle_file_path, "w") as f:
-        f.write(corrected_gradle_content)
-    print(f"Successfully overwrote {gradle_file_path} with fully corrected content.")
-except Exception as e:
-    print(f"Error overwriting {gradle_file_path}: {e}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Overwrite build.gradle.kts with the fully corrected content.")
+    parser.parse_args(argv)
+
+    try:
+        write_file(gradle_file_path, corrected_gradle_content)
+        print(f"Successfully overwrote {gradle_file_path} with fully corrected content.")
+    except Exception as e:
+        print(f"Error overwriting {gradle_file_path}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# Python script to rewrite the APK build and upload steps of
+# .github/workflows/android_build.yml for a release profile.
+#
+# "flutter build apk --release" alone builds one universal APK that carries the native
+# code of every ABI and the Dart symbols. A profile adds:
+#   --split-per-abi              one smaller APK per ABI (app-<abi>-release.apk)
+#   --target-platform <list>     only the ABIs that are shipped
+#   --obfuscate --split-debug-info=<dir>
+#                                obfuscated Dart code, symbols written to <dir>
+# The upload step then uploads the per-ABI APKs (instead of the hardcoded
+# app-release.apk), and the symbols, needed to read obfuscated stack traces, go into a
+# separate artifact. The "universal" profile switches back to the plain build.
+#
+# The steps are found by what they do (the step running "flutter build apk" and the
+# upload-artifact step with an .apk path), not by name, and other arguments of the
+# build command ("--verbose 2>&1") are kept. Running it again changes nothing.
+#
+# A build job that abi_matrix.py sharded by ABI keeps its matrix: the profile chooses
+# the shards (its target platforms) and the obfuscation, every shard still uploads its
+# own "apk-${{ matrix.abi }}" for the collect-apks job. The universal profile needs one
+# build of every ABI and is refused there.
+#
+# Usage:
+#   python release_profile_step.py [profile]     (default: split-obfuscated)
+
+import argparse
+import posixpath
+import re
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument, reindent
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+# The ABI folder name of every --target-platform
+platform_abis = {
+    "android-arm": "armeabi-v7a",
+    "android-arm64": "arm64-v8a",
+    "android-x64": "x86_64",
+}
+
+release_profiles = {
+    "universal": {"split_per_abi": False, "platforms": None, "obfuscate": False},
+    "split": {"split_per_abi": True, "platforms": ("android-arm", "android-arm64", "android-x64"), "obfuscate": False},
+    "split-obfuscated": {"split_per_abi": True, "platforms": ("android-arm", "android-arm64", "android-x64"),
+                         "obfuscate": True},
+    # Physical devices only: no x86_64 emulator build
+    "devices": {"split_per_abi": True, "platforms": ("android-arm", "android-arm64"), "obfuscate": True},
+    "arm64": {"split_per_abi": True, "platforms": ("android-arm64",), "obfuscate": True},
+}
+default_profile = "split-obfuscated"
+
+# Relative to the working directory of the build step
+apk_output_directory = "build/app/outputs/flutter-apk"
+symbols_directory = "build/app/outputs/symbols"
+
+symbols_step_name = "Upload debug symbols"
+
+# Arguments of "flutter build apk" that belong to the profile; all others are kept
+_profile_argument_pattern = re.compile(r"^--(split-per-abi|obfuscate|split-debug-info(=.*)?|target-platform(=.*)?)$")
+_build_command_pattern = re.compile(r"^(\s*(?:-\s+)?(?:run:\s+)?)(.*\bflutter build apk\b.*?)(\s*)$")
+# A whitespace-separated argument, "${{ ... }}" expressions counting as one
+_token_pattern = re.compile(r"(?:\$\{\{.*?\}\}|\S)+")
+_working_directory_pattern = re.compile(r"^\s*(?:-\s+)?working-directory:\s*['\"]?([^'\"#]*?)['\"]?\s*(?:#.*)?$")
+
+
+def build_arguments(profile):
+    arguments = []
+    if profile["split_per_abi"]:
+        arguments.append("--split-per-abi")
+    if profile["platforms"]:
+        arguments.append("--target-platform " + ",".join(profile["platforms"]))
+    if profile["obfuscate"]:
+        arguments.append(f"--obfuscate --split-debug-info={symbols_directory}")
+    return arguments
+
+
+def rewrite_build_command(command, profile):
+    # "flutter build apk --release --verbose 2>&1" -> the same with the profile's arguments
+    tokens = _token_pattern.findall(command)
+    kept = []
+    skip_value = False
+    for token in tokens:
+        if skip_value:
+            skip_value = False
+            continue
+        if _profile_argument_pattern.match(token):
+            # "--target-platform a,b" / "--split-debug-info dir" take the next token
+            skip_value = token in ("--target-platform", "--split-debug-info")
+            continue
+        kept.append(token)
+    anchor = kept.index("--release") + 1 if "--release" in kept else kept.index("apk") + 1
+    return " ".join(kept[:anchor] + build_arguments(profile) + kept[anchor:])
+
+
+def apk_paths(profile, app_directory):
+    if not profile["split_per_abi"]:
+        return [f"{app_directory}/{apk_output_directory}/app-release.apk"]
+    platforms = profile["platforms"] or tuple(platform_abis)
+    return [f"{app_directory}/{apk_output_directory}/app-{platform_abis[platform]}-release.apk" for platform in platforms]
+
+
+def upload_step(name, profile, app_directory):
+    paths = apk_paths(profile, app_directory)
+    artifact_name = "app-release.apk" if len(paths) == 1 and not profile["split_per_abi"] else "app-release-apks"
+    if len(paths) == 1:
+        path_yaml = f"    path: {paths[0]}\n"
+    else:
+        path_yaml = "    path: |\n" + "".join(f"      {path}\n" for path in paths)
+    return (f"- name: {name}\n"
+            f"  uses: actions/upload-artifact@v4\n"
+            f"  with:\n"
+            f"    name: {artifact_name}\n"
+            + path_yaml +
+            "    if-no-files-found: error\n")
+
+
+def symbols_step(app_directory):
+    return (f"- name: {symbols_step_name}\n"
+            f"  uses: actions/upload-artifact@v4\n"
+            f"  with:\n"
+            f"    name: app-release-symbols\n"
+            f"    path: {app_directory}/{symbols_directory}\n"
+            f"    if-no-files-found: error\n")
+
+
+def find_build_step(document, lines):
+    for span in document.steps():
+        for index in range(span.start, span.end):
+            if _build_command_pattern.match(lines[index].rstrip("\n")):
+                return span, index
+    return None, None
+
+
+def find_upload_step(document, lines, after):
+    for span in document.steps(after.job):
+        if span.start < after.end:
+            continue
+        text = "".join(lines[span.start:span.end])
+        if "actions/upload-artifact" in text and ".apk" in text:
+            return span
+    return None
+
+
+def step_working_directory(lines, span):
+    for line in lines[span.start:span.end]:
+        match = _working_directory_pattern.match(line)
+        if match:
+            return posixpath.normpath(match.group(1) or ".")
+    return "."
+
+
+def _update_symbols_step(document, lines, upload, obfuscate, text):
+    # Adds the symbols upload after the APK upload, or removes it
+    has_symbols_step = document.has_step(symbols_step_name, upload.job)
+    if obfuscate and not has_symbols_step:
+        document.insert_lines(upload.end, ["\n"] + reindent(text, upload.indent))
+    elif not obfuscate and has_symbols_step:
+        symbols = document.find_step(symbols_step_name, upload.job)
+        if symbols.start >= upload.end and not "".join(lines[upload.end:symbols.start]).strip():
+            # Right after the upload step: drop the blank lines that separated them too
+            document.replace_lines(upload.end, symbols.end, [])
+        else:
+            document.remove_span(symbols)
+
+
+def sharded_release_profile(lines, profile, job_name):
+    # Imported here: abi_matrix builds on this module
+    import abi_matrix
+
+    if not profile["split_per_abi"]:
+        raise ValueError(f"job '{job_name}' is sharded by ABI (abi_matrix.py), a universal APK needs a single"
+                         f" build; remove the matrix first")
+    document = WorkflowDocument.from_lines(lines)
+    build, command_index = find_build_step(document, lines)
+    prefix, command, ending = _build_command_pattern.match(lines[command_index].rstrip("\n")).groups()
+    # The shard's own platform stays; only the obfuscation comes from the profile
+    shard = {"split_per_abi": True, "platforms": ("${{ matrix.target-platform }}",), "obfuscate": profile["obfuscate"]}
+    new_command = rewrite_build_command(command, shard)
+    if new_command != command:
+        document.replace_lines(command_index, command_index + 1, [f"{prefix}{new_command}{ending}\n"])
+    upload = find_upload_step(document, lines, build)
+    if upload is not None:
+        _update_symbols_step(document, lines, upload, profile["obfuscate"],
+                             abi_matrix.matrix_symbols_step(step_working_directory(lines, build)))
+    if document.is_modified():
+        lines = document.lines()
+
+    # abi_matrix rewrites the strategy for the profile's platforms, the per-shard upload
+    # steps and the collect-apks job
+    fail_fast, max_parallel = abi_matrix.strategy_settings(lines, job_name)
+    return abi_matrix.abi_matrix(lines, profile["platforms"] or tuple(platform_abis), fail_fast, max_parallel, job_name)
+
+
+def release_profile_step(lines, profile_name=default_profile):
+    profile = release_profiles[profile_name]
+    document = WorkflowDocument.from_lines(lines)
+    build, command_index = find_build_step(document, lines)
+    if build is None:
+        print("Warning: no step runs 'flutter build apk'. Release profile not applied.")
+        return lines
+
+    prefix, command, ending = _build_command_pattern.match(lines[command_index].rstrip("\n")).groups()
+    if "${{ matrix." in command:
+        return sharded_release_profile(lines, profile, build.job)
+    new_command = rewrite_build_command(command, profile)
+    if new_command != command:
+        document.replace_lines(command_index, command_index + 1, [f"{prefix}{new_command}{ending}\n"])
+
+    app_directory = step_working_directory(lines, build)
+    upload = find_upload_step(document, lines, build)
+    if upload is None:
+        print("Warning: no upload-artifact step for the APK found. Only the build command was changed.")
+    else:
+        text = upload_step(upload.name or "Upload APK artifact", profile, app_directory)
+        current = [line.strip() for line in lines[upload.start:upload.end] if line.strip()]
+        if current != [line.strip() for line in text.splitlines()]:
+            document.replace_lines(upload.start, upload.end, reindent(text, upload.indent))
+
+        _update_symbols_step(document, lines, upload, profile["obfuscate"], symbols_step(app_directory))
+
+    return document.lines() if document.is_modified() else lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite the APK build and upload steps for a release profile.")
+    parser.add_argument("profile", nargs="?", default=default_profile, choices=sorted(release_profiles))
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to rewrite")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+
+    try:
+        new_lines = release_profile_step(lines, args.profile)
+    except ValueError as e:
+        print(f"Error: {e}.")
+        return 1
+
+    if new_lines is not lines:
+        write_file(args.file, "".join(new_lines))
+        print(f"Applied the '{args.profile}' release profile to {args.file}.")
+    else:
+        print(f"{args.file} already uses the '{args.profile}' release profile.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,12 @@
 # Python script to remove the orphaned heredoc block from .github/workflows/android_build.yml
 
+import argparse
 import os
+import sys
 
-workflow_file_path = ".github/workflows/android_build.yml"
-
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
+from transaction import write_file
 
-new_lines = []
-in_orphaned_block = False
+workflow_file_path = ".github/workflows/android_build.yml"
 
 # Heuristic start and end markers for the orphaned block
 # The start is a unique line from within the Python script content.
@@ -19,27 +17,47 @@ orphaned_block_start_content = 'keystore_logic_to_insert = ['
 orphaned_block_end_content = "EOF"
 
 
-for line_content in lines:
-    stripped_content_for_check = line_content.strip() # For checking content like EOF
+def remove_orphaned_heredoc(lines):
+    new_lines = []
+    in_orphaned_block = False
+
+    for line_content in lines:
+        stripped_content_for_check = line_content.strip() # For checking content like EOF
+
+        # We need to check the line_content itself for the start marker because of indentation
+        # "          keystore_logic_to_insert = ["
+        # So, we check if the non-whitespace part starts with our marker.
+
+        if not in_orphaned_block:
+            if line_content.lstrip().startswith(orphaned_block_start_content):
+                in_orphaned_block = True
+                # Do not append this line, as it's the start of the block to remove
+            else:
+                new_lines.append(line_content)
+        else: # We are in the orphaned block
+            # Check for the end of the heredoc
+            if stripped_content_for_check == orphaned_block_end_content:
+                in_orphaned_block = False
+                # Do not append this line (the EOF line itself)
+            # else: still in the block, so skip the line (do nothing)
+
+    return new_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove the orphaned heredoc block.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines = remove_orphaned_heredoc(lines)
 
-    # We need to check the line_content itself for the start marker because of indentation
-    # "          keystore_logic_to_insert = ["
-    # So, we check if the non-whitespace part starts with our marker.
+    write_file(workflow_file_path, "".join(new_lines))
 
-    if not in_orphaned_block:
-        if line_content.lstrip().startswith(orphaned_block_start_content):
-            in_orphaned_block = True
-            # Do not append this line, as it's the start of the block to remove
-        else:
-            new_lines.append(line_content)
-    else: # We are in the orphaned block
-        # Check for the end of the heredoc
-        if stripped_content_for_check == orphaned_block_end_content:
-            in_orphaned_block = False
-            # Do not append this line (the EOF line itself)
-        # else: still in the block, so skip the line (do nothing)
+    print(f"Attempted to remove orphaned heredoc block from {workflow_file_path}.")
+    return 0
 
-with open(workflow_file_path, "w") as f:
-    f.writelines(new_lines)
 
-print(f"Attempted to remove orphaned heredoc block from {workflow_file_path}.")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,46 @@
 # Python script to remove the 'Patch build.gradle.kts after flutter create' step (Corrected Logic)
 # from .github/workflows/android_build.yml
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
+# Name of the step to remove
+step_name_to_remove = "Patch build.gradle.kts after flutter create"
 
-new_lines = []
-in_step_to_remove = False
 
-# Name of the step to remove
-step_name_to_remove_prefix = "- name: Patch build.gradle.kts after flutter create"
-
-for line_content in lines:
-    stripped_line = line_content.lstrip()
-
-    if in_step_to_remove:
-        # If the current line is the start of a new step definition (i.e., less or equally indented
-        # than the step definition itself, and starts with "- name:")
-        # then we've exited the step-to-remove block.
-        # A simple check is if it starts with "- name:" as all our steps do.
-        # More robust would be to check indentation level against the original step's indent.
-        if stripped_line.startswith("- name:"):
-            in_step_to_remove = False
-            new_lines.append(line_content) # This new step should be kept
-        # else, this line is part of the multi-line step to remove, so we skip it (do nothing)
-    else:
-        if stripped_line.startswith(step_name_to_remove_prefix):
-            in_step_to_remove = True
-            # Skip this line (the - name: line itself)
-        else:
-            new_lines.append(line_content) # Not in step to remove, and not starting it
-
-with open(workflow_file_path, "w") as f:
-    f.writelines(new_lines)
-
-print(f"Attempted removal of 'Patch build.gradle.kts after flutter create' step (Corrected Logic) from {workflow_file_path}.")
+def remove_patch_step(lines):
+    document = WorkflowDocument.from_lines(lines)
+    if not document.has_step(step_name_to_remove):
+        return lines
+
+    # The step index knows where each step ends (including its heredoc), so the whole
+    # block and the blank lines separating it from the next step are dropped at once.
+    # Every copy goes: remove_step() would only drop the first one.
+    for span in document.find_steps(step_name_to_remove):
+        document.remove_span(span)
+    return document.lines()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove the build.gradle.kts patch step.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines = remove_patch_step(lines)
+
+    write_file(workflow_file_path, "".join(new_lines))
+
+    print(f"Attempted removal of 'Patch build.gradle.kts after flutter create' step (Corrected Logic) from {workflow_file_path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
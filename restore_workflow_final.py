@@ -1,35 +1,13 @@
 # Python script to update .github/workflows/android_build.yml
 # with the final build and artifact upload steps.
 
+import argparse
 import os
+import sys
 
-workflow_file_path = ".github/workflows/android_build.yml"
+from transaction import write_file
 
-# Read existing lines to find where to insert/remove
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
-
-# Remove the previous test echo line:
-# "- name: Test command after Flutter/Gradle steps"
-# and its "run:" line
-new_lines = []
-skip_next_line = False
-for i, line in enumerate(lines):
-    if skip_next_line:
-        skip_next_line = False
-        continue
-    if "- name: Test command after Flutter/Gradle steps" in line:
-        # This will skip the current line (- name: ...)
-        # and the next line (run: ...)
-        if i + 1 < len(lines) and lines[i+1].strip().startswith("run:"):
-            skip_next_line = True
-        continue # Skip adding this line
-
-    # Revert workflow name
-    if line.strip().startswith("name: Android Build - Step Restore"):
-        new_lines.append("name: Android Build\n")
-    else:
-        new_lines.append(line)
+workflow_file_path = ".github/workflows/android_build.yml"
 
 # Define the steps to add (keystore, build, upload)
 final_steps_yaml = '''      - name: Create keystore.properties
@@ -66,16 +44,58 @@ final_steps_yaml = '''      - name: Create keystore.properties
           path: flutter_dashboard_app/build/app/outputs/flutter-apk/app-release.apk
 '''
 
-# Append the final steps to the new_lines list
-# Ensure correct indentation if new_lines doesn't end with newline
-if new_lines and not new_lines[-1].endswith('\n'):
-    new_lines[-1] += '\n'
 
-new_lines.append(final_steps_yaml)
+def restore_workflow_final(lines):
+    # Remove the previous test echo line:
+    # "- name: Test command after Flutter/Gradle steps"
+    # and its "run:" line
+    new_lines = []
+    skip_next_line = False
+    for i, line in enumerate(lines):
+        if skip_next_line:
+            skip_next_line = False
+            continue
+        if "- name: Test command after Flutter/Gradle steps" in line:
+            # This will skip the current line (- name: ...)
+            # and the next line (run: ...)
+            if i + 1 < len(lines) and lines[i+1].strip().startswith("run:"):
+                skip_next_line = True
+            continue # Skip adding this line
+
+        # Revert workflow name
+        if line.strip().startswith("name: Android Build - Step Restore"):
+            new_lines.append("name: Android Build\n")
+        else:
+            new_lines.append(line)
+
+    # Append the final steps to the new_lines list
+    # Ensure correct indentation if new_lines doesn't end with newline
+    if new_lines and not new_lines[-1].endswith('\n'):
+        new_lines[-1] += '\n'
+
+    new_lines.extend(final_steps_yaml.splitlines(True))
+
+    return new_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restore the final build and artifact upload steps.")
+    parser.parse_args(argv)
+
+    # Read existing lines to find where to insert/remove
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_lines = restore_workflow_final(lines)
+
+    try:
+        write_file(workflow_file_path, "".join(new_lines))
+        print(f"Successfully updated {workflow_file_path} with final build steps and reverted name to 'Android Build'.")
+    except Exception as e:
+        print(f"Error writing final workflow to {workflow_file_path}: {e}")
+        return 1
+    return 0
+
 
-try:
-    with open(workflow_file_path, "w") as f:
-        f.writelines(new_lines)
-    print(f"Successfully updated {workflow_file_path} with final build steps and reverted name to 'Android Build'.")
-except Exception as e:
-    print(f"Error writing final workflow to {workflow_file_path}: {e}")
+if __name__ == "__main__":
+    sys.exit(main())
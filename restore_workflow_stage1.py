@@ -1,7 +1,11 @@
 # Python script to update .github/workflows/android_build.yml
 # with the first set of restored steps.
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
@@ -37,9 +41,24 @@ jobs:
         run: echo "Initial setup steps (Java, Flutter) completed."
 '''
 
-try:
-    with open(workflow_file_path, "w") as f:
-        f.write(restored_workflow_content_stage1)
-    print(f"Successfully updated {workflow_file_path} with initial restored steps (Checkout, Java, Flutter).")
-except Exception as e:
-    print(f"Error writing restored workflow (stage 1) to {workflow_file_path}: {e}")
+
+def restore_workflow_stage1(lines):
+    # The whole file is replaced, so the current content is not used
+    return restored_workflow_content_stage1.splitlines(True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restore the first set of workflow steps.")
+    parser.parse_args(argv)
+
+    try:
+        write_file(workflow_file_path, "".join(restore_workflow_stage1([])))
+        print(f"Successfully updated {workflow_file_path} with initial restored steps (Checkout, Java, Flutter).")
+    except Exception as e:
+        print(f"Error writing restored workflow (stage 1) to {workflow_file_path}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
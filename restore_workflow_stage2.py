@@ -1,7 +1,11 @@
 # Python script to update .github/workflows/android_build.yml
 # with the second set of restored steps.
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
@@ -61,9 +65,24 @@ jobs:
         run: echo "Flutter/Gradle setup and clean steps completed."
 '''
 
-try:
-    with open(workflow_file_path, "w") as f:
-        f.write(restored_workflow_content_stage2)
-    print(f"Successfully updated {workflow_file_path} with Flutter/Gradle steps (Stage 2).")
-except Exception as e:
-    print(f"Error writing restored workflow (Stage 2) to {workflow_file_path}: {e}")
+
+def restore_workflow_stage2(lines):
+    # The whole file is replaced, so the current content is not used
+    return restored_workflow_content_stage2.splitlines(True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restore the second set of workflow steps.")
+    parser.parse_args(argv)
+
+    try:
+        write_file(workflow_file_path, "".join(restore_workflow_stage2([])))
+        print(f"Successfully updated {workflow_file_path} with Flutter/Gradle steps (Stage 2).")
+    except Exception as e:
+        print(f"Error writing restored workflow (Stage 2) to {workflow_file_path}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,130 +1,142 @@
 # Python script to restructure flutter_dashboard_app/android/app/build.gradle.kts (v2)
 # Moves keystore properties loading logic inside the android {} block.
 
+import argparse
 import os
+import sys
+
+from gradle_block_tree import GradleBlockTree, GradleParseError
+from transform_cache import describe_status, run_cached
 
 gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
-print(f"Attempting to restructure: {gradle_file_path}")
-
-with open(gradle_file_path, "r") as f:
-    original_lines = f.readlines()
-print(f"Read {len(original_lines)} lines from file.")
-
-# Normalize line endings to avoid mixed endings issues
-original_lines = [line.rstrip('\r\n') + '\n' for line in original_lines]
-
-import_line_content = "import java.util.Properties\n"
-keystore_logic_to_move = []
-lines_before_keystore_block = []
-lines_after_keystore_block = []
-
-# --- Stage 1: Identify and separate sections ---
-found_import = False
-found_keystore_start = False
-found_keystore_end = False
-keystore_start_index = -1
-keystore_end_index = -1
-
-# First, ensure import is captured if present, and identify keystore block
-temp_capture_lines = list(original_lines)
-print("\n--- Identifying Keystore Block ---")
-
-for i, line in enumerate(temp_capture_lines):
-    stripped_line = line.strip()
-    # print(f"Processing line {i}: '{stripped_line}'")
-
-    if stripped_line == "import java.util.Properties":
-        found_import = True
-        # print(f"  Found import at line {i}")
-        continue
-
-    if not found_keystore_start and stripped_line.startswith("val keystorePropertiesFile"):
-        found_keystore_start = True
-        keystore_start_index = i
-        print(f"  Keystore start detected at line {i}: '{stripped_line}'")
-
-    if found_keystore_start and not found_keystore_end:
-        keystore_logic_to_move.append(line)
-        # print(f"    Added to keystore_logic_to_move: '{line.strip()}'")
-        if stripped_line == "}":
-            print(f"  Potential keystore end '}}' found at line {i}")
-            prev_meaningful_line = ""
-            if len(keystore_logic_to_move) > 1: # Need at least one line before the '}'
-                for j in range(len(keystore_logic_to_move) - 2, -1, -1):
-                    # print(f"    Checking prev_meaningful_line candidate: '{keystore_logic_to_move[j].strip()}'")
-                    if keystore_logic_to_move[j].strip() != "":
-                        prev_meaningful_line = keystore_logic_to_move[j].strip()
-                        # print(f"    Prev meaningful line for '}}' is: '{prev_meaningful_line}'")
-                        break
-
-            if "keystoreProperties.load(it)" in prev_meaningful_line:
-                 print(f"    Confirmed keystore end: 'keystoreProperties.load(it)' found in previous line.")
-                 found_keystore_end = True
-                 keystore_end_index = i
-            else:
-                print(f"    Rejected potential keystore end: 'keystoreProperties.load(it)' NOT found in '{prev_meaningful_line}'")
-        elif found_keystore_start and stripped_line.startswith("plugins {") and not found_keystore_end :
-            print(f"  WARNING: Hit 'plugins {{' at line {i} before keystore end was confirmed. This might indicate an issue.")
-            # This implies the '}' was missed or structure is unexpected.
-
-
-print(f"\nIdentification Results:")
-print(f"  found_import: {found_import}")
-print(f"  found_keystore_start: {found_keystore_start} (index: {keystore_start_index})")
-print(f"  found_keystore_end: {found_keystore_end} (index: {keystore_end_index})")
-if keystore_logic_to_move:
-    print(f"  Identified keystore_logic_to_move ({len(keystore_logic_to_move)} lines):")
-    for k_line in keystore_logic_to_move:
-        print(f"    {k_line.strip()}")
-
-if not (found_keystore_start and found_keystore_end):
-    print("\nError: Keystore logic block not clearly identified. Aborting script execution.")
-    # Writing original_lines back to be safe for this step.
-    with open(gradle_file_path, "w") as f:
-        f.writelines(original_lines)
-    print("Original file content has been restored due to identification error.")
-    exit() # Stop script execution here
-
-# --- Stage 2: Prepare lines_before and lines_after the keystore block ---
-print("\n--- Preparing Processed Lines (original lines without import and keystore block) ---")
-processed_lines = []
-for i, line in enumerate(original_lines):
-    if line.strip() == "import java.util.Properties":
-        continue
-    if keystore_start_index <= i <= keystore_end_index:
-        continue
-    processed_lines.append(line)
-
-# Remove leading blank lines
-while processed_lines and processed_lines[0].strip() == "":
-    processed_lines.pop(0)
-# print(f"  Processed_lines (first 5 after cleaning):")
-# for p_line in processed_lines[:5]:
-#    print(f"    {p_line.strip()}")
-
-
-# --- Stage 3: Reconstruct the file content ---
-print("\n--- Reconstructing Final File Content ---")
-final_lines = []
-
-final_lines.append(import_line_content)
-# print(f"Added import: {import_line_content.strip()}")
-
-if processed_lines and processed_lines[0].strip() != "":
-    final_lines.append("\n")
-    # print("Added blank line after import.")
-
-in_android_block = False
-placed_keystore_logic = False
-android_indentation = "    "
-
-for line_content in processed_lines:
-    if not placed_keystore_logic:
-        if line_content.strip().startswith("android {"):
-            in_android_block = True
-            # print(f"Entered android block. Current line: {line_content.strip()}")
 
-        if in_android_block and line_content.strip().startswith("signingConfigs {"):
+# Bump when the output of restructure_gradle_v2() changes, so cached results are not reused
+transform_version = 1
+
+
+def restructure_gradle_v2(content):
+    original_lines = content.splitlines(True)
+    print(f"Read {len(original_lines)} lines from file.")
+
+    # Normalize line endings to avoid mixed endings issues
+    original_lines = [line.rstrip('\r\n') + '\n' for line in original_lines]
+
+    import_line_content = "import java.util.Properties\n"
+    keystore_logic_to_move = []
+    lines_before_keystore_block = []
+    lines_after_keystore_block = []
+
+    # --- Stage 1: Identify and separate sections ---
+    found_import = False
+    found_keystore_start = False
+    found_keystore_end = False
+    keystore_start_index = -1
+    keystore_end_index = -1
+
+    # First, ensure import is captured if present, and identify keystore block
+    temp_capture_lines = list(original_lines)
+    print("\n--- Identifying Keystore Block ---")
+
+    for i, line in enumerate(temp_capture_lines):
+        stripped_line = line.strip()
+        # print(f"Processing line {i}: '{stripped_line}'")
+
+        if stripped_line == "import java.util.Properties":
+            found_import = True
+            # print(f"  Found import at line {i}")
+            continue
+
+        if not found_keystore_start and stripped_line.startswith("val keystorePropertiesFile"):
+            found_keystore_start = True
+            keystore_start_index = i
+            print(f"  Keystore start detected at line {i}: '{stripped_line}'")
+
+        if found_keystore_start and not found_keystore_end:
+            keystore_logic_to_move.append(line)
+            # print(f"    Added to keystore_logic_to_move: '{line.strip()}'")
+            if stripped_line == "}":
+                print(f"  Potential keystore end '}}' found at line {i}")
+                prev_meaningful_line = ""
+                if len(keystore_logic_to_move) > 1: # Need at least one line before the '}'
+                    for j in range(len(keystore_logic_to_move) - 2, -1, -1):
+                        # print(f"    Checking prev_meaningful_line candidate: '{keystore_logic_to_move[j].strip()}'")
+                        if keystore_logic_to_move[j].strip() != "":
+                            prev_meaningful_line = keystore_logic_to_move[j].strip()
+                            # print(f"    Prev meaningful line for '}}' is: '{prev_meaningful_line}'")
+                            break
+
+                if "keystoreProperties.load(it)" in prev_meaningful_line:
+                     print(f"    Confirmed keystore end: 'keystoreProperties.load(it)' found in previous line.")
+                     found_keystore_end = True
+                     keystore_end_index = i
+                else:
+                    print(f"    Rejected potential keystore end: 'keystoreProperties.load(it)' NOT found in '{prev_meaningful_line}'")
+            elif found_keystore_start and stripped_line.startswith("plugins {") and not found_keystore_end :
+                print(f"  WARNING: Hit 'plugins {{' at line {i} before keystore end was confirmed. This might indicate an issue.")
+                # This implies the '}' was missed or structure is unexpected.
+
+
+    print(f"\nIdentification Results:")
+    print(f"  found_import: {found_import}")
+    print(f"  found_keystore_start: {found_keystore_start} (index: {keystore_start_index})")
+    print(f"  found_keystore_end: {found_keystore_end} (index: {keystore_end_index})")
+    if keystore_logic_to_move:
+        print(f"  Identified keystore_logic_to_move ({len(keystore_logic_to_move)} lines):")
+        for k_line in keystore_logic_to_move:
+            print(f"    {k_line.strip()}")
+
+    if not (found_keystore_start and found_keystore_end):
+        print("\nError: Keystore logic block not clearly identified. Aborting script execution.")
+        # Leave the file exactly as it was for this step.
+        print("Original file content is kept due to identification error.")
+        return content
+
+    # --- Stage 2: Prepare lines_before and lines_after the keystore block ---
+    print("\n--- Preparing Processed Lines (original lines without import and keystore block) ---")
+    processed_lines = []
+    for i, line in enumerate(original_lines):
+        if line.strip() == "import java.util.Properties":
+            continue
+        if keystore_start_index <= i <= keystore_end_index:
+            continue
+        processed_lines.append(line)
+
+    # Remove leading blank lines
+    while processed_lines and processed_lines[0].strip() == "":
+        processed_lines.pop(0)
+    # print(f"  Processed_lines (first 5 after cleaning):")
+    # for p_line in processed_lines[:5]:
+    #    print(f"    {p_line.strip()}")
+
+
+    # --- Stage 3: Reconstruct the file content ---
+    print("\n--- Reconstructing Final File Content ---")
+    final_lines = []
+
+    final_lines.append(import_line_content)
+    # print(f"Added import: {import_line_content.strip()}")
+
+    if processed_lines and processed_lines[0].strip() != "":
+        final_lines.append("\n")
+        # print("Added blank line after import.")
+
+    placed_keystore_logic = False
+    android_indentation = "    "
+
+    # Locate android { signingConfigs { ... } } with the block tree, so braces in strings or
+    # comments (and a signingConfigs block outside android {}) cannot fool the search.
+    processed_text = "".join(processed_lines)
+    signing_configs_line_index = -1
+    try:
+        tree = GradleBlockTree(processed_text)
+        signing_configs_block = tree.find("android.signingConfigs")
+        if signing_configs_block is not None:
+            signing_configs_line_index = processed_text.count("\n", 0, signing_configs_block.start)
+    except GradleParseError as e:
+        print(f"  WARNING: Could not parse the block structure: {e}")
+
+    for line_index, line_content in enumerate(processed_lines):
+        if line_index == signing_configs_line_index:
             # print(f"Found 'signingConfigs {{'. Inserting keystore logic before it.")
             if keystore_logic_to_move: final_lines.append("\n")
             for ks_line in keystore_logic_to_move:
@@ -133,17 +145,26 @@ for line_content in processed_lines:
             placed_keystore_logic = True
             # print(f"  Keystore logic placed. placed_keystore_logic: {placed_keystore_logic}")
 
-    final_lines.append(line_content)
+        final_lines.append(line_content)
+
+    if not placed_keystore_logic:
+        print("\nWarning: Keystore logic was not placed. This usually means 'signingConfigs {' was not found inside 'android {}'.")
+        print("The script will write the file without moving the keystore block if it was already removed, or with it if not identified.")
+
+    return "".join(final_lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move the keystore loading inside android {} (v2).")
+    parser.parse_args(argv)
+
+    print(f"Attempting to restructure: {gradle_file_path}")
 
-if not placed_keystore_logic:
-    print("\nWarning: Keystore logic was not placed. This usually means 'signingConfigs {' was not found inside 'android {}'.")
-    print("The script will write the file without moving the keystore block if it was already removed, or with it if not identified.")
+    status, output_hash = run_cached(gradle_file_path, "restructure_gradle_v2", transform_version, restructure_gradle_v2)
 
+    print(f"\nScript finished. Attempted restructure (v2_debug) of {gradle_file_path}: {describe_status(status)}.")
+    return 0
 
-with open(gradle_file_path, "w") as f:
-    f.writelines(final_lines)
 
-print(f"\nScript finished. Attempted restructure (v2_debug) of {gradle_file_path}.")
-# print("First 25 lines written:")
-# for i, l_o in enumerate(final_lines[:25]):
-# print(f"{i+1}: {l_o.rstrip()}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# Python script to apply the namespace / applicationId and Kotlin DSL .set() corrections
+# of the embedded patch scripts to flutter_dashboard_app/android/app/build.gradle.kts.
+#
+# The embedded scripts test every line against each pattern in turn and track the
+# release {} block with state flags. Here the same corrections are a rule table applied
+# by a MultiPatternRewriter in one scan; the release-only rules are scoped to the
+# android.buildTypes.release block found by the block tree.
+
+import argparse
+import sys
+
+from multi_pattern import MultiPatternRewriter, Rule
+from transform_cache import describe_status, run_cached
+
+gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
+
+# Bump when the rules change, so cached results are not reused
+transform_version = 1
+
+old_application_id = "com.example.flutter_dashboard_app"
+new_application_id = "com.jules.flutter_dashboard_app"
+
+release_scope = "android.buildTypes.release"
+
+identifier_rules = [
+    Rule(f'namespace = "{old_application_id}"', f'namespace = "{new_application_id}"'),
+    Rule(f'applicationId = "{old_application_id}"', f'applicationId = "{new_application_id}"'),
+    Rule('signingConfig = signingConfigs.getByName("release")',
+         'signingConfig.set(signingConfigs.getByName("release"))', release_scope),
+    Rule("isMinifyEnabled = false", "isMinifyEnabled.set(false)", release_scope),
+    Rule("isMinifyEnabled = true", "isMinifyEnabled.set(true)", release_scope),
+]
+identifier_rewriter = MultiPatternRewriter(identifier_rules)
+
+
+def rewrite_gradle_identifiers(content):
+    new_content, count = identifier_rewriter.rewrite(content)
+    return new_content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite namespace / applicationId and the Kotlin DSL setters.")
+    parser.parse_args(argv)
+
+    status, output_hash = run_cached(gradle_file_path, "rewrite_gradle_identifiers", transform_version,
+                                     rewrite_gradle_identifiers, idempotent=True)
+    print(f"Applied {len(identifier_rules)} identifier rules to {gradle_file_path}: {describe_status(status)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,64 @@
 # Python script to further sanitize flutter_dashboard_app/android/app/build.gradle.kts
 
+import argparse
 import os
+import sys
+
+from transform_cache import describe_status, run_cached
 
 gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
 
-with open(gradle_file_path, "r") as f:
-    lines = f.readlines()
+# Bump when the output of sanitize_gradle() changes, so cached results are not reused
+transform_version = 1
+
+
+def sanitize_gradle(content):
+    lines = content.splitlines(True)
+    new_lines = []
+
+    # First, check if import exists and remove it to avoid duplication if script runs multiple times
+    for line in lines:
+        if line.strip() == "import java.util.Properties":
+            # Don't add it to new_lines yet, we'll add it definitively at the top
+            continue
+        elif line.strip().startswith("val keystoreProperties = java.util.Properties()"):
+            # Re-type this line to ensure no hidden characters
+            new_lines.append("val keystoreProperties = java.util.Properties()\n")
+        else:
+            new_lines.append(line)
+
+    # Remove any leading blank lines from new_lines
+    while new_lines and new_lines[0].strip() == "":
+        new_lines.pop(0)
+
+    # Add the import statement at the very beginning
+    final_lines = ["import java.util.Properties\n"]
 
-new_lines = []
-import_found_in_original = False
+    # Add a blank line after the import, if there's content following
+    if new_lines:
+        final_lines.append("\n")
 
-# First, check if import exists and remove it to avoid duplication if script runs multiple times
-for line in lines:
-    if line.strip() == "import java.util.Properties":
-        import_found_in_original = True
-        # Don't add it to new_lines yet, we'll add it definitively at the top
-    elif line.strip().startswith("val keystoreProperties = java.util.Properties()"):
-        # Re-type this line to ensure no hidden characters
-        new_lines.append("val keystoreProperties = java.util.Properties()\n")
-    else:
-        new_lines.append(line)
+    final_lines.extend(new_lines)
+    return "".join(final_lines)
 
-# Remove any leading blank lines from new_lines
-while new_lines and new_lines[0].strip() == "":
-    new_lines.pop(0)
 
-# Add the import statement at the very beginning
-final_lines = ["import java.util.Properties\n"]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sanitize build.gradle.kts.")
+    parser.parse_args(argv)
 
-# Add a blank line after the import, if there's content following
-if new_lines:
-    final_lines.append("\n")
+    # The cache skips both the work and the write when the file already has this shape
+    status, output_hash = run_cached(gradle_file_path, "sanitize_gradle", transform_version, sanitize_gradle, idempotent=True)
 
-final_lines.extend(new_lines)
+    print(f"Sanitized and ensured 'import java.util.Properties' is at the top of {gradle_file_path}: {describe_status(status)}.")
 
-with open(gradle_file_path, "w") as f:
-    f.writelines(final_lines)
+    # For debugging, print the first few lines of the file
+    with open(gradle_file_path, "r") as f:
+        final_lines = f.readlines()
+    print("First 5 lines written:")
+    for i, line_to_write in enumerate(final_lines[:5]):
+        print(f"{i+1}: {line_to_write.rstrip()}")
+    return 0
 
-print(f"Sanitized and ensured 'import java.util.Properties' is at the top of {gradle_file_path}.")
-print(f"Original import found: {import_found_in_original}")
 
-# For debugging, print the first few lines that will be written
-print("First 5 lines to be written:")
-for i, line_to_write in enumerate(final_lines[:5]):
-    print(f"{i+1}: {line_to_write.rstrip()}")
+if __name__ == "__main__":
+    sys.exit(main())
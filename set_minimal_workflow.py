@@ -1,7 +1,11 @@
 # Python script to replace the content of .github/workflows/android_build.yml
 # with a minimal workflow for diagnostic purposes.
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
@@ -23,11 +27,24 @@ jobs:
         run: echo "Test job is running successfully!"
 '''
 
-try:
-    with open(workflow_file_path, "w") as f:
-        f.write(minimal_workflow_content)
-    print(f"Successfully replaced content of {workflow_file_path} with a minimal test workflow.")
-except Exception as e:
-    print(f"Error writing minimal workflow to {workflow_file_path}: {e}")
-    # If there's an error, we might want to indicate failure or attempt to restore.
-    # For now, just print the error.
+
+def set_minimal_workflow(lines):
+    # The whole file is replaced, so the current content is not used
+    return minimal_workflow_content.splitlines(True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replace the workflow with a minimal diagnostic workflow.")
+    parser.parse_args(argv)
+
+    try:
+        write_file(workflow_file_path, "".join(set_minimal_workflow([])))
+        print(f"Successfully replaced content of {workflow_file_path} with a minimal test workflow.")
+    except Exception as e:
+        print(f"Error writing minimal workflow to {workflow_file_path}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
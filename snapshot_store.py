@@ -0,0 +1,424 @@
+# Python script to keep the history of every file the transforms write, in a local
+# content-addressed store, and to go back to any earlier state.
+#
+# Every transaction that commits (so every write_file() of every script) records the
+# files it replaced: their content before and after, by sha256. Contents are stored once
+# per hash, however often they come back (set_minimal_workflow.py followed by
+# restore_workflow_final.py and back again adds nothing new). The old version of a file
+# costs no copy: it is hardlinked into the store just before the new version is renamed
+# over it, so the store takes over an inode nobody writes any more.
+#
+# Layout of .dashboard_ci/snapshots:
+#   objects/<2 chars>/<hash>           file contents
+#   history.jsonl                      one line per commit: id, time, label (the command
+#                                      line) and, per file, the hashes before and after
+#   checkpoints/<name>/manifest.json   path -> hash of the files of a named checkpoint
+#   checkpoints/<name>/files/<path>    the same files, hardlinked to their objects
+# Restoring a checkpoint reads its manifest and rewrites only the files that differ, in
+# one transaction (itself recorded, so a restore can be undone too). Files inside
+# .dashboard_ci (caches, manifests) are not recorded.
+#
+# Usage:
+#   python snapshot_store.py checkpoint working [--file PATH ...]
+#   python snapshot_store.py restore working
+#   python snapshot_store.py undo                 # the files as they were before the last commit
+#   python snapshot_store.py log [--limit 20]
+#   python snapshot_store.py diff working         # checkpoint -> current files
+#   python snapshot_store.py diff #3~ #3          # before / after history entry 3
+#   python snapshot_store.py gc [--keep 100]
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from transaction import Transaction
+
+store_directory = ".dashboard_ci/snapshots"
+
+# Files a checkpoint covers unless --file is given
+default_files = (
+    ".github/workflows/android_build.yml",
+    "flutter_dashboard_app/android/app/build.gradle.kts",
+    "flutter_dashboard_app/android/gradle.properties",
+)
+
+# gc never deletes objects younger than this: a commit links its old contents into the
+# store before it appends its history line
+gc_grace_seconds = 600
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _short(content_hash):
+    return content_hash[:10] if content_hash else "(none)"
+
+
+class SnapshotStore:
+    def __init__(self, directory=store_directory):
+        self.directory = directory
+        # Recorded paths are relative to the directory that holds .dashboard_ci
+        self.root = os.path.dirname(os.path.dirname(os.path.abspath(directory)))
+        self.history_path = os.path.join(directory, "history.jsonl")
+
+    # --- Objects -----------------------------------------------------------------------
+
+    def object_path(self, content_hash):
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def has_object(self, content_hash):
+        return os.path.exists(self.object_path(content_hash))
+
+    def read_object(self, content_hash):
+        try:
+            with open(self.object_path(content_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise SnapshotError(f"Object {content_hash} is missing from {self.directory}.")
+
+    def add_bytes(self, data):
+        content_hash = _hash_bytes(data)
+        if not self.has_object(content_hash):
+            target = self.object_path(content_hash)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, target)
+        return content_hash
+
+    def add_file(self, path, content_hash, link=False):
+        # With link=True the file is hardlinked instead of copied: only for a file that is
+        # about to be replaced (renamed over), never for one that may be edited in place
+        if content_hash is None or self.has_object(content_hash):
+            return content_hash
+        target = self.object_path(content_hash)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = os.path.join(os.path.dirname(target), f".tmp-{os.getpid()}-{content_hash[:16]}")
+        try:
+            if link:
+                try:
+                    os.link(path, temp_path)
+                except OSError:
+                    # Other file system, or no hardlinks there
+                    shutil.copyfile(path, temp_path)
+            else:
+                shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+        except FileNotFoundError:
+            return None
+        return content_hash
+
+    # --- Paths -------------------------------------------------------------------------
+
+    def relative(self, path):
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, self.root)
+        return path if relative.startswith("..") else relative.replace(os.sep, "/")
+
+    def absolute(self, relative):
+        return relative if os.path.isabs(relative) else os.path.join(self.root, relative)
+
+    def is_internal(self, path):
+        # The store, the journals and the caches are never recorded
+        internal = os.path.dirname(os.path.abspath(self.directory))
+        return os.path.abspath(path).startswith(internal + os.sep)
+
+    # --- Recording commits (called by Transaction.commit) ------------------------------
+
+    def capture(self, entries):
+        # Before the staged files are renamed over their targets: the targets still hold
+        # the old contents (linked), the temp files the new ones (copied, they go live)
+        for entry in entries:
+            if not self.is_internal(entry["target"]):
+                self.add_file(entry["target"], entry["old_hash"], link=True)
+                self.add_file(entry["temp"], entry["new_hash"])
+
+    def record(self, transaction_id, entries, label=None):
+        # After the targets were replaced: one history line for the commit
+        files = {}
+        for entry in entries:
+            if self.is_internal(entry["target"]):
+                continue
+            files[self.relative(entry["target"])] = {"before": entry["old_hash"], "after": entry["new_hash"]}
+        if not files:
+            return None
+        line = {
+            "id": transaction_id,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "label": label if label is not None else " ".join([os.path.basename(sys.argv[0])] + sys.argv[1:]),
+            "files": files,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        # One write in append mode: concurrent commits never interleave their lines
+        fd = os.open(self.history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(line, sort_keys=True) + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+        return line
+
+    def history(self):
+        if not os.path.exists(self.history_path):
+            return []
+        entries = []
+        with open(self.history_path, "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue    # a line cut short by a crash
+        return entries
+
+    # --- Checkpoints -------------------------------------------------------------------
+
+    def checkpoint_directory(self, name):
+        if not name or "/" in name or name.startswith(".") or name.startswith("#") or name == "current":
+            raise SnapshotError(f"'{name}' cannot be used as a checkpoint name.")
+        return os.path.join(self.directory, "checkpoints", name)
+
+    def checkpoints(self):
+        directory = os.path.join(self.directory, "checkpoints")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if os.path.exists(os.path.join(directory, name, "manifest.json")))
+
+    def manifest(self, name):
+        try:
+            with open(os.path.join(self.checkpoint_directory(name), "manifest.json"), "r") as f:
+                return json.load(f)["files"]
+        except FileNotFoundError:
+            raise SnapshotError(f"No checkpoint named '{name}'.")
+
+    def create_checkpoint(self, name, paths, force=False):
+        directory = self.checkpoint_directory(name)
+        if os.path.exists(directory):
+            if not force:
+                raise SnapshotError(f"Checkpoint '{name}' already exists (use --force to replace it).")
+            shutil.rmtree(directory)
+        files = {}
+        for path in paths:
+            try:
+                with open(self.absolute(path), "rb") as f:
+                    content_hash = self.add_bytes(f.read())
+            except FileNotFoundError:
+                content_hash = None
+            files[self.relative(path)] = content_hash
+
+        staging = directory + f".tmp-{os.getpid()}"
+        for relative, content_hash in files.items():
+            if content_hash is None or os.path.isabs(relative):
+                continue
+            link_path = os.path.join(staging, "files", relative)
+            os.makedirs(os.path.dirname(link_path), exist_ok=True)
+            try:
+                os.link(self.object_path(content_hash), link_path)
+            except OSError:
+                shutil.copyfile(self.object_path(content_hash), link_path)
+        os.makedirs(staging, exist_ok=True)
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"name": name, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "files": files}, f,
+                      indent=2, sort_keys=True)
+        os.rename(staging, directory)
+        return files
+
+    def delete_checkpoint(self, name):
+        directory = self.checkpoint_directory(name)
+        if not os.path.exists(directory):
+            raise SnapshotError(f"No checkpoint named '{name}'.")
+        shutil.rmtree(directory)
+
+    # --- States ------------------------------------------------------------------------
+
+    def resolve(self, reference, paths=None):
+        # A state: path -> hash (None for a missing file). References:
+        #   <name>       a checkpoint
+        #   #N / #N~     the files after / before history entry N (1 = oldest, -1 = latest)
+        #   current      the files as they are now
+        if reference == "current":
+            return self.current(paths or default_files)
+        if reference.startswith("#"):
+            before = reference.endswith("~")
+            try:
+                number = int(reference[1:].rstrip("~"))
+            except ValueError:
+                raise SnapshotError(f"'{reference}' is not a history reference (#N or #N~).")
+            entries = self.history()
+            if number == 0 or abs(number) > len(entries):
+                raise SnapshotError(f"History has {len(entries)} entries, there is no {reference}.")
+            entry = entries[number - 1 if number > 0 else number]
+            return {path: hashes["before" if before else "after"] for path, hashes in entry["files"].items()}
+        return self.manifest(reference)
+
+    def current(self, paths):
+        # Relative paths are relative to the directory that holds .dashboard_ci
+        state = {}
+        for path in paths:
+            absolute = self.absolute(path)
+            try:
+                with open(absolute, "rb") as f:
+                    state[self.relative(absolute)] = _hash_bytes(f.read())
+            except FileNotFoundError:
+                state[self.relative(absolute)] = None
+        return state
+
+    def restore(self, state, label=None):
+        # Rewrites the files whose content differs from state, in one transaction.
+        # Returns (restored paths, paths that should not exist but do).
+        current = self.current(list(state))
+        changed = [path for path, content_hash in state.items()
+                   if content_hash is not None and current.get(path) != content_hash]
+        extra = [path for path, content_hash in state.items() if content_hash is None and current.get(path)]
+        if changed:
+            journal_dir = os.path.join(os.path.dirname(os.path.abspath(self.directory)), "transactions")
+            with Transaction(journal_dir, label=label) as transaction:
+                for path in changed:
+                    transaction.write(self.absolute(path), self.read_object(state[path]))
+        return changed, extra
+
+    def diff(self, old_state, new_state, old_label, new_label):
+        lines = []
+        for path in sorted(set(old_state) | set(new_state)):
+            old_hash, new_hash = old_state.get(path), new_state.get(path)
+            if old_hash == new_hash:
+                continue
+            old_text = self.read_object(old_hash).decode("utf-8", "replace") if old_hash else ""
+            new_text = self.read_object(new_hash).decode("utf-8", "replace") if new_hash else ""
+            lines.extend(difflib.unified_diff(old_text.splitlines(True), new_text.splitlines(True),
+                                              f"{old_label}/{path}", f"{new_label}/{path}"))
+        return lines
+
+    # --- Garbage collection ------------------------------------------------------------
+
+    def gc(self, keep=100):
+        # Keeps the last `keep` history entries and every checkpoint; deletes the objects
+        # nothing refers to any more. Returns (entries dropped, objects deleted, bytes freed).
+        entries = self.history()
+        dropped = max(len(entries) - keep, 0)
+        if dropped:
+            kept = entries[dropped:]
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "w") as f:
+                f.writelines(json.dumps(entry, sort_keys=True) + "\n" for entry in kept)
+            os.replace(temp_path, self.history_path)
+            entries = kept
+
+        referenced = set()
+        for entry in entries:
+            for hashes in entry["files"].values():
+                referenced.update(content_hash for content_hash in hashes.values() if content_hash)
+        for name in self.checkpoints():
+            referenced.update(content_hash for content_hash in self.manifest(name).values() if content_hash)
+
+        deleted = 0
+        freed = 0
+        objects = os.path.join(self.directory, "objects")
+        now = time.time()
+        for prefix in sorted(os.listdir(objects)) if os.path.isdir(objects) else []:
+            directory = os.path.join(objects, prefix)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                # ctime, not mtime: a hardlinked old version keeps the mtime of its file
+                if name in referenced or now - stat.st_ctime < gc_grace_seconds:
+                    continue
+                os.unlink(path)
+                deleted += 1
+                # Space only comes back when no checkpoint or working file shares the inode
+                if stat.st_nlink == 1:
+                    freed += stat.st_size
+            if not os.listdir(directory):
+                os.rmdir(directory)
+        return dropped, deleted, freed
+
+
+def _print_log(store, limit):
+    entries = store.history()
+    first = max(len(entries) - limit, 0) if limit else 0
+    for number, entry in enumerate(entries[first:], first + 1):
+        print(f"#{number}  {entry['time']}  {entry['label']}")
+        for path, hashes in sorted(entry["files"].items()):
+            print(f"      {path}  {_short(hashes['before'])} -> {_short(hashes['after'])}")
+    if not entries:
+        print("No commits recorded yet.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, list, diff and restore states of the edited files.")
+    parser.add_argument("--store", default=store_directory, help="snapshot store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    checkpoint = commands.add_parser("checkpoint", help="save the current files under a name")
+    checkpoint.add_argument("name")
+    checkpoint.add_argument("--file", action="append", help="file to include (repeatable, default: workflow and Gradle files)")
+    checkpoint.add_argument("--force", action="store_true", help="replace an existing checkpoint")
+    restore = commands.add_parser("restore", help="bring the files back to a checkpoint or history state")
+    restore.add_argument("reference", help="checkpoint name, #N or #N~")
+    undo = commands.add_parser("undo", help="restore the files as they were before a commit (default: the last one)")
+    undo.add_argument("number", nargs="?", type=int, default=-1, help="history entry (1 = oldest, -1 = latest)")
+    log = commands.add_parser("log", help="list the recorded commits")
+    log.add_argument("--limit", type=int, default=20, help="only the last N entries (0 for all)")
+    commands.add_parser("checkpoints", help="list the checkpoints")
+    delete = commands.add_parser("delete", help="delete a checkpoint")
+    delete.add_argument("name")
+    diff = commands.add_parser("diff", help="unified diff between two states (default: against the current files)")
+    diff.add_argument("old", help="checkpoint name, #N, #N~ or current")
+    diff.add_argument("new", nargs="?", default="current")
+    gc = commands.add_parser("gc", help="drop old history entries and unreferenced objects")
+    gc.add_argument("--keep", type=int, default=100, help="history entries to keep")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == "checkpoint":
+            paths = [os.path.abspath(path) for path in args.file] if args.file else default_files
+            files = store.create_checkpoint(args.name, paths, args.force)
+            print(f"Checkpoint '{args.name}': " + ", ".join(f"{path} {_short(content_hash)}"
+                                                            for path, content_hash in files.items()))
+        elif args.command in ("restore", "undo"):
+            reference = args.reference if args.command == "restore" else f"#{args.number}~"
+            changed, extra = store.restore(store.resolve(reference), label=f"snapshot_store.py restore {reference}")
+            for path in changed:
+                print(f"Restored {path}.")
+            for path in extra:
+                print(f"Warning: {path} did not exist in {reference}; left in place.")
+            if not changed:
+                print(f"The files already match {reference}.")
+        elif args.command == "log":
+            _print_log(store, args.limit)
+        elif args.command == "checkpoints":
+            for name in store.checkpoints():
+                print(f"{name}  " + ", ".join(f"{path} {_short(content_hash)}"
+                                              for path, content_hash in sorted(store.manifest(name).items())))
+        elif args.command == "delete":
+            store.delete_checkpoint(args.name)
+            print(f"Deleted checkpoint '{args.name}'.")
+        elif args.command == "diff":
+            old_state = store.resolve(args.old)
+            new_state = store.resolve(args.new, list(old_state))
+            if args.old == "current":
+                old_state = store.current(list(new_state))
+            sys.stdout.writelines(store.diff(old_state, new_state, args.old, args.new))
+        elif args.command == "gc":
+            dropped, deleted, freed = store.gc(args.keep)
+            print(f"Dropped {dropped} history entries, deleted {deleted} objects ({freed} bytes freed).")
+    except SnapshotError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# Python script to run line-oriented transforms as a streaming filter (stdin -> stdout).
+#
+# The regular scripts read the whole file, build one or two full copies of it and write
+# it back. For very large generated files the transforms below run instead as generator
+# stages: each stage takes an iterator of lines and yields lines, so the stages chain
+# lazily and memory stays bounded by the largest block a stage has to hold back (the
+# keystore block), not by the size of the file.
+#
+# Stages:
+#   sanitize-import        one "import java.util.Properties" at the very top (sanitize_gradle.py)
+#   drop-keystore-block    remove the keystore.properties loading block, wherever it is
+#   insert-keystore-block  put the keystore block inside android {}, before signingConfigs {}
+#   rename-app-id          rewrite namespace / applicationId (--old-id / --new-id)
+#   comment-steps          comment out workflow steps by name (--step, repeatable)
+#
+# Usage:
+#   python streaming_transforms.py drop-keystore-block insert-keystore-block < in.kts > out.kts
+#   python streaming_transforms.py comment-steps --step "Decode Keystore" --file .github/workflows/android_build.yml
+
+import argparse
+import sys
+
+from transaction import Transaction
+
+default_old_application_id = "com.example.flutter_dashboard_app"
+default_new_application_id = "com.jules.flutter_dashboard_app"
+
+default_commented_steps = ("Build Android APK (Release)", "Upload APK Artifact (Release)")
+
+properties_import_line = "import java.util.Properties\n"
+
+keystore_block_lines = [
+    "    val keystorePropertiesFile = rootProject.file(\"keystore.properties\")\n",
+    "    val keystoreProperties = java.util.Properties()\n",
+    "    if (keystorePropertiesFile.exists()) {\n",
+    "        keystorePropertiesFile.inputStream().use { keystoreProperties.load(it) }\n",
+    "    }\n",
+]
+
+
+# --- Brace counting across lines -------------------------------------------------------
+
+class BraceCounter:
+    # Line by line counterpart of the gradle_block_tree lexer: counts "{" and "}" outside
+    # comments and string literals. Block comments and raw strings may span lines, so
+    # that state is carried from one line to the next; nothing else is kept.
+
+    def __init__(self):
+        self.depth = 0
+        self.comment_nesting = 0
+        self.in_raw_string = False
+
+    def feed(self, line):
+        # Returns the depth before the line; self.depth is the depth after it
+        before = self.depth
+        i = 0
+        length = len(line)
+        while i < length:
+            if self.comment_nesting:
+                if line.startswith("/*", i):
+                    self.comment_nesting += 1
+                    i += 2
+                elif line.startswith("*/", i):
+                    self.comment_nesting -= 1
+                    i += 2
+                else:
+                    i += 1
+            elif self.in_raw_string:
+                end = line.find('"""', i)
+                if end == -1:
+                    break
+                self.in_raw_string = False
+                i = end + 3
+            elif line.startswith("//", i):
+                break
+            elif line.startswith("/*", i):
+                self.comment_nesting = 1
+                i += 2
+            elif line.startswith('"""', i):
+                self.in_raw_string = True
+                i += 3
+            elif line[i] == '"':
+                i = self._skip_string(line, i + 1)
+            elif line[i] == "'":
+                end = line.find("'", i + 2 if line.startswith("'\\", i) else i + 1)
+                i = length if end == -1 else end + 1
+            elif line[i] == "{":
+                self.depth += 1
+                i += 1
+            elif line[i] == "}":
+                self.depth -= 1
+                i += 1
+            else:
+                i += 1
+        return before
+
+    @staticmethod
+    def _skip_string(line, i):
+        # i is just after the opening quote; ${...} templates may contain braces and quotes
+        template_depth = 0
+        while i < len(line):
+            char = line[i]
+            if char == "\\":
+                i += 2
+            elif template_depth:
+                if char == "{":
+                    template_depth += 1
+                elif char == "}":
+                    template_depth -= 1
+                i += 1
+            elif line.startswith("${", i):
+                template_depth = 1
+                i += 2
+            elif char == '"':
+                return i + 1
+            else:
+                i += 1
+        return i
+
+
+# --- Gradle stages ---------------------------------------------------------------------
+
+def sanitize_import(lines):
+    # Same output as sanitize_gradle(): the import first, a blank line, then the file
+    # without any other copy of the import and without its leading blank lines.
+    yield properties_import_line
+    started = False
+    for line in lines:
+        if line.strip() == "import java.util.Properties":
+            continue
+        if line.strip().startswith("val keystoreProperties = java.util.Properties()"):
+            line = "val keystoreProperties = java.util.Properties()\n"
+        if not started:
+            if line.strip() == "":
+                continue
+            started = True
+            yield "\n"
+        yield line
+
+
+def _is_keystore_block_start(stripped):
+    return stripped.startswith("val keystorePropertiesFile = rootProject.file(")
+
+
+def drop_keystore_block(lines):
+    # Removes "val keystorePropertiesFile = ...", "val keystoreProperties = ..." and the
+    # "if (keystorePropertiesFile.exists()) { ... }" that loads it. The block is held
+    # back until its if closes; if something else turns up first (or the input ends),
+    # the held lines are passed through unchanged instead of guessing.
+    held = []
+    counter = None
+    seen_if = False
+    for line in lines:
+        stripped = line.strip()
+        if not held:
+            if _is_keystore_block_start(stripped):
+                held = [line]
+                counter = BraceCounter()
+                counter.feed(line)
+                seen_if = False
+            else:
+                yield line
+            continue
+
+        at_top_of_block = counter.depth == 0
+        if at_top_of_block and not (stripped == "" or stripped.startswith("val keystoreProperties")
+                                    or stripped.startswith("if (keystorePropertiesFile.exists())")):
+            yield from held
+            held = []
+            if _is_keystore_block_start(stripped):
+                held = [line]
+                counter = BraceCounter()
+                counter.feed(line)
+                seen_if = False
+            else:
+                yield line
+            continue
+
+        held.append(line)
+        counter.feed(line)
+        if stripped.startswith("if (keystorePropertiesFile.exists())"):
+            seen_if = True
+        if seen_if and counter.depth == 0:
+            held = []
+    yield from held
+
+
+def insert_keystore_block(lines):
+    # Emits keystore_block_lines (and a blank line) before "signingConfigs {" directly
+    # inside android {}, or before the closing brace of android {} when there is none.
+    counter = BraceCounter()
+    android_depth = None
+    placed = False
+    for line in lines:
+        stripped = line.strip()
+        if placed:
+            yield line
+            continue
+        depth = counter.feed(line)
+        if android_depth is None:
+            if depth == 0 and stripped.startswith("android {"):
+                android_depth = depth + 1
+            yield line
+            continue
+        if depth == android_depth and stripped.startswith("signingConfigs {"):
+            yield from keystore_block_lines
+            yield "\n"
+            placed = True
+        elif counter.depth < android_depth:
+            yield from keystore_block_lines
+            placed = True
+        yield line
+
+
+def rename_application_id(lines, old_id=default_old_application_id, new_id=default_new_application_id):
+    namespace_find = f'namespace = "{old_id}"'
+    application_id_find = f'applicationId = "{old_id}"'
+    for line in lines:
+        if namespace_find in line:
+            line = line.replace(namespace_find, f'namespace = "{new_id}"')
+        if application_id_find in line:
+            line = line.replace(application_id_find, f'applicationId = "{new_id}"')
+        yield line
+
+
+# --- Workflow stages -------------------------------------------------------------------
+
+def comment_steps(lines, step_names=default_commented_steps):
+    # Comments out every line of the named steps with a plain "#" (toggle_steps.py adds
+    # a marker to re-enable them; this stage does not). A step ends at the next line
+    # (other than a blank or comment) indented no deeper than its "- name:" line; blank
+    # lines are kept as they are. Nothing is buffered.
+    headers = {f"- name: {name}" for name in step_names}
+    step_indent = None
+    for line in lines:
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if step_indent is not None and stripped and not stripped.startswith("#") and indent <= step_indent:
+            step_indent = None
+        if stripped in headers:
+            step_indent = indent
+        if step_indent is not None and stripped:
+            yield "#" + line
+        else:
+            yield line
+
+
+# --- Stage registry and filter -----------------------------------------------------------
+
+# name -> function(lines, args) returning an iterator of lines
+stages = {
+    "sanitize-import": lambda lines, args: sanitize_import(lines),
+    "drop-keystore-block": lambda lines, args: drop_keystore_block(lines),
+    "insert-keystore-block": lambda lines, args: insert_keystore_block(lines),
+    "rename-app-id": lambda lines, args: rename_application_id(lines, args.old_id, args.new_id),
+    "comment-steps": lambda lines, args: comment_steps(lines, args.step or default_commented_steps),
+}
+
+
+def build_stream(lines, stage_names, args):
+    for name in stage_names:
+        if name not in stages:
+            raise KeyError(f"Unknown stage '{name}'. Available: {', '.join(stages)}")
+        lines = stages[name](lines, args)
+    return lines
+
+
+def filter_stream(input_stream, output_stream, stage_names, args):
+    count = 0
+    for line in build_stream(iter(input_stream), stage_names, args):
+        output_stream.write(line)
+        count += 1
+    return count
+
+
+def filter_file(file_path, stage_names, args):
+    # In place, still streaming: the filtered lines go straight into the staged copy of a
+    # transaction, which keeps the file's mode, reaches the disk before it replaces the
+    # file and is recorded in the snapshot store like every other write
+    count = 0
+
+    def counted(lines):
+        nonlocal count
+        for line in lines:
+            count += 1
+            yield line
+
+    with open(file_path, "r", newline="") as source, Transaction() as transaction:
+        transaction.write_chunks(file_path, counted(build_stream(iter(source), stage_names, args)))
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run line-oriented transforms as a bounded-memory stream.")
+    parser.add_argument("stages", nargs="*", help=f"stages to chain, in order ({', '.join(stages)})")
+    parser.add_argument("--file", help="transform this file in place instead of filtering stdin to stdout")
+    parser.add_argument("--old-id", default=default_old_application_id, help="namespace/applicationId to replace")
+    parser.add_argument("--new-id", default=default_new_application_id, help="namespace/applicationId to write")
+    parser.add_argument("--step", action="append", help="step name for comment-steps (repeatable)")
+    args = parser.parse_args(argv)
+
+    if not args.stages:
+        parser.print_help(sys.stderr)
+        return 2
+    for name in args.stages:
+        if name not in stages:
+            print(f"Error: unknown stage '{name}'. Available: {', '.join(stages)}", file=sys.stderr)
+            return 2
+
+    if args.file:
+        count = filter_file(args.file, args.stages, args)
+        print(f"Streamed {count} lines of {args.file} through {', '.join(args.stages)}.", file=sys.stderr)
+    else:
+        filter_stream(sys.stdin, sys.stdout, args.stages, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
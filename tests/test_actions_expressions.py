@@ -0,0 +1,21 @@
+from actions_expressions import ExpressionRewriter, scan
+
+
+def test_rename_goes_on_after_an_unterminated_expression():
+    text = ("      - run: echo ${{ stray\n"
+            "        env:\n"
+            "          KEY: ${{ secrets.OLD_NAME }}\n"
+            "          OTHER: ${{ secrets['OLD_NAME'] }}\n")
+    rewriter = ExpressionRewriter({"secrets.OLD_NAME": "secrets.NEW_NAME"}, normalize=True)
+    new_text, count = rewriter.rewrite(text)
+    assert count == 2
+    assert "${{ stray\n" in new_text
+    assert "KEY: ${{ secrets.NEW_NAME }}" in new_text
+    assert "OTHER: ${{ secrets['NEW_NAME'] }}" in new_text
+    assert [expression.line for expression in rewriter.unterminated] == [1]
+
+
+def test_scan_lists_the_expressions_after_an_unterminated_one():
+    expressions = scan("a: ${{ b\nc: ${{ d }}\ne: ${{")
+    assert [(expression.line, expression.closed) for expression in expressions] == [(1, False), (2, True), (3, False)]
+    assert expressions[1].body == " d "
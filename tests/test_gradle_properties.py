@@ -0,0 +1,33 @@
+import pytest
+
+from gradle_properties import minimum_memory, recommended_settings, reserved_memory, runner_profiles, worker_memory
+
+
+def _planned(settings):
+    gradle_heap = int(settings["org.gradle.jvmargs"]["-Xmx"][:-1])
+    metaspace = int(settings["org.gradle.jvmargs"]["-XX:MaxMetaspaceSize="][:-1])
+    kotlin_heap = int(settings["kotlin.daemon.jvmargs"]["-Xmx"][:-1])
+    workers = int(settings["org.gradle.workers.max"])
+    return reserved_memory + gradle_heap + metaspace + kotlin_heap + workers * worker_memory
+
+
+@pytest.mark.parametrize("memory", [minimum_memory, minimum_memory + 1, reserved_memory + 1500, 3500, 4096, 5000,
+                                    7168, 16384, 65536])
+def test_plan_fits_in_memory(memory):
+    assert _planned(recommended_settings(4, memory)) <= memory
+
+
+def test_every_size_from_the_minimum_fits():
+    for memory in range(minimum_memory, 12288, 32):
+        assert _planned(recommended_settings(2, memory)) <= memory, memory
+
+
+def test_github_private_profile_fits():
+    cores, memory = runner_profiles["github-private"]
+    assert _planned(recommended_settings(cores, memory)) <= memory
+
+
+@pytest.mark.parametrize("memory", [reserved_memory + 1, minimum_memory - 1])
+def test_memory_below_the_minimum_is_refused(memory):
+    with pytest.raises(ValueError):
+        recommended_settings(2, memory)
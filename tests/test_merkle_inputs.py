@@ -0,0 +1,43 @@
+from merkle_inputs import add_step_guards, build_manifest
+
+workflow = """name: Android Build
+on: workflow_dispatch
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+      - name: Checkout code
+        uses: actions/checkout@v4
+      - name: Set up Flutter
+        uses: subosito/flutter-action@v2
+        with:
+          flutter-version: '3.22.2'
+      - name: Decode Keystore
+        working-directory: ./app/android/app
+        run: echo "$KEYSTORE" | base64 -d > keystore.jks
+      - name: Build APK (release)
+        working-directory: ./app
+        run: flutter build apk --release
+"""
+
+
+def _digest(lines, root):
+    manifest, cache, files = build_manifest(lines, str(root))
+    return manifest["steps"]["Build APK (release)"]["digest"]
+
+
+def test_digest_covers_the_toolchain_of_earlier_steps(tmp_path):
+    (tmp_path / "app" / "lib").mkdir(parents=True)
+    (tmp_path / "app" / "lib" / "main.dart").write_text("void main() {}\n")
+    lines = workflow.splitlines(True)
+    bumped = workflow.replace("'3.22.2'", "'3.24.0'").splitlines(True)
+    assert _digest(lines, tmp_path) == _digest(lines, tmp_path)
+    assert _digest(lines, tmp_path) != _digest(bumped, tmp_path)
+
+
+def test_guard_hashes_after_the_steps_before_it(tmp_path):
+    text = "".join(add_step_guards(workflow.splitlines(True), ["Build APK (release)"], str(tmp_path)))
+    names = [line.strip()[len("- name: "):] for line in text.splitlines() if line.strip().startswith("- name: ")]
+    assert names.index("Decode Keystore") < names.index("Hash inputs of Build APK (release)")
+    assert names.index("Hash inputs of Build APK (release)") + 1 == names.index("Check inputs of Build APK (release)")
+    assert "steps.merkle_build_apk_release.outputs.build_apk_release" in text
@@ -0,0 +1,55 @@
+import pytest
+
+from abi_matrix import abi_matrix
+from release_profile_step import release_profile_step
+
+workflow = """name: Android Build
+on: workflow_dispatch
+jobs:
+  build:
+    name: Build Flutter Android APK (Release)
+    runs-on: ubuntu-latest
+    steps:
+      - name: Checkout code
+        uses: actions/checkout@v4
+      - name: Build APK (release)
+        working-directory: ./flutter_dashboard_app
+        run: flutter build apk --release --verbose 2>&1
+      - name: Upload APK artifact
+        uses: actions/upload-artifact@v4
+        with:
+          name: app-release.apk
+          path: flutter_dashboard_app/build/app/outputs/flutter-apk/app-release.apk
+"""
+
+
+def _sharded():
+    return abi_matrix(workflow.splitlines(True), max_parallel=2)
+
+
+def test_profile_after_abi_matrix_keeps_the_shard_artifacts():
+    text = "".join(release_profile_step(_sharded(), "devices"))
+    assert "name: app-release.apk" not in text
+    assert "name: apk-${{ matrix.abi }}" in text
+    assert "name: symbols-${{ matrix.abi }}" in text
+    assert "--target-platform ${{ matrix.target-platform }}" in text
+    assert "--obfuscate" in text
+    # The profile's platforms are the shards; the strategy settings are kept
+    assert "android-arm64" in text and "android-x64" not in text
+    assert "max-parallel: 2" in text
+    assert "collect-apks:" in text and "pattern: symbols-*" in text
+
+    again = text.splitlines(True)
+    assert release_profile_step(again, "devices") is again
+
+
+def test_profile_without_obfuscation_drops_the_shard_symbols():
+    text = "".join(release_profile_step(release_profile_step(_sharded(), "split-obfuscated"), "split"))
+    assert "--obfuscate" not in text
+    assert "symbols-" not in text
+    assert "name: apk-${{ matrix.abi }}" in text
+
+
+def test_universal_profile_is_refused_on_a_sharded_job():
+    with pytest.raises(ValueError):
+        release_profile_step(_sharded(), "universal")
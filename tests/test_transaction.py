@@ -0,0 +1,38 @@
+import os
+
+from transaction import Transaction, recover
+
+
+def test_recover_leaves_a_live_transaction_alone(tmp_path):
+    journal_dir = str(tmp_path / "transactions")
+    target = tmp_path / "gradle.properties"
+    target.write_text("old\n")
+
+    transaction = Transaction(journal_dir, snapshots=False)
+    transaction.write(str(target), "new\n")
+    # The second call must not find the lock file of the first one gone
+    assert recover(journal_dir) == []
+    assert recover(journal_dir) == []
+    assert os.path.exists(transaction.entries[str(target)]["temp"])
+
+    transaction.commit()
+    assert target.read_text() == "new\n"
+    assert os.listdir(journal_dir) == []
+
+
+def test_recover_rolls_back_an_abandoned_transaction(tmp_path):
+    journal_dir = str(tmp_path / "transactions")
+    target = tmp_path / "gradle.properties"
+    target.write_text("old\n")
+
+    transaction = Transaction(journal_dir, snapshots=False)
+    transaction.write(str(target), "new\n")
+    temp_path = transaction.entries[str(target)]["temp"]
+    # The owner dies: its lock goes with its file descriptor
+    os.close(transaction._journal_fd)
+    transaction._journal_fd = None
+
+    assert recover(journal_dir) == [(transaction.id, "rolled back")]
+    assert not os.path.exists(temp_path)
+    assert target.read_text() == "old\n"
+    assert os.listdir(journal_dir) == []
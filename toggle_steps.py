@@ -0,0 +1,232 @@
+# Python script to disable (comment out) and re-enable steps of
+# .github/workflows/android_build.yml, any number of them in one pass.
+#
+# Steps are selected by name or id, exactly or with a glob ("Build*", "Upload * (Release)").
+# Disabling finds every selected step in the WorkflowDocument index (built in one scan),
+# whatever the number of selectors: exact names are a set lookup, the globs one combined
+# regex. Every line of a selected step gets a marker at the step's indentation:
+#
+#       #[off:diagnosis] - name: Build Android APK (Release)
+#       #[off:diagnosis]   run: flutter build apk --release
+#
+# The marker is the only thing added, so enabling removes it and gives back the step
+# byte for byte. The tag says which run disabled the step: enabling by tag brings back
+# exactly what that run disabled, and leaves the steps other runs (or a hand-written "#")
+# commented out. Steps already disabled are comments for the index and are left alone.
+#
+# Usage:
+#   python toggle_steps.py --list
+#   python toggle_steps.py --disable "Build Android APK (Release)" --disable "Upload*" --tag diagnosis
+#   python toggle_steps.py --enable-tag diagnosis
+#   python toggle_steps.py --enable "Decode Keystore" [--dry-run]
+
+import argparse
+import collections
+import fnmatch
+import re
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+default_tag = "off"
+
+_marker_pattern = re.compile(r"^( *)#\[off:([\w.-]+)\] ")
+_tag_pattern = re.compile(r"^[\w.-]+$")
+_key_pattern = re.compile(r"^(name|id):\s*(.*?)\s*$")
+
+# A disabled step: lines [start, end) carry the marker of tag (blank lines in between
+# included); name / id as they were when the step was disabled
+DisabledStep = collections.namedtuple("DisabledStep", ["name", "id", "tag", "start", "end"])
+
+
+def marker(tag):
+    if not _tag_pattern.match(tag):
+        raise ValueError(f"Invalid tag '{tag}': use letters, digits, '_', '.' or '-'.")
+    return f"#[off:{tag}] "
+
+
+def disable_line(line, indent, prefix):
+    # prefix: marker(tag), at the step's indentation (or before a less indented comment)
+    if not line.strip():
+        return line
+    column = min(indent, len(line) - len(line.lstrip(" ")))
+    return line[:column] + prefix + line[column:]
+
+
+def enable_line(line):
+    match = _marker_pattern.match(line)
+    if match is None:
+        return line
+    return match.group(1) + line[match.end():]
+
+
+class StepSelector:
+    def __init__(self, patterns):
+        self.names = set()
+        globs = []
+        for pattern in patterns:
+            if any(char in pattern for char in "*?["):
+                globs.append(pattern)
+            else:
+                self.names.add(pattern)
+        self.regex = re.compile("|".join(fnmatch.translate(glob) for glob in globs)) if globs else None
+
+    def __bool__(self):
+        return bool(self.names) or self.regex is not None
+
+    def matches(self, name, step_id=None):
+        for key in (name, step_id):
+            if key is None:
+                continue
+            if key in self.names or (self.regex is not None and self.regex.match(key)):
+                return True
+        return False
+
+
+# --- Disabled steps --------------------------------------------------------------------
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+        return value[1:-1]
+    comment_index = value.find(" #")
+    return value[:comment_index].rstrip() if comment_index != -1 else value
+
+
+def disabled_steps(lines):
+    # One pass over the lines; a new step starts at a marked "- " line at the marker's
+    # column, or where the tag changes
+    steps = []
+    current = None      # [name, id, tag, start, end, column]
+    for index, line in enumerate(lines):
+        if "#[off:" not in line:
+            if current is not None and line.strip():
+                steps.append(DisabledStep(*current[:5]))
+                current = None
+            continue
+        match = _marker_pattern.match(line)
+        if match is None:
+            continue
+        column = len(match.group(1))
+        content = line[match.end():]
+        if current is None or current[2] != match.group(2) or (column == current[5] and content.startswith("- ")):
+            if current is not None:
+                steps.append(DisabledStep(*current[:5]))
+            current = [None, None, match.group(2), index, index + 1, column]
+        current[4] = index + 1
+        # The keys of the step itself, two columns right of its "-"
+        if content.startswith("- ") or (content.startswith("  ") and not content[2:3].isspace()):
+            key_match = _key_pattern.match(content[2:])
+            if key_match:
+                slot = 0 if key_match.group(1) == "name" else 1
+                if current[slot] is None:
+                    current[slot] = _unquote(key_match.group(2))
+    if current is not None:
+        steps.append(DisabledStep(*current[:5]))
+    return steps
+
+
+# --- Toggling --------------------------------------------------------------------------
+
+def disable_steps(lines, patterns, tag=default_tag, job=None):
+    # Returns the same list when no enabled step matches
+    selector = StepSelector(patterns)
+    prefix = marker(tag)
+    if not selector:
+        return lines
+    document = WorkflowDocument.from_lines(lines)
+    # The spans count the document's lines (an item of lines may hold several)
+    source = None
+    for span in document.steps(job):
+        if selector.matches(span.name, span.id):
+            source = source or document.original_lines()
+            document.replace_lines(span.start, span.end,
+                                   [disable_line(line, span.indent, prefix) for line in source[span.start:span.end]])
+    if not document.is_modified():
+        return lines
+    return document.lines()
+
+
+def enable_steps(lines, patterns=(), tags=()):
+    # Re-enables the disabled steps matching one of the patterns (any tag) or one of
+    # the tags (any name); with both, a step has to match both
+    selector = StepSelector(patterns)
+    tags = set(tags)
+    if not selector and not tags:
+        return lines
+    text = "".join(lines)
+    if "#[off:" not in text:
+        return lines
+    # One physical line per item (an item of lines may hold several); the same list is
+    # returned when no disabled step matches
+    split_lines = text.splitlines(True)
+    selected = [step for step in disabled_steps(split_lines)
+                if (not tags or step.tag in tags) and (not selector or selector.matches(step.name, step.id))]
+    if not selected:
+        return lines
+    new_lines = []
+    position = 0
+    for step in selected:
+        new_lines.extend(split_lines[position:step.start])
+        new_lines.extend(enable_line(line) for line in split_lines[step.start:step.end])
+        position = step.end
+    new_lines.extend(split_lines[position:])
+    return new_lines
+
+
+def toggle_steps(lines, disable=(), enable=(), enable_tags=(), tag=default_tag, job=None):
+    # Enabling first, so that a step can be re-enabled and disabled again under another tag
+    lines = enable_steps(lines, enable, enable_tags)
+    return disable_steps(lines, disable, tag, job)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Disable and re-enable workflow steps.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file")
+    parser.add_argument("--disable", action="append", default=[], metavar="STEP",
+                        help="name, id or glob of the steps to disable; can be repeated")
+    parser.add_argument("--enable", action="append", default=[], metavar="STEP",
+                        help="name, id or glob of the disabled steps to enable; can be repeated")
+    parser.add_argument("--enable-tag", action="append", default=[], metavar="TAG",
+                        help="enable every step disabled with this tag; can be repeated")
+    parser.add_argument("--tag", default=default_tag, help=f"tag of the steps disabled now (default: {default_tag})")
+    parser.add_argument("--job", help="only disable steps of this job")
+    parser.add_argument("--list", action="store_true", help="list the enabled and the disabled steps")
+    parser.add_argument("--dry-run", action="store_true", help="print what would change without writing")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+
+    if args.list or not (args.disable or args.enable or args.enable_tag):
+        for span in WorkflowDocument.from_lines(lines).steps():
+            print(f"  {'on':<20}  {span.job}: {span.name or span.id or '(unnamed)'}")
+        for step in disabled_steps(lines):
+            print(f"  {'off [' + step.tag + ']':<20}  {step.name or step.id or '(unnamed)'} (line {step.start + 1})")
+        return 0
+
+    try:
+        enabled_lines = enable_steps(lines, args.enable, args.enable_tag)
+        new_lines = disable_steps(enabled_lines, args.disable, args.tag, args.job)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    if new_lines is lines:
+        print(f"No step of {args.file} to enable or disable.")
+        return 0
+
+    remaining = len(disabled_steps(enabled_lines))
+    enabled = len(disabled_steps(lines)) - remaining
+    disabled = len(disabled_steps(new_lines)) - remaining
+    if args.dry_run:
+        print(f"Would enable {enabled} and disable {disabled} step(s) in {args.file}.")
+        return 0
+    write_file(args.file, "".join(new_lines))
+    print(f"Enabled {enabled} and disabled {disabled} step(s) in {args.file}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
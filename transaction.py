@@ -0,0 +1,374 @@
+# Python module to commit changes to several files (build.gradle.kts, gradle.properties,
+# android_build.yml, ...) as one transaction.
+#
+# Nothing is written in place. Every new content is staged in a temp file in the same
+# directory as its target, all temp files are fsynced as one batch, and only then are
+# they renamed over their targets (os.replace is atomic within a directory). A journal
+# records the staged files, so a commit interrupted by a crash can be finished (roll
+# forward) or undone (roll back) by recover():
+#
+#   1. stage:    temp files written next to their targets, journal lists them ("prepared")
+#   2. commit:   temp files fsynced as one batch, journal switched to "committed"
+#                (the commit point)
+#   3. publish:  temp files renamed over the targets, each directory fsynced once
+#   4. done:     journal removed
+#
+# A "prepared" journal is rolled back (temp files deleted, targets were never touched);
+# a "committed" one is rolled forward (the remaining renames are done).
+#
+# Concurrency: a transaction holds an exclusive flock on the directory of every target
+# while it commits (taken in a fixed order, so two transactions never deadlock), and it
+# refuses to overwrite a file that changed since it was read (TransactionConflictError).
+# The owner of a journal keeps it locked, so recover() never touches a live transaction.
+#
+# Every commit is also recorded in the snapshot store next to the journal directory
+# (snapshot_store.py): the old contents are linked into it before they are replaced, the
+# new ones added after, with one history line per commit. Transaction(snapshots=False)
+# skips that.
+#
+# Usage:
+#   with Transaction() as transaction:
+#       transaction.write(gradle_file_path, new_gradle_content)
+#       transaction.write(workflow_file_path, new_workflow_content)
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (e.g. Windows): transactions still stage, journal and rename atomically
+    fcntl = None
+
+journal_directory = ".dashboard_ci/transactions"
+
+PREPARED = "prepared"
+COMMITTED = "committed"
+
+
+class TransactionError(Exception):
+    pass
+
+
+class TransactionConflictError(TransactionError):
+    pass
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Some file systems do not support fsync on directories
+        pass
+    finally:
+        os.close(fd)
+
+
+def _lock(fd, timeout=None):
+    if fcntl is None:
+        return
+    if timeout is None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                raise TransactionError(f"Timed out after {timeout} s waiting for a lock.")
+            time.sleep(0.01)
+
+
+def _try_lock(fd):
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _write_journal(path, journal):
+    # The journal itself is replaced atomically, so it is always either the old or the new state
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(journal, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+class Transaction:
+    def __init__(self, journal_dir=journal_directory, lock_timeout=None, snapshots=True, label=None):
+        self.journal_dir = journal_dir
+        self.lock_timeout = lock_timeout
+        self.snapshots = snapshots
+        self.label = label          # recorded in the snapshot history (default: the command line)
+        self.id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.journal_path = os.path.join(journal_dir, self.id + ".json")
+        self.entries = {}           # target path -> {"target", "temp", "old_hash", "new_hash"}
+        self.expected_hashes = {}   # target path -> hash seen by read(), None if missing
+        self.state = "open"
+        self._journal_fd = None
+
+    def _journal(self, state):
+        return {"id": self.id, "state": state, "entries": list(self.entries.values())}
+
+    # --- Reading and staging -----------------------------------------------------------
+
+    def read(self, path):
+        # Current content of path inside the transaction: the staged text if any.
+        # Remembers what was read, so commit() detects a concurrent change.
+        path = os.path.abspath(path)
+        if path in self.entries:
+            with open(self.entries[path]["temp"], "r") as f:
+                return f.read()
+        with open(path, "rb") as f:
+            data = f.read()
+        self.expected_hashes.setdefault(path, hashlib.sha256(data).hexdigest())
+        return data.decode("utf-8")
+
+    def write(self, path, content):
+        self.write_chunks(path, [content])
+
+    def write_chunks(self, path, chunks):
+        # Stages the str / bytes chunks of an iterable as the new content of path, one at
+        # a time: a streamed file is never held in memory as a whole
+        if self.state != "open":
+            raise TransactionError(f"Transaction is {self.state}.")
+        path = os.path.abspath(path)
+        if path not in self.expected_hashes:
+            self.expected_hashes[path] = _hash_file(path)
+
+        if self._journal_fd is None:
+            # The journal exists (locked by us) from the first staged file on, so
+            # recover() can clean up temp files left by a process that died here
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._journal_fd = os.open(self.journal_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            _lock(self._journal_fd)
+
+        directory = os.path.dirname(path)
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.txn-{self.id}")
+        self.entries[path] = {
+            "target": path,
+            "temp": temp_path,
+            "old_hash": self.expected_hashes[path],
+            "new_hash": None,       # known once the last chunk is written
+        }
+        _write_journal(self.journal_path, self._journal(PREPARED))
+        digest = hashlib.sha256()
+        with open(temp_path, "wb") as f:
+            for chunk in chunks:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                digest.update(data)
+                f.write(data)
+        self.entries[path]["new_hash"] = digest.hexdigest()
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+
+    def is_modified(self):
+        return bool(self.entries)
+
+    # --- Commit and rollback -------------------------------------------------------------
+
+    def commit(self):
+        if self.state != "open":
+            raise TransactionError(f"Transaction is {self.state}.")
+        # A file that would not change is not touched at all
+        for path, entry in list(self.entries.items()):
+            if entry["new_hash"] == entry["old_hash"]:
+                os.unlink(entry["temp"])
+                del self.entries[path]
+        if not self.entries:
+            self.state = "committed"
+            self._release()
+            return []
+
+        directory_fds = []
+        try:
+            for directory in sorted({os.path.dirname(path) for path in self.entries}):
+                fd = os.open(directory, os.O_RDONLY)
+                directory_fds.append(fd)
+                _lock(fd, self.lock_timeout)
+
+            # Under the locks: nobody may have changed the targets since we read them
+            for path, entry in self.entries.items():
+                if _hash_file(path) != entry["old_hash"]:
+                    raise TransactionConflictError(f"{path} was modified by someone else during the transaction.")
+            store = self._snapshot_store()
+            if store is not None:
+                try:
+                    store.capture(self.entries.values())
+                except OSError as e:
+                    print(f"Warning: old contents not recorded in the snapshot store: {e}")
+                    store = None
+
+            # 1. All temp files reach the disk, in one batch
+            for entry in self.entries.values():
+                fd = os.open(entry["temp"], os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+            # 2. Commit point
+            journal = self._journal(COMMITTED)
+            _write_journal(self.journal_path, journal)
+            self.state = "committed"
+
+            # 3. Publish
+            _publish(journal)
+            os.unlink(self.journal_path)
+            if store is not None:
+                try:
+                    store.record(self.id, self.entries.values(), self.label)
+                except OSError as e:
+                    print(f"Warning: commit not recorded in the snapshot store: {e}")
+        except BaseException:
+            if self.state != "committed":
+                self.rollback()
+            # A failure after the commit point leaves the journal for recover()
+            raise
+        finally:
+            for fd in directory_fds:
+                os.close(fd)
+            self._release(remove_journal=False)
+        return sorted(self.entries)
+
+    def _snapshot_store(self):
+        if not self.snapshots:
+            return None
+        # Imported here: snapshot_store itself restores files through transactions
+        from snapshot_store import SnapshotStore
+        return SnapshotStore(os.path.join(os.path.dirname(self.journal_dir), "snapshots"))
+
+    def rollback(self):
+        for entry in self.entries.values():
+            try:
+                os.unlink(entry["temp"])
+            except FileNotFoundError:
+                pass
+        self.state = "rolled back"
+        self._release()
+
+    def _release(self, remove_journal=True):
+        if remove_journal:
+            try:
+                os.unlink(self.journal_path)
+            except FileNotFoundError:
+                pass
+        if self._journal_fd is not None:
+            try:
+                os.unlink(self.journal_path + ".lock")
+            except FileNotFoundError:
+                pass
+            os.close(self._journal_fd)
+            self._journal_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        elif self.state == "open":
+            self.rollback()
+        return False
+
+
+def _publish(journal):
+    directories = set()
+    for entry in journal["entries"]:
+        if os.path.exists(entry["temp"]):
+            os.replace(entry["temp"], entry["target"])
+        directories.add(os.path.dirname(entry["target"]))
+    for directory in sorted(directories):
+        _fsync_directory(directory)
+
+
+def recover(journal_dir=journal_directory):
+    # Finishes or undoes the commits that were interrupted. Returns [(id, action)].
+    if not os.path.isdir(journal_dir):
+        return []
+    recovered = []
+    for name in sorted(os.listdir(journal_dir)):
+        if not name.endswith(".json"):
+            continue
+        journal_path = os.path.join(journal_dir, name)
+        lock_fd = os.open(journal_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        locked = False
+        try:
+            if not _try_lock(lock_fd):
+                continue    # still being committed by a live process
+            locked = True
+            try:
+                with open(journal_path, "r") as f:
+                    journal = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            if journal.get("state") == COMMITTED:
+                _publish(journal)
+                action = "rolled forward"
+            else:
+                for entry in journal.get("entries", []):
+                    if os.path.exists(entry["temp"]):
+                        os.unlink(entry["temp"])
+                action = "rolled back"
+            os.unlink(journal_path)
+            recovered.append((journal.get("id", name[:-5]), action))
+        finally:
+            # Only the holder may remove the lock file: removing a live owner's would let
+            # the next recover() lock a new file and roll back a running transaction
+            if locked:
+                try:
+                    os.unlink(journal_path + ".lock")
+                except FileNotFoundError:
+                    pass
+            os.close(lock_fd)
+    return recovered
+
+
+def write_file(path, content, journal_dir=journal_directory):
+    # Single file convenience: atomic, durable replacement of path
+    with Transaction(journal_dir) as transaction:
+        transaction.write(path, content)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll interrupted multi-file transactions forward or back.")
+    parser.parse_args(argv)
+
+    for transaction_id, action in recover():
+        print(f"Transaction {transaction_id}: {action}.")
+    print("No interrupted transactions left.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
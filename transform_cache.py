@@ -0,0 +1,139 @@
+# Python module with a persistent content-hash cache for file transforms.
+#
+# Entries are keyed on (input file hash, transform id, transform version) and store the
+# hash of the output the transform produced for that input. The output itself is kept
+# in a small object store next to the entries. When a transform is run again on the same
+# input, the cached result is used: if the output hash equals the input hash nothing is
+# computed and nothing is written; otherwise the stored output is copied back without
+# running the transform. A re-run therefore costs one hash of the file.
+#
+# Layout of the cache directory:
+#   entries/<2 chars>/<key>      one line: the output hash
+#   objects/<2 chars>/<hash>     output content, only for outputs that differ from input
+
+import hashlib
+import os
+import tempfile
+
+from transaction import write_file
+
+cache_directory = ".dashboard_ci/transform_cache"
+
+# Result status values of run_cached()
+HIT_UNCHANGED = "hit-unchanged"      # cached, file already has the desired shape
+HIT_RESTORED = "hit-restored"        # cached, stored output written without running the transform
+MISS_UNCHANGED = "miss-unchanged"    # transform ran, output equals input, nothing written
+MISS_CHANGED = "miss-changed"        # transform ran and the file was rewritten
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return hash_bytes(f.read())
+
+
+def _write_atomically(file_path, data):
+    # Several transforms (or CI jobs) may share one cache directory; a temp file plus
+    # os.replace never leaves a half-written entry behind.
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class TransformCache:
+    def __init__(self, directory=cache_directory):
+        self.directory = directory
+
+    def _entry_path(self, input_hash, transform_id, version):
+        key = hash_bytes(f"{input_hash}\0{transform_id}\0{version}".encode("utf-8"))
+        return os.path.join(self.directory, "entries", key[:2], key)
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def lookup(self, input_hash, transform_id, version):
+        try:
+            with open(self._entry_path(input_hash, transform_id, version), "r") as f:
+                output_hash = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return output_hash or None
+
+    def store(self, input_hash, transform_id, version, output_data):
+        output_hash = hash_bytes(output_data)
+        if output_hash != input_hash and not os.path.exists(self._object_path(output_hash)):
+            _write_atomically(self._object_path(output_hash), output_data)
+        _write_atomically(self._entry_path(input_hash, transform_id, version), (output_hash + "\n").encode("utf-8"))
+        return output_hash
+
+    def read_object(self, content_hash):
+        try:
+            with open(self._object_path(content_hash), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Never hand back a corrupted object
+        return data if hash_bytes(data) == content_hash else None
+
+
+def _write_target(file_path, data, transaction):
+    if transaction is not None:
+        transaction.write(file_path, data)
+    else:
+        write_file(file_path, data)
+
+
+def run_cached(file_path, transform_id, version, transform, cache=None, idempotent=False, transaction=None):
+    # transform takes the file content (str) and returns the new content (str).
+    # idempotent=True also records output -> output, so running the transform on its
+    # own result is a cache hit as well.
+    # With a transaction, the new content is staged in it instead of written right away.
+    # Returns (status, output hash).
+    cache = cache or TransformCache()
+
+    if transaction is not None:
+        input_data = transaction.read(file_path).encode("utf-8")
+    else:
+        with open(file_path, "rb") as f:
+            input_data = f.read()
+    input_hash = hash_bytes(input_data)
+
+    output_hash = cache.lookup(input_hash, transform_id, version)
+    if output_hash == input_hash:
+        return HIT_UNCHANGED, output_hash
+    if output_hash is not None:
+        output_data = cache.read_object(output_hash)
+        if output_data is not None:
+            _write_target(file_path, output_data, transaction)
+            return HIT_RESTORED, output_hash
+        # The object was garbage collected or damaged, fall back to running the transform
+
+    output_data = transform(input_data.decode("utf-8")).encode("utf-8")
+    output_hash = cache.store(input_hash, transform_id, version, output_data)
+    if idempotent:
+        cache.store(output_hash, transform_id, version, output_data)
+
+    if output_hash == input_hash:
+        return MISS_UNCHANGED, output_hash
+    _write_target(file_path, output_data, transaction)
+    return MISS_CHANGED, output_hash
+
+
+def describe_status(status):
+    return {
+        HIT_UNCHANGED: "already up to date (cache hit, nothing written)",
+        HIT_RESTORED: "written from cache (transform skipped)",
+        MISS_UNCHANGED: "already up to date (nothing written)",
+        MISS_CHANGED: "rewritten",
+    }[status]
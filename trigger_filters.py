@@ -0,0 +1,292 @@
+# Python script to make .github/workflows/android_build.yml run only when something that
+# feeds the Android build changes, and to stop runs that a newer push made obsolete.
+#
+# The build inputs are worked out from the tree and from the workflow itself:
+#   - the app: lib/**, pubspec.*, android/**, build.yaml, l10n.yaml, and the assets and
+#     fonts declared in pubspec.yaml;
+#   - test/** and integration_test/** only if the workflow runs "flutter test";
+#   - .metadata if it runs "flutter create" (which reads it);
+#   - the workflow file and any script a step runs ("python patch.py").
+# The push and pull_request events the workflow already has get a "paths" filter with
+# these inputs, or with --ignore a "paths-ignore" filter listing everything else in the
+# tree that git tracks (the helper scripts, README.md, ...). No event is ever added, so
+# the filters never make a workflow run where it did not before; workflow_dispatch and
+# the other events are kept as they are.
+# A top-level concurrency group per workflow and branch / pull request cancels a running
+# build when a newer commit arrives, except on the default branch, where every commit
+# keeps its build.
+#
+# Usage:
+#   python trigger_filters.py [--ignore] [--dry-run]
+
+import argparse
+import collections
+import fnmatch
+import functools
+import os
+import re
+import subprocess
+import sys
+
+from transaction import write_file
+from workflow_document import WorkflowDocument, mapping_keys
+
+workflow_file_path = ".github/workflows/android_build.yml"
+app_directory = "flutter_dashboard_app"
+
+filtered_events = ("push", "pull_request")
+
+# Relative to the app directory; globs are kept even when nothing matches yet
+app_inputs = ("lib/**", "pubspec.*", "android/**", "build.yaml", "l10n.yaml")
+
+concurrency_block = '''concurrency:
+  group: ${{ github.workflow }}-${{ github.event.pull_request.number || github.ref }}
+  cancel-in-progress: ${{ github.ref != format('refs/heads/{0}', github.event.repository.default_branch) }}
+'''
+
+# Never part of a checkout's meaningful content
+_skipped_directories = {".git", ".dart_tool", "build", "__pycache__", ".gradle", ".idea", ".dashboard_ci"}
+_script_pattern = re.compile(r"\bpython3?\s+(?:-\S+\s+)*([\w./-]+\.py)\b")
+
+
+# --- Build inputs ----------------------------------------------------------------------
+
+def _pubspec_assets(pubspec_path):
+    # The "assets:" entries and font "asset:" files of the flutter: section
+    if not os.path.exists(pubspec_path):
+        return []
+    assets = []
+    in_assets = False
+    with open(pubspec_path, "r") as f:
+        for line in f:
+            stripped = line.split("#", 1)[0].strip()
+            if not stripped:
+                continue
+            if stripped.startswith("assets:"):
+                in_assets = True
+                continue
+            if in_assets and stripped.startswith("- "):
+                assets.append(stripped[2:].strip().strip("'\""))
+                continue
+            in_assets = False
+            if stripped.startswith("- asset:") or stripped.startswith("asset:"):
+                assets.append(stripped.split(":", 1)[1].strip().strip("'\""))
+    return [asset + "**" if asset.endswith("/") else asset for asset in assets]
+
+
+def _workflow_commands(workflow_lines):
+    return "".join(line for line in workflow_lines if not line.lstrip().startswith("#"))
+
+
+def build_inputs(workflow_lines, root=".", workflow_path=workflow_file_path):
+    commands = _workflow_commands(workflow_lines)
+    inputs = [f"{app_directory}/{pattern}" for pattern in app_inputs]
+    if os.path.exists(os.path.join(root, "build.yaml")):
+        # A build_runner configuration at the top of the repository
+        inputs.append("build.yaml")
+    inputs += [f"{app_directory}/{asset}" for asset in _pubspec_assets(os.path.join(root, app_directory, "pubspec.yaml"))]
+    if re.search(r"\bflutter test\b", commands):
+        inputs += [f"{app_directory}/test/**", f"{app_directory}/integration_test/**"]
+    if re.search(r"\bflutter create\b", commands):
+        inputs.append(f"{app_directory}/.metadata")
+    inputs.append(workflow_path)
+    inputs += sorted(set(os.path.normpath(script) for script in _script_pattern.findall(commands)))
+
+    unique = []
+    for pattern in inputs:
+        if pattern not in unique:
+            unique.append(pattern)
+    return unique
+
+
+@functools.lru_cache(maxsize=None)
+def _pattern_regex(pattern):
+    # GitHub filter glob: "**" crosses directories, "*" and "?" do not
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+        elif pattern[index] == "*":
+            regex += "[^/]*"
+            index += 1
+        elif pattern[index] == "?":
+            regex += "[^/]"
+            index += 1
+        else:
+            regex += re.escape(pattern[index])
+            index += 1
+    return re.compile(regex + "$")
+
+
+def matches_any(path, patterns):
+    return any(_pattern_regex(pattern).match(path) for pattern in patterns)
+
+
+def _tree_files(root):
+    # The files git tracks or would track (gitignored ones are no build input nor worth
+    # a filter); outside of a git checkout, every file of the tree
+    try:
+        result = subprocess.run(["git", "-C", root, "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+                                capture_output=True, check=True)
+        return sorted({path for path in result.stdout.decode("utf-8").split("\0")
+                       if path and not set(path.split("/")) & _skipped_directories})
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    files = []
+    for directory, directories, names in os.walk(root):
+        directories[:] = sorted(name for name in directories if name not in _skipped_directories)
+        for name in sorted(names):
+            files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+    return files
+
+
+def ignored_paths(inputs, root="."):
+    # Everything in the tree that is not an input, as few patterns as possible: whole
+    # directories ("docs/**") and, at the top level, extensions ("*.py")
+    files = _tree_files(root)
+    outside = [path for path in files if not matches_any(path, inputs)]
+    inside = set(files) - set(outside)
+
+    patterns = []
+    covered = set()
+    directories = collections.OrderedDict()
+    for path in outside:
+        parts = path.split("/")
+        # The highest directory without any input in it
+        for depth in range(1, len(parts)):
+            directory = "/".join(parts[:depth])
+            if not any(other.startswith(directory + "/") for other in inside):
+                directories.setdefault(directory, []).append(path)
+                covered.add(path)
+                break
+    patterns += [f"{directory}/**" for directory in directories]
+
+    top_level = [path for path in outside if path not in covered and "/" not in path]
+    by_extension = collections.defaultdict(list)
+    for path in top_level:
+        by_extension[os.path.splitext(path)[1]].append(path)
+    for extension, paths in sorted(by_extension.items()):
+        if extension and not any(fnmatch.fnmatch(path, "*" + extension) for path in inside if "/" not in path):
+            patterns.append("*" + extension)
+        else:
+            patterns += paths
+    patterns += [path for path in outside if path not in covered and "/" in path]
+    return patterns
+
+
+# --- Rewriting the workflow ------------------------------------------------------------
+
+def _events(lines, start, end):
+    # "on:" value -> OrderedDict event -> (inline value, body lines relative to the event)
+    first = lines[start].split(":", 1)[1].split("#", 1)[0].strip()
+    if first:
+        names = [name.strip() for name in first.strip("[]").split(",") if name.strip()]
+        return collections.OrderedDict((name, (None, [])) for name in names)
+    events = collections.OrderedDict()
+    indent, keys = mapping_keys(lines, start + 1, end)
+    for name, (key_start, key_end) in keys.items():
+        inline = lines[key_start].split(":", 1)[1].strip()
+        body = [line[indent:] if line.strip() else "\n" for line in lines[key_start + 1:key_end]]
+        events[name] = (inline or None, body)
+    return events
+
+
+def _without_filters(body):
+    # Drops "paths:" / "paths-ignore:" and their lists from an event body
+    kept = []
+    skipping = None
+    for line in body:
+        indent = len(line) - len(line.lstrip(" "))
+        stripped = line.strip()
+        if skipping is not None:
+            if not stripped or indent > skipping or (indent == skipping and stripped.startswith("- ")):
+                continue
+            skipping = None
+        if re.match(r"^paths(-ignore)?\s*:", stripped):
+            skipping = indent
+            continue
+        kept.append(line)
+    while kept and not kept[-1].strip():
+        kept.pop()
+    return kept
+
+
+def on_block(events, filter_key, patterns):
+    # The events in their order; only the push / pull_request ones present get a filter
+    text = "on:\n"
+    for name, (inline, body) in events.items():
+        if name in filtered_events:
+            body = _without_filters(body)
+            if inline and inline not in ("{}", "null", "~"):
+                # "push: { branches: [main] }" style: left alone, the filter cannot be merged in
+                text += f"  {name}: {inline}\n"
+                continue
+            text += f"  {name}:\n" + "".join("  " + line if line.strip() else line for line in body)
+            text += f"    {filter_key}:\n" + "".join(f"      - '{pattern}'\n" for pattern in patterns)
+        else:
+            text += f"  {name}:" + (f" {inline}" if inline else "") + "\n"
+            text += "".join("  " + line if line.strip() else line for line in body)
+    return text
+
+
+def _same(lines, start, end, text):
+    wanted = [line.rstrip() for line in text.splitlines() if line.strip()]
+    return [line.rstrip() for line in lines[start:end] if line.strip()] == wanted
+
+
+def trigger_filters(lines, root=".", ignore=False, workflow_path=workflow_file_path):
+    indent, keys = mapping_keys(lines)
+    if "jobs" not in keys:
+        print("Warning: no jobs: section found. Trigger filters not added.")
+        return lines
+
+    document = WorkflowDocument.from_lines(lines)
+    events = _events(lines, *keys["on"]) if "on" in keys else {}
+    if any(name in events for name in filtered_events):
+        inputs = build_inputs(lines, root, workflow_path)
+        filter_key, patterns = ("paths-ignore", ignored_paths(inputs, root)) if ignore else ("paths", inputs)
+        start, end = keys["on"]
+        text = on_block(events, filter_key, patterns)
+        if not _same(lines, start, end, text):
+            document.replace_lines(start, end, text.splitlines(True))
+    else:
+        print("No push or pull_request event to filter; the triggers are left as they are.")
+
+    if "concurrency" in keys:
+        start, end = keys["concurrency"]
+        if not _same(lines, start, end, concurrency_block):
+            document.replace_lines(start, end, concurrency_block.splitlines(True))
+    else:
+        document.insert_lines(keys["jobs"][0], concurrency_block.splitlines(True) + ["\n"])
+
+    return document.lines() if document.is_modified() else lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add build-input path filters and a concurrency group to the workflow.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to rewrite")
+    parser.add_argument("--root", default=".", help="repository root the paths are relative to")
+    parser.add_argument("--ignore", action="store_true", help="emit paths-ignore (everything else) instead of paths")
+    parser.add_argument("--dry-run", action="store_true", help="print the filters instead of writing them")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+
+    workflow_path = os.path.relpath(args.file, args.root).replace(os.sep, "/")
+    new_lines = trigger_filters(lines, args.root, args.ignore, workflow_path)
+
+    if args.dry_run:
+        print("".join(new_lines), end="")
+    elif new_lines is not lines:
+        write_file(args.file, "".join(new_lines))
+        print(f"Updated the triggers and concurrency group of {args.file}.")
+    else:
+        print(f"Triggers and concurrency group of {args.file} are up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,15 @@
 # Python script to update the embedded Python script within .github/workflows/android_build.yml
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
-with open(workflow_file_path, "r") as f:
-    lines = f.readlines()
-
-new_workflow_lines = []
-in_patch_script_step = False
-in_python_heredoc = False
-# python_script_lines = [] # Not needed as we are replacing directly
-
-for line in lines:
-    if line.strip() == "- name: Patch build.gradle.kts after flutter create":
-        new_workflow_lines.append(line)
-        in_patch_script_step = True
-    elif in_patch_script_step and line.strip() == "run: |":
-        new_workflow_lines.append(line)
-    elif in_patch_script_step and line.strip() == "python << 'EOF'":
-        new_workflow_lines.append(line)
-        in_python_heredoc = True
-        # The next line in the input 'lines' will be the start of the old script.
-        # We will discard old script lines until 'EOF' by not appending them in the 'else'
-        # and then insert the new script when we hit 'EOF'.
-    elif in_python_heredoc and line.strip() == "EOF":
-        # This is where we insert the modified Python script
-
-        modified_python_script = '''          import os
+# The replacement for the script between "python << 'EOF'" and "EOF"
+modified_python_script = '''          import os
           gradle_file_path = "flutter_dashboard_app/android/app/build.gradle.kts"
 
           with open(gradle_file_path, "r") as f:
@@ -146,22 +128,60 @@ for line in lines:
               f.writelines(final_lines_pass2)
           print(f"Patched {gradle_file_path} with Kotlin DSL awareness and ensured keystore logic placement.")
 '''
-        # Add the modified Python script lines, ensuring correct YAML indentation for the heredoc content
-        # Each line of the script needs to be indented to align with the YAML heredoc style.
-        # The heredoc itself starts after "run: |", and "python << 'EOF'" is indented.
-        # The script lines should be indented further relative to "python << 'EOF'".
-        # The provided script string already has '          ' (10 spaces)
-        for script_line in modified_python_script.splitlines():
-            new_workflow_lines.append(script_line + "\n") # Script lines already have their own relative indentation.
-
-        new_workflow_lines.append(line) # Append the 'EOF' line (which is '          EOF\n')
-        in_python_heredoc = False
-        in_patch_script_step = False # Finished this step
-    elif not (in_patch_script_step and in_python_heredoc): # Only append if not inside the python script part we are replacing
-        new_workflow_lines.append(line)
-    # If in_patch_script_step and in_python_heredoc, we are inside the old script, so we skip those lines.
-
-with open(workflow_file_path, "w") as f:
-    f.writelines(new_workflow_lines)
-
-print(f"Updated the embedded Python script in {workflow_file_path} with revised logic.")
+
+
+def update_embedded_patch_script(lines):
+    new_workflow_lines = []
+    in_patch_script_step = False
+    in_python_heredoc = False
+    # python_script_lines = [] # Not needed as we are replacing directly
+
+    for line in lines:
+        if line.strip() == "- name: Patch build.gradle.kts after flutter create":
+            new_workflow_lines.append(line)
+            in_patch_script_step = True
+        elif in_patch_script_step and line.strip() == "run: |":
+            new_workflow_lines.append(line)
+        elif in_patch_script_step and line.strip() == "python << 'EOF'":
+            new_workflow_lines.append(line)
+            in_python_heredoc = True
+            # The next line in the input 'lines' will be the start of the old script.
+            # We will discard old script lines until 'EOF' by not appending them in the 'else'
+            # and then insert the new script when we hit 'EOF'.
+        elif in_python_heredoc and line.strip() == "EOF":
+            # This is where we insert the modified Python script
+            # Add the modified Python script lines, ensuring correct YAML indentation for the heredoc content
+            # Each line of the script needs to be indented to align with the YAML heredoc style.
+            # The heredoc itself starts after "run: |", and "python << 'EOF'" is indented.
+            # The script lines should be indented further relative to "python << 'EOF'".
+            # The provided script string already has '          ' (10 spaces)
+            for script_line in modified_python_script.splitlines():
+                new_workflow_lines.append(script_line + "\n") # Script lines already have their own relative indentation.
+
+            new_workflow_lines.append(line) # Append the 'EOF' line (which is '          EOF\n')
+            in_python_heredoc = False
+            in_patch_script_step = False # Finished this step
+        elif not (in_patch_script_step and in_python_heredoc): # Only append if not inside the python script part we are replacing
+            new_workflow_lines.append(line)
+        # If in_patch_script_step and in_python_heredoc, we are inside the old script, so we skip those lines.
+
+    return new_workflow_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the Python script embedded in the patch step.")
+    parser.parse_args(argv)
+
+    with open(workflow_file_path, "r") as f:
+        lines = f.readlines()
+
+    new_workflow_lines = update_embedded_patch_script(lines)
+
+    write_file(workflow_file_path, "".join(new_workflow_lines))
+
+    print(f"Updated the embedded Python script in {workflow_file_path} with revised logic.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
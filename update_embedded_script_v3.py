@@ -1,7 +1,11 @@
 # Python script to update the *embedded* Python script within .github/workflows/android_build.yml
 # This version has hardcoded replacements in the embedded script string.
 
+import argparse
 import os
+import sys
+
+from transaction import write_file
 
 workflow_file_path = ".github/workflows/android_build.yml"
 
@@ -100,39 +104,53 @@ new_embedded_python_script = '''\
           print(f"Patched {{gradle_file_path}} with Kotlin DSL fixes (.set syntax) and ensured keystore logic placement.")
 '''
 
-# Read the current workflow file
-with open(workflow_file_path, "r") as f:
-    workflow_lines = f.readlines()
-
-output_workflow_lines = []
-in_patch_step_script = False
-
-for wf_line in workflow_lines:
-    stripped_wf_line = wf_line.strip()
-
-    if stripped_wf_line == "- name: Patch build.gradle.kts after flutter create":
-        output_workflow_lines.append(wf_line)
-    elif output_workflow_lines and output_workflow_lines[-1].strip() == "- name: Patch build.gradle.kts after flutter create" and \
-         stripped_wf_line == "run: |":
-        output_workflow_lines.append(wf_line)
-    elif output_workflow_lines and output_workflow_lines[-1].strip() == "run: |" and \
-         "- name: Patch build.gradle.kts after flutter create" in output_workflow_lines[-2].strip() and \
-         stripped_wf_line == "python << 'EOF'":
-        output_workflow_lines.append(wf_line)
-        # Append the new embedded script.
-        # The new_embedded_python_script string already starts with the correct indentation (10 spaces)
-        # because of how it's defined with '''\ and then subsequent lines have that indent.
-        # However, to be safe, splitlines and add indent, as before.
-        for script_line in new_embedded_python_script.splitlines(True):
-             output_workflow_lines.append("          " + script_line)
-        in_patch_step_script = True
-    elif stripped_wf_line == "EOF" and in_patch_step_script:
-        output_workflow_lines.append(wf_line)
-        in_patch_step_script = False
-    elif not in_patch_step_script:
-        output_workflow_lines.append(wf_line)
-
-with open(workflow_file_path, "w") as f:
-    f.writelines(output_workflow_lines)
-
-print(f"Successfully updated the embedded Python script in {workflow_file_path} (Hardcoded Version).")
+def update_embedded_script_v3(workflow_lines):
+    output_workflow_lines = []
+    in_patch_step_script = False
+
+    for wf_line in workflow_lines:
+        stripped_wf_line = wf_line.strip()
+
+        if stripped_wf_line == "- name: Patch build.gradle.kts after flutter create":
+            output_workflow_lines.append(wf_line)
+        elif output_workflow_lines and output_workflow_lines[-1].strip() == "- name: Patch build.gradle.kts after flutter create" and \
+             stripped_wf_line == "run: |":
+            output_workflow_lines.append(wf_line)
+        elif output_workflow_lines and output_workflow_lines[-1].strip() == "run: |" and \
+             "- name: Patch build.gradle.kts after flutter create" in output_workflow_lines[-2].strip() and \
+             stripped_wf_line == "python << 'EOF'":
+            output_workflow_lines.append(wf_line)
+            # Append the new embedded script.
+            # The new_embedded_python_script string already starts with the correct indentation (10 spaces)
+            # because of how it's defined with '''\ and then subsequent lines have that indent.
+            # However, to be safe, splitlines and add indent, as before.
+            for script_line in new_embedded_python_script.splitlines(True):
+                 output_workflow_lines.append("          " + script_line)
+            in_patch_step_script = True
+        elif stripped_wf_line == "EOF" and in_patch_step_script:
+            output_workflow_lines.append(wf_line)
+            in_patch_step_script = False
+        elif not in_patch_step_script:
+            output_workflow_lines.append(wf_line)
+
+    return output_workflow_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the embedded patch script (hardcoded replacements).")
+    parser.parse_args(argv)
+
+    # Read the current workflow file
+    with open(workflow_file_path, "r") as f:
+        workflow_lines = f.readlines()
+
+    output_workflow_lines = update_embedded_script_v3(workflow_lines)
+
+    write_file(workflow_file_path, "".join(output_workflow_lines))
+
+    print(f"Successfully updated the embedded Python script in {workflow_file_path} (Hardcoded Version).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+# Python script to watch the workflow and Gradle files and re-apply transforms on change.
+#
+# Instead of running set_minimal_workflow.py, restore_workflow_*.py, ... by hand after
+# every edit, this keeps running: it watches the files (inotify, or polling where inotify
+# is not available), waits until the edits settle (debounce), works out which lines
+# changed (difflib, on the part between the common prefix and suffix) and re-runs only
+# the transforms whose match regions overlap those lines. A transform's match regions
+# are the lines it looks at: named steps of the workflow, blocks of the Gradle script,
+# lines matching a pattern, or the whole file. They are computed on the text before and
+# after the change, so deleting something a transform maintains also triggers it.
+#
+# The file is written once per round, atomically, and the watcher's own writes are
+# recognised by content and ignored.
+#
+# Usage:
+#   python watch_transforms.py
+#   python watch_transforms.py --workflow-transforms correct-workflow-secrets,comment-out-build-steps --poll
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+
+import gradle_pipeline
+import workflow_pipeline
+from edit_buffer import EditBuffer, changed_ranges
+from gradle_block_tree import GradleBlockTree, GradleParseError
+from transaction import write_file
+from workflow_document import WorkflowDocument
+
+default_workflow_transforms = ("correct-workflow-secrets", "remove-orphaned-heredoc")
+default_gradle_transforms = ("fix-gradle-import", "modify-gradle")
+
+_keystore_steps = ("Create keystore.properties", "Decode Keystore")
+_release_steps = ("Build Android APK (Release)", "Upload APK Artifact (Release)")
+_patch_step = "Patch build.gradle.kts after flutter create"
+
+# What each transform looks at. Selectors:
+#   ("file",)           the whole file
+#   ("head",)           the leading lines, up to the first line of real content
+#   ("step", name)      every step with that name (workflow)
+#   ("block", path)     every block with that path (Gradle)
+#   ("pattern", regex)  every line matching the regex
+# Transforms missing from this table are treated as ("file",).
+match_regions_by_transform = {
+    "set-minimal-workflow": [("file",)],
+    "restore-workflow-stage1": [("file",)],
+    "restore-workflow-stage2": [("file",)],
+    "restore-workflow-final": [("step", "Test command after Flutter/Gradle steps"), ("pattern", r"^name: ")]
+                              + [("step", name) for name in _keystore_steps + _release_steps],
+    "correct-indentation": [("file",)],
+    "add-list-files-step": [("step", "List files in android directory"), ("step", "Set Gradle version")],
+    "modify-workflow": [("step", name) for name in _keystore_steps + _release_steps[:1]],
+    "correct-workflow-secrets": [("pattern", r"\$\{\{\{\{")],
+    "modify-workflow-final-plus-patch": [("step", "List files in android directory"), ("step", "Set Gradle version"),
+                                         ("step", "Regenerate Android project"), ("step", _patch_step)],
+    "update-embedded-patch-script": [("step", _patch_step)],
+    "update-embedded-script-v3": [("step", _patch_step)],
+    "remove-orphaned-heredoc": [("pattern", r"keystore_logic_to_insert = \[")],
+    "remove-patch-step": [("step", _patch_step)],
+    "remove-regenerate-step": [("step", "Regenerate Android project")],
+    "comment-out-build-steps": [("step", name) for name in _release_steps],
+    "comment-out-keystore-steps": [("step", name) for name in _keystore_steps],
+    "dedupe-workflow-steps": [("pattern", r"^\s*(- )?(run|working-directory|env|uses|id|if):")],
+    "add-cache-steps": [("pattern", r"subosito/flutter-action|flutter-version:|channel:"),
+                        ("step", "Cache Flutter SDK"), ("step", "Cache pub packages"), ("step", "Cache Gradle")],
+    "release-profile-step": [("pattern", r"flutter build apk|actions/upload-artifact|\.apk\b"),
+                             ("step", "Upload debug symbols")],
+    "trigger-filters": [("pattern", r"^['\"]?on['\"]?:|^concurrency:|^\s+(push|pull_request|paths|branches)|"
+                                    r"flutter (test|create)|python3? ")],
+    "abi-matrix": [("pattern", r"^\S|^  \S|strategy:|flutter build apk|actions/upload-artifact"),
+                   ("step", "Upload debug symbols")],
+    "codegen-freshness-step": [("pattern", r"build_runner build|codegen_freshness\.py")],
+
+    "sanitize-gradle": [("head",), ("pattern", r"java\.util\.Properties")],
+    "fix-gradle-import": [("head",), ("pattern", r"java\.util\.Properties")],
+    "modify-gradle": [("block", "android.defaultConfig"), ("block", "android.signingConfigs"),
+                      ("block", "android.buildTypes.release")],
+    "restructure-gradle": [("head",), ("pattern", r"keystoreProperties|import java\.util\.Properties"),
+                           ("block", "android.signingConfigs"), ("block", "android.buildTypes")],
+    "restructure-gradle-v2": [("head",), ("pattern", r"keystoreProperties|import java\.util\.Properties"),
+                              ("block", "plugins"), ("block", "android.signingConfigs")],
+    "rewrite-gradle-identifiers": [("pattern", r"namespace = |applicationId = |signingConfig = |isMinifyEnabled = ")],
+}
+
+
+# --- Changed regions -------------------------------------------------------------------
+
+def match_regions(selectors, lines, kind):
+    # Line ranges [start, end) of lines that the selectors cover
+    regions = []
+    document = None
+    tree = None
+    for selector in selectors:
+        if selector[0] == "file":
+            return [(0, max(len(lines), 1))]
+        if selector[0] == "head":
+            end = 0
+            while end < len(lines) and (not lines[end].strip() or lines[end].lstrip().startswith("import ")):
+                end += 1
+            regions.append((0, end + 1))
+        elif selector[0] == "pattern":
+            pattern = re.compile(selector[1])
+            regions.extend((i, i + 1) for i, line in enumerate(lines) if pattern.search(line))
+        elif selector[0] == "step" and kind == "workflow":
+            if document is None:
+                document = WorkflowDocument.from_lines(lines)
+            regions.extend((span.start, span.end) for span in document.find_steps(selector[1]))
+        elif selector[0] == "block" and kind == "gradle":
+            if tree is None:
+                try:
+                    tree = GradleBlockTree("".join(lines))
+                except GradleParseError:
+                    # Half-typed edit: be conservative until the file parses again
+                    return [(0, max(len(lines), 1))]
+                offsets = EditBuffer(tree.text)
+            for block in tree.find_all(selector[1]):
+                regions.append((offsets.line_number(block.start), offsets.line_number(block.close_offset) + 1))
+    return regions
+
+
+def _overlaps(regions, start, end):
+    for region_start, region_end in regions:
+        if start == end:
+            # Pure insertion between lines: touching a region counts
+            if region_start <= start <= region_end:
+                return True
+        elif region_start < end and start < region_end:
+            return True
+    return False
+
+
+def is_affected(selectors, kind, old_lines, new_lines, changes):
+    if not changes:
+        return False
+    old_regions = match_regions(selectors, old_lines, kind)
+    new_regions = match_regions(selectors, new_lines, kind)
+    for old_start, old_end, new_start, new_end in changes:
+        if _overlaps(old_regions, old_start, old_end) or _overlaps(new_regions, new_start, new_end):
+            return True
+    return False
+
+
+# --- Watched files ---------------------------------------------------------------------
+
+class WatchedFile:
+    def __init__(self, path, kind, transform_names):
+        self.path = path
+        self.kind = kind
+        self.transform_names = list(transform_names)
+        self.snapshot = None    # text after the last round, including our own write
+        self.transforms = {}
+        for name in self.transform_names:
+            if kind == "workflow":
+                self.transforms[name] = workflow_pipeline.load_transform(name)
+            else:
+                self.transforms[name] = gradle_pipeline.load_transform(name)[0]
+
+    def read(self):
+        try:
+            with open(self.path, "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _apply(self, name, text):
+        if self.kind == "workflow":
+            return "".join(self.transforms[name](text.splitlines(True)))
+        return self.transforms[name](text)
+
+    def process(self, run_all=False):
+        # Returns (names of the transforms that ran, seconds) or None when there was
+        # nothing to do (no change, or only our own write)
+        text = self.read()
+        if text is None or text == self.snapshot:
+            return None
+        started = time.perf_counter()
+
+        base_lines = (self.snapshot or "").splitlines(True)
+        current = text
+        current_lines = current.splitlines(True)
+        changes = changed_ranges(base_lines, current_lines)
+        ran = []
+        # In order; changes made by a transform count for the ones after it
+        for name in self.transform_names:
+            selectors = match_regions_by_transform.get(name, [("file",)])
+            if not run_all and not is_affected(selectors, self.kind, base_lines, current_lines, changes):
+                continue
+            new_text = self._apply(name, current)
+            ran.append(name)
+            if new_text != current:
+                current = new_text
+                current_lines = current.splitlines(True)
+                changes = changed_ranges(base_lines, current_lines)
+
+        if current != text:
+            write_file(self.path, current)
+        self.snapshot = current
+        return ran, time.perf_counter() - started
+
+
+# --- Watchers --------------------------------------------------------------------------
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_inotify_event = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    # Watches the directories, not the files: editors often save by writing a new file
+    # and renaming it over the old one, which replaces the inode a file watch points to.
+
+    def __init__(self, paths):
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directories = {}   # watch descriptor -> (directory, {file name: path})
+        by_directory = {}
+        for path in paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            by_directory.setdefault(directory, {})[os.path.basename(path)] = path
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for directory, names in by_directory.items():
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self.directories[wd] = (directory, names)
+
+    def wait(self, timeout):
+        # Set of watched paths that changed; empty when timeout (seconds, None = forever) expired
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _inotify_event.size <= len(data):
+            wd, mask, cookie, name_length = _inotify_event.unpack_from(data, offset)
+            offset += _inotify_event.size
+            name = data[offset:offset + name_length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_length
+            if wd in self.directories and name in self.directories[wd][1]:
+                changed.add(self.directories[wd][1][name])
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=0.2):
+        self.paths = list(paths)
+        self.interval = interval
+        self.states = {path: self._state(path) for path in self.paths}
+
+    @staticmethod
+    def _state(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                state = self._state(path)
+                if state != self.states[path]:
+                    self.states[path] = state
+                    changed.add(path)
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def create_watcher(paths, polling=False, poll_interval=0.2):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), falling back to polling.")
+    return PollingWatcher(paths, poll_interval)
+
+
+# --- Main loop -------------------------------------------------------------------------
+
+def _report(watched_file, result):
+    if result is None:
+        return
+    ran, seconds = result
+    transforms = ", ".join(ran) if ran else "no transform affected"
+    print(f"{time.strftime('%H:%M:%S')} {watched_file.path}: {transforms} ({seconds * 1000:.1f} ms)")
+
+
+def watch(watched_files, debounce=0.15, polling=False, poll_interval=0.2):
+    by_path = {watched_file.path: watched_file for watched_file in watched_files}
+
+    # First round runs everything, so later rounds start from a settled file
+    for watched_file in watched_files:
+        _report(watched_file, watched_file.process(run_all=True))
+
+    watcher = create_watcher(list(by_path), polling, poll_interval)
+    print(f"Watching {', '.join(by_path)} with {type(watcher).__name__} (Ctrl+C to stop).")
+    pending = set()
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = watcher.wait(timeout)
+            if changed:
+                # Wait until the edits settle: an editor save is often several writes
+                pending |= changed
+                deadline = time.monotonic() + debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                for path in sorted(pending):
+                    try:
+                        _report(by_path[path], by_path[path].process())
+                    except Exception as e:
+                        # Keep watching: the next save may fix whatever broke the transform
+                        print(f"{time.strftime('%H:%M:%S')} {path}: {type(e).__name__}: {e}")
+                pending = set()
+                deadline = None
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+def _transform_list(value):
+    return tuple(name for name in value.split(",") if name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-apply the affected transforms whenever the files change.")
+    parser.add_argument("--workflow-file", default=workflow_pipeline.workflow_file_path)
+    parser.add_argument("--gradle-file", default=gradle_pipeline.gradle_file_path)
+    parser.add_argument("--workflow-transforms", type=_transform_list, default=default_workflow_transforms,
+                        help=f"comma separated, in order (default: {','.join(default_workflow_transforms)})")
+    parser.add_argument("--gradle-transforms", type=_transform_list, default=default_gradle_transforms,
+                        help=f"comma separated, in order (default: {','.join(default_gradle_transforms)})")
+    parser.add_argument("--debounce", type=float, default=0.15, help="seconds without changes before running")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="seconds between polls")
+    args = parser.parse_args(argv)
+
+    watched_files = []
+    try:
+        if args.workflow_transforms:
+            watched_files.append(WatchedFile(args.workflow_file, "workflow", args.workflow_transforms))
+        if args.gradle_transforms:
+            watched_files.append(WatchedFile(args.gradle_file, "gradle", args.gradle_transforms))
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 2
+    if not watched_files:
+        print("Nothing to watch.")
+        return 2
+
+    watch(watched_files, args.debounce, args.poll, args.poll_interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+# Python module with a round-trip model of a GitHub Actions workflow file.
+#
+# The document keeps the original lines untouched and builds, in one pass, an index of
+# every step: name / id -> StepSpan(start line, end line, indent), and of every job
+# (JobSpan). Edits (remove, insert-before/after, replace) are recorded against those
+# original line numbers and only merged into the text (through an EditBuffer) when
+# render() is called, so every operation is a dictionary lookup instead of another scan
+# of the file. Comments, blank lines and formatting outside the edited steps come back
+# byte-for-byte.
+
+import collections
+import re
+
+from edit_buffer import EditBuffer
+from transaction import write_file
+
+# start / end are 0-based line numbers, end is exclusive and stops at the last line that
+# belongs to the step (trailing blank lines and comments are left between steps).
+# indent is the column of the "-" that opens the step.
+StepSpan = collections.namedtuple("StepSpan", ["name", "id", "job", "start", "end", "indent"])
+# A job under "jobs:", from its "<job id>:" line to its last content line
+JobSpan = collections.namedtuple("JobSpan", ["name", "start", "end", "indent"])
+
+_key_pattern = re.compile(r"^([A-Za-z0-9_.-]+)\s*:(?:\s+|$)(.*)$")
+_quoted_key_pattern = re.compile(r"^(['\"]?)([A-Za-z0-9_.-]+)\1\s*:(?:\s|$)")
+_block_scalar_pattern = re.compile(r"^[|>][0-9+-]*\s*(?:#.*)?$")
+
+
+def _indent_of(line):
+    return len(line) - len(line.lstrip(" "))
+
+
+def _scalar_value(raw_value):
+    value = raw_value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+        return value[1:-1]
+    # Drop a trailing comment on plain scalars ("name: Foo # bar")
+    comment_index = value.find(" #")
+    if comment_index != -1:
+        value = value[:comment_index].rstrip()
+    return value
+
+
+def reindent(text, indent):
+    # Shift a block of YAML so that its first non-blank line starts at column `indent`,
+    # keeping the relative indentation of every other line.
+    lines = text.splitlines(True)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return lines
+    shift = indent - _indent_of(first)
+    if shift == 0:
+        return [line if line.endswith("\n") else line + "\n" for line in lines]
+
+    shifted = []
+    for line in lines:
+        if not line.endswith("\n"):
+            line += "\n"
+        if not line.strip():
+            shifted.append(line)
+        elif shift > 0:
+            shifted.append(" " * shift + line)
+        else:
+            shifted.append(line[min(-shift, _indent_of(line)):])
+    return shifted
+
+
+def mapping_keys(lines, start=0, end=None):
+    # Keys of the YAML mapping in lines[start:end] (the least indented keys there) ->
+    # [first line, end line], the end after the key's last content line. Returns (indent, keys).
+    end = len(lines) if end is None else end
+    key_indent = None
+    keys = collections.OrderedDict()
+    current = None
+    for index in range(start, end):
+        line = lines[index]
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        indent = _indent_of(line)
+        if key_indent is None:
+            key_indent = indent
+        key_match = _quoted_key_pattern.match(line.strip()) if indent == key_indent else None
+        if key_match:
+            current = key_match.group(2)
+            keys[current] = [index, index + 1]
+        elif current is not None:
+            keys[current][1] = index + 1
+    return key_indent, keys
+
+
+class WorkflowDocument:
+    def __init__(self, text):
+        self._lines = text.splitlines(True)
+        self._steps = []
+        self._index = {}
+        self._jobs = collections.OrderedDict()
+        # Pending edits, keyed by the original line number where they apply.
+        # _replacements: start -> (end, new lines); _insertions: line -> [new lines, ...]
+        self._replacements = {}
+        self._insertions = collections.defaultdict(list)
+        self._build_index()
+
+    @classmethod
+    def from_lines(cls, lines):
+        return cls("".join(lines))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as f:
+            return cls(f.read())
+
+    # --- Index -----------------------------------------------------------------------
+
+    def _build_index(self):
+        jobs_indent = None      # indent of the top-level "jobs:" key
+        job_indent = None       # indent of the job ids under "jobs:"
+        current_job = None
+        steps_indent = None     # indent of the "steps:" key of the current job
+        item_indent = None      # indent of the "-" of the steps in the current list
+        step = None             # [name, id, start, last content line, indent, key indent]
+        scalar_indent = None    # set while inside a block scalar ("run: |") of a step
+        job_starts = []         # (job id, line, indent)
+        jobs_end = len(self._lines)
+
+        def close_step():
+            if step is not None:
+                self._add_step(step[0], step[1], current_job, step[2], step[3] + 1, step[4])
+
+        for i, line in enumerate(self._lines):
+            if not line.strip():
+                continue
+            indent = _indent_of(line)
+            stripped = line.strip()
+
+            if scalar_indent is not None:
+                # Everything more indented than the key is scalar content, "#" lines included
+                if indent > scalar_indent:
+                    step[3] = i
+                    continue
+                scalar_indent = None
+
+            if stripped.startswith("#"):
+                continue
+
+            if step is not None:
+                if indent > step[4]:
+                    step[3] = i
+                    if indent == step[5]:
+                        self._read_step_key(step, stripped)
+                    if self._opens_block_scalar(stripped):
+                        scalar_indent = indent
+                    continue
+                close_step()
+                step = None
+
+            if item_indent is not None:
+                if indent == item_indent and (stripped == "-" or stripped.startswith("- ")):
+                    key_part = stripped[1:].lstrip()
+                    step = [None, None, i, i, indent, indent + (len(stripped) - len(key_part))]
+                    if key_part:
+                        self._read_step_key(step, key_part)
+                        if self._opens_block_scalar(key_part):
+                            scalar_indent = step[5]
+                    continue
+                item_indent = None
+                steps_indent = None
+
+            if steps_indent is not None:
+                # First line after "steps:", the list may sit at the same indent as the key
+                if stripped.startswith("-") and indent >= steps_indent:
+                    item_indent = indent
+                    key_part = stripped[1:].lstrip()
+                    step = [None, None, i, i, indent, indent + (len(stripped) - len(key_part))]
+                    if key_part:
+                        self._read_step_key(step, key_part)
+                        if self._opens_block_scalar(key_part):
+                            scalar_indent = step[5]
+                    continue
+                steps_indent = None
+
+            key_match = _key_pattern.match(stripped)
+            if key_match is None:
+                continue
+            key = key_match.group(1)
+
+            if indent == 0:
+                if jobs_indent is not None:
+                    jobs_end = min(jobs_end, i)
+                jobs_indent = 0 if key == "jobs" else None
+                job_indent = None
+                current_job = None
+                continue
+            if jobs_indent is None:
+                continue
+            if job_indent is None or indent == job_indent:
+                job_indent = indent
+                current_job = key
+                job_starts.append((key, i, indent))
+                continue
+            if current_job is not None and key == "steps" and not key_match.group(2).strip():
+                steps_indent = indent
+
+        close_step()
+
+        for position, (name, start, indent) in enumerate(job_starts):
+            end = job_starts[position + 1][1] if position + 1 < len(job_starts) else max(jobs_end, start + 1)
+            # Blank lines and comments before the next job belong to neither
+            while end > start + 1 and (not self._lines[end - 1].strip() or self._lines[end - 1].lstrip().startswith("#")):
+                end -= 1
+            self._jobs[name] = JobSpan(name, start, end, indent)
+
+    def _opens_block_scalar(self, key_text):
+        key_match = _key_pattern.match(key_text)
+        return key_match is not None and bool(_block_scalar_pattern.match(key_match.group(2).strip()))
+
+    def _read_step_key(self, step, key_text):
+        key_match = _key_pattern.match(key_text)
+        if key_match is None:
+            return
+        if key_match.group(1) == "name":
+            step[0] = _scalar_value(key_match.group(2))
+        elif key_match.group(1) == "id":
+            step[1] = _scalar_value(key_match.group(2))
+
+    def _add_step(self, name, step_id, job, start, end, indent):
+        span = StepSpan(name, step_id, job, start, end, indent)
+        self._steps.append(span)
+        for key in (name, step_id):
+            if key is not None:
+                self._index.setdefault(key, []).append(span)
+
+    # --- Lookups ---------------------------------------------------------------------
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def find_job(self, name):
+        if name not in self._jobs:
+            raise KeyError(f"Job '{name}' not found in workflow.")
+        return self._jobs[name]
+
+    def steps(self, job=None):
+        return [span for span in self._steps if job is None or span.job == job]
+
+    def step_names(self, job=None):
+        return [span.name for span in self.steps(job)]
+
+    def has_step(self, key, job=None):
+        return any(job is None or span.job == job for span in self._index.get(key, ()))
+
+    def find_steps(self, key, job=None):
+        # Every step with this name or id (a workflow can repeat a step name)
+        return [span for span in self._index.get(key, ()) if job is None or span.job == job]
+
+    def find_step(self, key, job=None):
+        # key is a step name or a step id; returns the first matching StepSpan
+        for span in self._index.get(key, ()):
+            if job is None or span.job == job:
+                return span
+        raise KeyError(f"Step '{key}' not found in workflow.")
+
+    def step_lines(self, key, job=None):
+        # Materializes only the requested step, as it currently reads (pending edits included)
+        span = self.find_step(key, job)
+        if span.start in self._replacements:
+            return list(self._replacements[span.start][1])
+        return self._lines[span.start:span.end]
+
+    def step_text(self, key, job=None):
+        return "".join(self.step_lines(key, job))
+
+    def line_count(self):
+        return len(self._lines)
+
+    def original_lines(self):
+        return list(self._lines)
+
+    # --- Edits -----------------------------------------------------------------------
+
+    def _trailing_blank_end(self, span):
+        end = span.end
+        while end < len(self._lines) and not self._lines[end].strip():
+            end += 1
+        return end
+
+    def remove_span(self, span):
+        # Take the blank lines that separated the step from the next one with it
+        self._replacements[span.start] = (self._trailing_blank_end(span), [])
+
+    def remove_step(self, key, job=None):
+        span = self.find_step(key, job)
+        self.remove_span(span)
+        return span
+
+    def replace_step(self, key, text, job=None):
+        span = self.find_step(key, job)
+        self._replacements[span.start] = (span.end, reindent(text, span.indent))
+        return span
+
+    def insert_before(self, key, text, job=None):
+        span = self.find_step(key, job)
+        self._insertions[span.start].append(reindent(text, span.indent))
+        return span
+
+    def insert_after(self, key, text, job=None):
+        span = self.find_step(key, job)
+        self._insertions[span.end].append(reindent(text, span.indent))
+        return span
+
+    def replace_lines(self, start, end, new_lines):
+        # Low-level edit for blocks that are not steps (e.g. the "on:" section)
+        self._replacements[start] = (end, list(new_lines))
+
+    def insert_lines(self, line_number, new_lines):
+        self._insertions[line_number].append(list(new_lines))
+
+    def is_modified(self):
+        return bool(self._replacements) or bool(self._insertions)
+
+    # --- Output ----------------------------------------------------------------------
+
+    def _edit_buffer(self):
+        buffer = EditBuffer.from_lines(self._lines)
+        for start, (end, new_lines) in self._replacements.items():
+            buffer.replace_lines(start, end, new_lines)
+        for line_number, blocks in self._insertions.items():
+            for new_lines in blocks:
+                buffer.insert_lines(line_number, new_lines)
+        return buffer
+
+    def render(self):
+        if not self.is_modified():
+            return "".join(self._lines)
+        # One linear merge of the original text with the recorded edits
+        return self._edit_buffer().render()
+
+    def lines(self):
+        if not self.is_modified():
+            return list(self._lines)
+        return self.render().splitlines(True)
+
+    def save(self, file_path):
+        write_file(file_path, self.render())
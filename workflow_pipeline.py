@@ -0,0 +1,155 @@
+# Python script to run several workflow transforms over .github/workflows/android_build.yml
+# in a single pass. The file is read once, every transform works on the same in-memory
+# list of lines, and the result is written once at the end (only if something changed).
+#
+# Usage:
+#   python workflow_pipeline.py remove-patch-step correct-workflow-secrets
+#   python workflow_pipeline.py --validate add-cache-steps dedupe-workflow-steps
+#   python workflow_pipeline.py --list
+#
+# With --validate, the lines each transform changed are checked right after it ran
+# (workflow_validator.py); the first transform that breaks the structure stops the run
+# and nothing is written.
+
+import argparse
+import importlib
+import sys
+import time
+
+from transaction import write_file
+from workflow_validator import WorkflowStructureError, validate_edit
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+# Registered transforms, in registration order: name -> (module name, function name).
+# A transform takes the list of lines of the workflow and returns the new list of lines.
+# Modules are only imported when one of their transforms actually runs.
+registered_transforms = {}
+
+
+def register_transform(name, module_name, function_name=None):
+    if name in registered_transforms:
+        raise ValueError(f"Transform '{name}' is already registered.")
+    registered_transforms[name] = (module_name, function_name or module_name)
+
+
+# The existing workflow scripts, each exposing a function named after its module.
+for _module_name in (
+    "set_minimal_workflow",
+    "restore_workflow_stage1",
+    "restore_workflow_stage2",
+    "restore_workflow_final",
+    "correct_indentation",
+    "add_list_files_step",
+    "modify_workflow",
+    "correct_workflow_secrets",
+    "modify_workflow_final_plus_patch",
+    "update_embedded_patch_script",
+    "update_embedded_script_v3",
+    "remove_orphaned_heredoc",
+    "remove_patch_step",
+    "remove_regenerate_step",
+    "comment_out_build_steps",
+    "comment_out_keystore_steps",
+    "dedupe_workflow_steps",
+    "add_cache_steps",
+    "release_profile_step",
+    "abi_matrix",
+    "trigger_filters",
+):
+    register_transform(_module_name.replace("_", "-"), _module_name)
+
+register_transform("codegen-freshness-step", "codegen_freshness", "codegen_freshness_step")
+
+
+def load_transform(name):
+    if name not in registered_transforms:
+        raise KeyError(f"Unknown transform '{name}'. Use --list to see the registered transforms.")
+    module_name, function_name = registered_transforms[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+
+def run_pipeline(lines, transform_names, validate=False):
+    # Resolve everything first so a typo fails before any transform runs
+    transforms = [(name, load_transform(name)) for name in transform_names]
+
+    timings = []
+    for name, transform in transforms:
+        started = time.perf_counter()
+        new_lines = transform(lines)
+        timings.append((name, time.perf_counter() - started))
+        if validate:
+            problems = validate_edit(lines, new_lines)
+            if problems:
+                raise WorkflowStructureError(problems, name)
+        lines = new_lines
+    return lines, timings
+
+
+def run_pipeline_on_file(file_path, transform_names, dry_run=False, transaction=None, validate=False):
+    # With a transaction, the result is staged in it and written when it commits
+    if transaction is not None:
+        original_lines = transaction.read(file_path).splitlines(True)
+    else:
+        with open(file_path, "r") as f:
+            original_lines = f.readlines()
+
+    new_lines, timings = run_pipeline(original_lines, transform_names, validate)
+
+    changed = new_lines != original_lines
+    if changed and not dry_run:
+        if transaction is not None:
+            transaction.write(file_path, "".join(new_lines))
+        else:
+            write_file(file_path, "".join(new_lines))
+    return changed, timings
+
+
+def print_timings(timings):
+    width = max([len("total")] + [len(name) for name, _ in timings])
+    for name, seconds in timings:
+        print(f"  {name:<{width}}  {seconds * 1000:9.3f} ms")
+    total = sum(seconds for _, seconds in timings)
+    print(f"  {'total':<{width}}  {total * 1000:9.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run workflow transforms with a single read and a single write.")
+    parser.add_argument("transforms", nargs="*", help="registered transform names, applied in the given order")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to transform")
+    parser.add_argument("--list", action="store_true", help="list the registered transforms and exit")
+    parser.add_argument("--dry-run", action="store_true", help="run the transforms but do not write the result")
+    parser.add_argument("--validate", action="store_true",
+                        help="check the structure of the lines every transform changed, stop at the first problem")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.transforms:
+        for name, (module_name, function_name) in registered_transforms.items():
+            print(f"{name}  ({module_name}.{function_name})")
+        return 0
+
+    try:
+        changed, timings = run_pipeline_on_file(args.file, args.transforms, dry_run=args.dry_run,
+                                                validate=args.validate)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 2
+    except WorkflowStructureError as e:
+        print(f"Error: {e}")
+        print(f"Nothing was written to {args.file}.")
+        return 1
+
+    print(f"Ran {len(timings)} transform(s) on {args.file}:")
+    print_timings(timings)
+    if not changed:
+        print(f"No changes to {args.file}.")
+    elif args.dry_run:
+        print(f"{args.file} would be modified (dry run, nothing written).")
+    else:
+        print(f"Wrote {args.file} once.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
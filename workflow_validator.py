@@ -0,0 +1,524 @@
+# Python script to check the structure of .github/workflows/android_build.yml without a
+# full YAML load, looking only at the lines an edit touched.
+#
+# Every line hangs under the nearest line above it that is less indented (its parent),
+# so the indentation alone gives a tree. For a changed range the validator checks the
+# changed lines, the first line after the range (a deletion can leave it dangling) and
+# the parent chain of each of them, up to the top-level key:
+#   - indentation: no tabs, every entry of a mapping or list at the same column, no
+#     entry nested under a key that already has a value ("run: echo x" followed by a
+#     deeper "shell: bash"); deeper lines that are not entries continue the value (a
+#     multi-line plain scalar, or a flow collection / quoted scalar left open);
+#   - mapping keys: no duplicate keys, only known keys at the top level, under a job and
+#     in a step (a step key that slipped out of its step shows up as an unknown job key);
+#   - step lists: "steps:" holds "- " items, each item is a mapping (block, or flow on
+#     one line: "- {name: x, uses: y}") with "run" or "uses" (not both);
+#   - block scalars ("run: |"): not empty, no line less indented than the first one;
+#   - heredocs in run blocks: every "<<EOF" has its "EOF" line, at the left edge of the
+#     script (the shell does not see an indented one), and no "EOF" without a heredoc.
+# Problems carry 1-based line numbers. workflow_pipeline.py --validate runs this after
+# every transform on the lines that transform changed, and stops at the first one that
+# broke something.
+#
+# Usage:
+#   python workflow_validator.py                           # the whole file
+#   python workflow_validator.py --against old_build.yml   # only what differs from old_build.yml
+
+import argparse
+import collections
+import re
+import sys
+
+from edit_buffer import changed_ranges
+
+workflow_file_path = ".github/workflows/android_build.yml"
+
+top_level_keys = {"name", "run-name", "on", "permissions", "env", "defaults", "concurrency", "jobs"}
+job_keys = {"name", "runs-on", "needs", "if", "permissions", "environment", "concurrency", "outputs", "env",
+            "defaults", "steps", "timeout-minutes", "strategy", "continue-on-error", "container", "services",
+            "uses", "with", "secrets"}
+step_keys = {"name", "id", "if", "uses", "run", "shell", "with", "env", "working-directory", "continue-on-error",
+             "timeout-minutes"}
+
+# line_number is 1-based
+Problem = collections.namedtuple("Problem", ["line_number", "message"])
+# indent: column of the first character; column: column of the key ("- name: x" -> indent + 2)
+Node = collections.namedtuple("Node", ["indent", "dash", "column", "key", "value"])
+
+_key_pattern = re.compile(r"^(['\"]?)([A-Za-z0-9_.-]+)\1\s*:(?:\s+|$)(.*)$")
+_block_scalar_pattern = re.compile(r"^[|>]([1-9])?[+-]?([1-9])?\s*(?:#.*)?$")
+_heredoc_pattern = re.compile(r"(?<!<)<<(-?)\s*(['\"]?)([A-Za-z_][A-Za-z0-9_]*)\2")
+
+
+class WorkflowStructureError(ValueError):
+    def __init__(self, problems, transform=None):
+        where = f"'{transform}' broke the workflow structure" if transform else "The workflow structure is broken"
+        super().__init__(where + ":\n" + "\n".join(f"  line {p.line_number}: {p.message}" for p in problems))
+        self.problems = problems
+        self.transform = transform
+
+
+def _is_open(value):
+    # A flow collection or quoted scalar that does not end on its line
+    if value[:1] in ("{", "["):
+        return _flow_depth(value) > 0
+    if value[:1] in ("'", '"'):
+        return len(value) < 2 or not value.endswith(value[0])
+    return False
+
+
+def _flow_depth(value):
+    depth = 0
+    quote = None
+    for char in value:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+    return depth
+
+
+def _flow_keys(value):
+    # The keys of a flow mapping that fits on its line ("{name: x, uses: y}"), else None
+    if not (value.startswith("{") and value.endswith("}")) or _flow_depth(value):
+        return None
+    keys = []
+    depth = 0
+    quote = None
+    entry = ""
+    for char in value[1:-1] + ",":
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+        elif char == "," and not depth:
+            key = entry.split(":", 1)[0].strip().strip("'\"")
+            if key:
+                keys.append(key)
+            entry = ""
+            continue
+        entry += char
+    return keys
+
+
+def _plain_value(raw_value):
+    value = raw_value.strip()
+    if value.startswith("#"):
+        return ""
+    if value[:1] in ("'", '"'):
+        return value
+    comment_index = value.find(" #")
+    return value[:comment_index].rstrip() if comment_index != -1 else value
+
+
+class WorkflowValidator:
+    def __init__(self, lines):
+        self.lines = lines
+        self._nodes = {}
+        self._above = {}
+        self._parents = {}
+        self._scalars = {}
+        self._checked = {}
+        self._checked_mappings = set()
+        self._checked_steps = set()
+        self._checked_scalars = set()
+        self.problems = set()
+
+    # --- The indentation tree ----------------------------------------------------------
+
+    def significant(self, index):
+        stripped = self.lines[index].strip()
+        return bool(stripped) and not stripped.startswith("#")
+
+    def indent(self, index):
+        line = self.lines[index]
+        return len(line) - len(line.lstrip(" "))
+
+    def node(self, index):
+        if index not in self._nodes:
+            line = self.lines[index].rstrip("\n")
+            indent = self.indent(index)
+            text = line.strip()
+            dash = text == "-" or text.startswith("- ")
+            rest = text[1:].lstrip() if dash else text
+            column = indent + len(text) - len(rest)
+            key_match = _key_pattern.match(rest)
+            if key_match:
+                node = Node(indent, dash, column, key_match.group(2), _plain_value(key_match.group(3)))
+            else:
+                node = Node(indent, dash, column, None, rest)
+            self._nodes[index] = node
+        return self._nodes[index]
+
+    def previous(self, index):
+        index -= 1
+        while index >= 0 and not self.significant(index):
+            index -= 1
+        return index if index >= 0 else None
+
+    def next(self, index, end=None):
+        end = len(self.lines) if end is None else end
+        while index < end and not self.significant(index):
+            index += 1
+        return index if index < end else None
+
+    def above(self, index):
+        # The nearest significant line before index that is less indented
+        if index not in self._above:
+            indent = self.indent(index)
+            current = self.previous(index)
+            while current is not None and self.indent(current) >= indent:
+                # Everything between a line and the line above it is at least as indented
+                current = self._above[current] if current in self._above else self.previous(current)
+            self._above[index] = current
+        return self._above[index]
+
+    def parent(self, index):
+        # Like above(), except that a "- " item can sit at the indent of its key
+        # ("steps:" followed by "- name: ..." in the same column)
+        if index not in self._parents:
+            node = self.node(index)
+            result = self.above(index)
+            current = index
+            while node.dash:
+                # Back over the earlier items of the same list, to the key that owns it
+                current = self.previous(current)
+                while current is not None and self.indent(current) > node.indent:
+                    current = self.above(current)
+                if current is None or self.indent(current) != node.indent:
+                    break
+                other = self.node(current)
+                if not other.dash:
+                    if other.key is not None and not other.value:
+                        result = current
+                    break
+                if current in self._parents:
+                    result = self._parents[current]
+                    break
+            self._parents[index] = result
+        return self._parents[index]
+
+    def chain(self, index):
+        chain = []
+        current = self.parent(index)
+        while current is not None:
+            chain.append(current)
+            current = self.parent(current)
+        return chain
+
+    def scalar_of(self, index):
+        # The "key: |" line whose block scalar index belongs to, or None
+        if index not in self._scalars:
+            path = [index] + self.chain(index)
+            result = None
+            for position in range(len(path) - 1, 0, -1):
+                header = self.node(path[position])
+                if (header.key is not None and _block_scalar_pattern.match(header.value)
+                        and self.indent(path[position - 1]) > header.column):
+                    result = path[position]
+                    break
+            self._scalars[index] = result
+        return self._scalars[index]
+
+    def _problem(self, index, message):
+        self.problems.add(Problem(index + 1, message))
+
+    # --- Checks ------------------------------------------------------------------------
+
+    def check_line(self, index, changed=False):
+        # Every line gets the checks that only look at its parent and its first sibling;
+        # a changed line also gets the checks of the whole mapping it is in (duplicates)
+        if index not in self._checked:
+            self._checked[index] = self.check_shape(index)
+        if changed and self._checked[index]:
+            node = self.node(index)
+            if node.dash:
+                if node.key is not None:
+                    self.check_mapping(index, node.column)
+            else:
+                self.check_mapping(self.parent(index), node.indent)
+
+    def check_shape(self, index):
+        # False when the line is misplaced (its mapping is then not worth checking) or
+        # only continues the value above it
+        line = self.lines[index]
+        if "\t" in line[:len(line) - len(line.lstrip(" \t"))]:
+            self._problem(index, "tab in the indentation (YAML only allows spaces)")
+            return False
+        node = self.node(index)
+        parent = self.parent(index)
+
+        if parent is None:
+            if node.indent:
+                self._problem(index, f"indented {node.indent} space(s) but nothing above it is less indented")
+            elif node.dash or node.key is None:
+                self._problem(index, "the top level of a workflow must be 'key: value' entries")
+            elif node.key not in top_level_keys:
+                self._problem(index, f"unknown top-level key '{node.key}'")
+            else:
+                return self.check_placement(index, None)
+            return False
+
+        owner = self.node(parent)
+        if owner.value and (_is_open(owner.value) or (node.key is None and owner.key is not None)):
+            # Part of the value above: a flow collection or quoted scalar that is still
+            # open, or the next line of a multi-line plain scalar ("args: --a" / "--b")
+            return False
+        if owner.dash and node.indent == owner.column:
+            # Another key of the mapping that starts on the "- " line
+            if node.dash or node.key is None:
+                self._problem(index, f"expected a key at column {owner.column + 1}, in the list item of "
+                                     f"line {parent + 1}")
+                return False
+            return self.check_placement(index, parent)
+
+        label = owner.key or "-"
+        if owner.key is None and not owner.dash:
+            self._problem(index, f"more indented than line {parent + 1}, which is not a 'key:' line")
+            return False
+        if owner.value:
+            self._problem(index, f"nested under '{label}' (line {parent + 1}), which already has a value "
+                                 f"on its line")
+            return False
+
+        first = self.next(parent + 1)
+        if first != index:
+            first_node = self.node(first)
+            if first_node.indent != node.indent:
+                self._problem(index, f"indented {node.indent} space(s) but the first entry under '{label}' "
+                                     f"(line {first + 1}) is indented {first_node.indent}")
+                return False
+            if first_node.dash != node.dash:
+                self._problem(index, f"'{label}' (line {parent + 1}) mixes list items and keys")
+                return False
+        if not node.dash and node.key is None:
+            self._problem(index, f"expected 'key: value' under '{label}' (line {parent + 1})")
+            return False
+        return self.check_placement(index, parent)
+
+    def check_placement(self, index, parent):
+        # The rules that depend on where the line sits: top-level keys, job ids, job keys,
+        # the step list and the keys of a step
+        node = self.node(index)
+        if node.key in ("jobs", "steps") and not node.value:
+            following = self.next(index + 1)
+            if following is None or self.parent(following) != index:
+                self._problem(index, f"'{node.key}' is empty")
+                return False
+        if parent is None:
+            return True
+        owner = self.node(parent)
+        grandparent = self.parent(parent)
+        if owner.dash:
+            if grandparent is not None and self.node(grandparent).key == "steps":
+                if node.key not in step_keys:
+                    self._problem(index, f"unknown step key '{node.key}'")
+                    return False
+                self.check_step(parent)
+        elif owner.key == "jobs" and grandparent is None:
+            if node.value:
+                self._problem(index, f"job '{node.key}' must be a mapping, not a value")
+                return False
+        elif grandparent is not None and self.node(grandparent).key == "jobs" and self.parent(grandparent) is None:
+            if node.key not in job_keys:
+                self._problem(index, f"unknown key '{node.key}' in job '{owner.key}'")
+                return False
+        elif owner.key == "steps":
+            if not node.dash:
+                self._problem(index, "'steps' must be a list of '- ' items")
+                return False
+            self.check_step(index)
+        return True
+
+    def mapping_entries(self, parent, indent):
+        # (key, line) of the entries at indent under parent (the top level for None)
+        entries = []
+        start = 0
+        if parent is not None:
+            owner = self.node(parent)
+            if owner.dash and owner.key is not None and indent == owner.column:
+                entries.append((owner.key, parent))
+            start = parent + 1
+        for index in range(start, len(self.lines)):
+            if not self.significant(index):
+                continue
+            line_indent = self.indent(index)
+            if line_indent < indent:
+                break
+            if line_indent == indent:
+                node = self.node(index)
+                if not node.dash and node.key is not None:
+                    entries.append((node.key, index))
+        return entries
+
+    def check_mapping(self, parent, indent):
+        if (parent, indent) in self._checked_mappings:
+            return
+        self._checked_mappings.add((parent, indent))
+        seen = {}
+        for key, index in self.mapping_entries(parent, indent):
+            if key in seen:
+                self._problem(index, f"duplicate key '{key}' (first on line {seen[key] + 1})")
+            else:
+                seen[key] = index
+
+    def check_step(self, item):
+        if item in self._checked_steps:
+            return
+        self._checked_steps.add(item)
+        node = self.node(item)
+        if node.key is None and node.value.startswith("{"):
+            keys = _flow_keys(node.value)
+            if keys is None:
+                # A flow mapping over several lines: not followed
+                return
+            for key in keys:
+                if key not in step_keys:
+                    self._problem(item, f"unknown step key '{key}'")
+            keys = set(keys)
+        elif node.key is None:
+            following = self.next(item + 1)
+            if node.value or following is None or self.parent(following) != item:
+                self._problem(item, "a step must be a mapping ('- name: ...')")
+                return
+            keys = {key for key, _ in self.mapping_entries(item, self.node(following).indent)}
+        else:
+            keys = {key for key, _ in self.mapping_entries(item, node.column)}
+        if "run" in keys and "uses" in keys:
+            self._problem(item, "a step has either 'run' or 'uses', not both")
+        elif "run" not in keys and "uses" not in keys:
+            self._problem(item, "a step needs 'run' or 'uses'")
+
+    def check_scalar(self, header):
+        if header in self._checked_scalars:
+            return
+        self._checked_scalars.add(header)
+        node = self.node(header)
+        indicator = _block_scalar_pattern.match(node.value)
+        explicit = indicator.group(1) or indicator.group(2)
+        end = header + 1
+        while end < len(self.lines) and (not self.lines[end].strip() or self.indent(end) > node.column):
+            end += 1
+        first = next((index for index in range(header + 1, end) if self.lines[index].strip()), None)
+        if first is None:
+            self._problem(header, f"'{node.key}: {node.value}' has no content")
+            return
+        content_indent = node.column + int(explicit) if explicit else self.indent(first)
+        for index in range(first, end):
+            if self.lines[index].strip() and self.indent(index) < content_indent:
+                self._problem(index, f"less indented than the first line of the '{node.key}' block "
+                                     f"(line {first + 1}), which ends the block too early")
+        if node.key == "run":
+            self.check_heredocs(header, first, end, content_indent)
+
+    def check_heredocs(self, header, start, end, content_indent):
+        pending = []     # (delimiter, tabs allowed, line)
+        closed = set()
+        for index in range(start, end):
+            text = self.lines[index].rstrip("\n")[content_indent:]
+            if pending:
+                delimiter, tabs, opened = pending[0]
+                if (text.lstrip("\t") if tabs else text) == delimiter:
+                    pending.pop(0)
+                    closed.add(delimiter)
+                elif text.strip() == delimiter:
+                    self._problem(index, f"heredoc terminator '{delimiter}' (opened on line {opened + 1}) "
+                                         f"is indented; the shell only ends the heredoc at '{delimiter}' "
+                                         f"alone on a line")
+                    pending.pop(0)
+                continue
+            stripped = text.strip()
+            if stripped == "EOF" or stripped in closed:
+                self._problem(index, f"'{stripped}' without an open heredoc")
+                continue
+            if stripped.startswith("#"):
+                continue
+            for tabs, _, delimiter in _heredoc_pattern.findall(text):
+                pending.append((delimiter, bool(tabs), index))
+        for delimiter, _, opened in pending:
+            self._problem(opened, f"heredoc '{delimiter}' is never closed before the end of the run block "
+                                  f"(line {header + 1})")
+
+    # --- Entry points ------------------------------------------------------------------
+
+    def targets(self, ranges):
+        # The changed lines, plus the first line after every range and the last one before
+        # a deletion: their parent may have changed without them changing
+        targets = set()
+        for start, end in ranges:
+            targets.update(index for index in range(start, min(end, len(self.lines))) if self.significant(index))
+            after = self.next(end)
+            if after is not None:
+                targets.add(after)
+            if start == end:
+                before = self.previous(start)
+                if before is not None:
+                    targets.add(before)
+        return sorted(targets)
+
+    def validate(self, ranges=None):
+        # ranges: [(start, end)] of 0-based line numbers; None checks every line
+        ranges = [(0, len(self.lines))] if ranges is None else ranges
+        for index in self.targets(ranges):
+            header = self.scalar_of(index)
+            if header is not None:
+                self.check_scalar(header)
+                index = header
+            self.check_line(index, changed=header is None)
+            for line in [index] + self.chain(index):
+                self.check_line(line)
+                node = self.node(line)
+                if node.key is not None and _block_scalar_pattern.match(node.value):
+                    self.check_scalar(line)
+        return sorted(self.problems)
+
+
+def validate_lines(lines, ranges=None):
+    return WorkflowValidator(lines).validate(ranges)
+
+
+def validate_edit(old_lines, new_lines):
+    # Problems in the lines of new_lines that differ from old_lines (and their parents)
+    if new_lines is old_lines:
+        return []
+    ranges = [(new_start, new_end) for _, _, new_start, new_end in changed_ranges(old_lines, new_lines)]
+    if not ranges:
+        return []
+    return validate_lines(new_lines, ranges)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the indentation structure of a workflow file.")
+    parser.add_argument("--file", default=workflow_file_path, help="workflow file to check")
+    parser.add_argument("--against", help="only check the lines that differ from this earlier version")
+    args = parser.parse_args(argv)
+
+    with open(args.file, "r") as f:
+        lines = f.readlines()
+    if args.against:
+        with open(args.against, "r") as f:
+            problems = validate_edit(f.readlines(), lines)
+    else:
+        problems = validate_lines(lines)
+
+    for problem in problems:
+        print(f"{args.file}:{problem.line_number}: {problem.message}")
+    if problems:
+        print(f"{len(problems)} problem(s) found.")
+        return 1
+    print(f"No structural problems in {args.file}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())